@@ -0,0 +1,61 @@
+"""Add composite and partial indexes for the hot queries
+
+Revision ID: 3f9a6c1d2e84
+Revises: 7c1e4b2d9a10
+Create Date: 2026-10-19 12:00:00.000000
+
+Built CONCURRENTLY so messages and wellness_logs stay writable while the
+indexes build. app/tests/test_query_plans.py checks the planner uses them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a6c1d2e84'
+down_revision: Union[str, None] = '7c1e4b2d9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_session_id_created_at', 'messages', ['session_id', 'created_at'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_messages_escalated_queue', 'messages', [sa.text('risk_score DESC'), 'created_at', 'id'],
+            postgresql_where=sa.text('is_escalated = true'), postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_messages_deleted_at', 'messages', ['deleted_at'],
+            postgresql_where=sa.text('is_deleted = true'), postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_wellness_logs_patient_id_created_at', 'wellness_logs', ['patient_id', 'created_at'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_wellness_logs_deleted_at', 'wellness_logs', ['deleted_at'],
+            postgresql_where=sa.text('is_deleted = true'), postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_sessions_user_id', 'sessions', ['user_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, index in [
+            ('sessions', 'ix_sessions_user_id'),
+            ('wellness_logs', 'ix_wellness_logs_deleted_at'),
+            ('wellness_logs', 'ix_wellness_logs_patient_id_created_at'),
+            ('messages', 'ix_messages_deleted_at'),
+            ('messages', 'ix_messages_escalated_queue'),
+            ('messages', 'ix_messages_session_id_created_at'),
+        ]:
+            op.drop_index(index, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -1,14 +1,18 @@
 """Initial migration
 
 Revision ID: 416c2255a961
-Revises: 
+Revises:
 Create Date: 2025-09-21 11:48:06.620603
 
+Creates the original schema. Databases set up before the API stopped running
+create_all at import already have these tables; they are skipped, so such a
+database can be brought under Alembic with a plain `alembic upgrade head`.
 """
 from typing import Sequence, Union
 
 from alembic import op
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
 
 # revision identifiers, used by Alembic.
@@ -17,14 +21,108 @@ down_revision: Union[str, None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+UUID = postgresql.UUID(as_uuid=True)
+
 
 def upgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'roles' not in existing:
+        op.create_table(
+            'roles',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=50), nullable=False, unique=True),
+        )
+        op.create_index('ix_roles_id', 'roles', ['id'])
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', UUID, primary_key=True),
+            sa.Column('username', sa.String(length=100), nullable=False),
+            sa.Column('email', sa.String(length=255), nullable=False),
+            sa.Column('hashed_password', sa.String(length=255), nullable=False),
+            sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+            sa.Column('totp_secret', sa.String(length=32), nullable=True),
+            sa.Column('is_2fa_enabled', sa.Boolean(), nullable=True),
+            sa.Column('preferred_language', sa.String(length=5), nullable=True),
+            sa.Column('is_deleted', sa.Boolean(), nullable=True),
+            sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'sessions' not in existing:
+        op.create_table(
+            'sessions',
+            sa.Column('id', UUID, primary_key=True),
+            sa.Column('user_id', UUID, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+            sa.Column('ended_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_sessions_id', 'sessions', ['id'])
+
+    if 'messages' not in existing:
+        op.create_table(
+            'messages',
+            sa.Column('id', UUID, primary_key=True),
+            sa.Column('session_id', UUID, sa.ForeignKey('sessions.id'), nullable=False),
+            sa.Column('sender_id', UUID, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('audio_data', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+            sa.Column('is_escalated', sa.Boolean(), nullable=True),
+            sa.Column('risk_score', sa.Float(), nullable=True),
+            sa.Column('risk_tags', sa.JSON(), nullable=True),
+            sa.Column('is_deleted', sa.Boolean(), nullable=True),
+            sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_messages_id', 'messages', ['id'])
+
+    if 'consultant_interventions' not in existing:
+        op.create_table(
+            'consultant_interventions',
+            sa.Column('id', UUID, primary_key=True),
+            sa.Column('consultant_id', UUID, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('message_id', UUID, sa.ForeignKey('messages.id'), nullable=False),
+            sa.Column('intervention_type', sa.String(length=50), nullable=False),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        )
+        op.create_index('ix_consultant_interventions_id', 'consultant_interventions', ['id'])
+
+    if 'audit_logs' not in existing:
+        op.create_table(
+            'audit_logs',
+            sa.Column('id', UUID, primary_key=True),
+            sa.Column('user_id', UUID, sa.ForeignKey('users.id'), nullable=True),
+            sa.Column('action', sa.String(length=100), nullable=False),
+            sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+            sa.Column('audit_metadata', sa.JSON(), nullable=True),
+        )
+        op.create_index('ix_audit_logs_id', 'audit_logs', ['id'])
+        op.create_index('ix_audit_logs_action', 'audit_logs', ['action'])
+        op.create_index('ix_audit_logs_timestamp', 'audit_logs', ['timestamp'])
+
+    if 'wellness_logs' not in existing:
+        op.create_table(
+            'wellness_logs',
+            sa.Column('id', UUID, primary_key=True),
+            sa.Column('patient_id', UUID, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('mood_score', sa.Integer(), nullable=False),
+            sa.Column('note', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+            sa.Column('is_deleted', sa.Boolean(), nullable=True),
+            sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_wellness_logs_id', 'wellness_logs', ['id'])
+        op.create_index('ix_wellness_logs_created_at', 'wellness_logs', ['created_at'])
 
 
 def downgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    for table in [
+        'wellness_logs', 'audit_logs', 'consultant_interventions', 'messages', 'sessions', 'users', 'roles'
+    ]:
+        op.drop_table(table)
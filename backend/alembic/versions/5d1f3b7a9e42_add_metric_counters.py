@@ -0,0 +1,59 @@
+"""Add metric_counters for the admin dashboard
+
+Revision ID: 5d1f3b7a9e42
+Revises: c4e8a1f05b27
+Create Date: 2026-10-19 18:00:00.000000
+
+The counters are seeded from the source tables here and then kept current by
+app/services/counters.py. Writes that commit while this migration runs are
+picked up by the first reconcile_counters_task. sessions.started_at is
+indexed (CONCURRENTLY) for the reconciliation's last-24-hours recount.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1f3b7a9e42'
+down_revision: Union[str, None] = 'c4e8a1f05b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metric_counters',
+        sa.Column('name', sa.String(length=100), primary_key=True),
+        sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+    op.execute("""
+        INSERT INTO metric_counters (name, value)
+        SELECT 'users', count(*) FROM users
+        UNION ALL
+        SELECT 'users_role:' || role_id, count(*) FROM users GROUP BY role_id
+        UNION ALL
+        SELECT 'escalations', count(*) FROM messages WHERE is_escalated = true
+        UNION ALL
+        SELECT 'escalations_critical', count(*) FROM messages WHERE is_escalated = true AND risk_score >= 0.8
+        UNION ALL
+        SELECT 'sessions_started:' || to_char(date_trunc('hour', timezone('UTC', started_at)), 'YYYY-MM-DD"T"HH24'),
+               count(*)
+        FROM sessions
+        WHERE started_at >= date_trunc('hour', now() - interval '24 hours') AND ended_at IS NULL
+        GROUP BY 1
+    """)
+    # Commits the table and seed before the concurrent build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sessions_started_at', 'sessions', ['started_at'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_started_at', table_name='sessions', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('metric_counters')
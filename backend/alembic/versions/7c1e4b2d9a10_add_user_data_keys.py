@@ -0,0 +1,39 @@
+"""Add user_data_keys for per-user envelope encryption
+
+Revision ID: 7c1e4b2d9a10
+Revises: 416c2255a961
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b2d9a10'
+down_revision: Union[str, None] = '416c2255a961'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Already there on databases the API used to create_all
+    if 'user_data_keys' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'user_data_keys',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('wrapped_key', sa.Text(), nullable=False),
+        sa.Column('master_key_id', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.Column('rewrapped_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_user_data_keys_master_key_id', 'user_data_keys', ['master_key_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_data_keys_master_key_id', table_name='user_data_keys')
+    op.drop_table('user_data_keys')
@@ -0,0 +1,38 @@
+"""Store messages.risk_tags as JSONB and index it with GIN
+
+Revision ID: 8e3c6a2f4b19
+Revises: 5d1f3b7a9e42
+Create Date: 2026-10-19 20:00:00.000000
+
+JSONB lets the analytics aggregate over tags in SQL (jsonb_array_elements_text)
+and the escalation queue filter by tag (@>, served by the GIN index). Changing
+the column type rewrites every messages partition under an exclusive lock, and
+indexes on a partitioned table can't be built CONCURRENTLY: run it in a
+maintenance window. The index is partial (escalated rows only) and uses
+jsonb_path_ops, which is smaller and only needs to support containment.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3c6a2f4b19'
+down_revision: Union[str, None] = '5d1f3b7a9e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE messages ALTER COLUMN risk_tags TYPE jsonb USING risk_tags::jsonb")
+    op.create_index(
+        'ix_messages_risk_tags', 'messages', ['risk_tags'],
+        postgresql_using='gin', postgresql_ops={'risk_tags': 'jsonb_path_ops'},
+        postgresql_where=sa.text('is_escalated = true')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_risk_tags', table_name='messages')
+    op.execute("ALTER TABLE messages ALTER COLUMN risk_tags TYPE json USING risk_tags::json")
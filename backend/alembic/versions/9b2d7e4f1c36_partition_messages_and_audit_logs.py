@@ -0,0 +1,168 @@
+"""Partition messages and audit_logs by month
+
+Revision ID: 9b2d7e4f1c36
+Revises: 3f9a6c1d2e84
+Create Date: 2026-10-19 14:00:00.000000
+
+Rebuilds both tables as PARTITION BY RANGE on their timestamp, with one
+partition per month from the oldest row through PARTITION_MONTHS_AHEAD
+(3) months from now (see app/services/partitions.py), and copies the rows
+across. The primary keys become (id, <timestamp>) since a partitioned table's
+unique constraints must include the partition key.
+
+That also means consultant_interventions.message_id can no longer reference
+messages.id, so its foreign key (consultant_interventions_message_id_fkey) is
+DROPPED. What it enforced is kept by other means:
+* a BEFORE INSERT OR UPDATE trigger rejects an intervention whose message
+  doesn't exist (foreign_key_violation), locking the message FOR KEY SHARE as
+  the foreign key check did;
+* messages are only soft-deleted by the API, and retention, which drops whole
+  partitions, deletes the interventions of a partition's messages in the same
+  transaction (app/services/partitions.py).
+message_id gets an index in place of the one the foreign key implied. The
+downgrade deletes any intervention whose message is gone, then restores the
+foreign key.
+
+The copy holds an exclusive lock on both tables for its duration, so run it in
+a maintenance window. Tables that are already partitioned (databases created
+from the current models) are left alone.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2d7e4f1c36'
+down_revision: Union[str, None] = '3f9a6c1d2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# table -> (partition key, foreign keys, indexes)
+TABLES = {
+    'messages': (
+        'created_at',
+        [('session_id', 'sessions'), ('sender_id', 'users')],
+        [
+            ('ix_messages_id', 'id', None),
+            ('ix_messages_session_id_created_at', 'session_id, created_at', None),
+            ('ix_messages_escalated_queue', 'risk_score DESC, created_at, id', 'is_escalated = true'),
+            ('ix_messages_deleted_at', 'deleted_at', 'is_deleted = true'),
+        ],
+    ),
+    'audit_logs': (
+        'timestamp',
+        [('user_id', 'users')],
+        [
+            ('ix_audit_logs_id', 'id', None),
+            ('ix_audit_logs_action', 'action', None),
+            ('ix_audit_logs_timestamp', 'timestamp', None),
+        ],
+    ),
+}
+
+
+def _relkind(table: str):
+    return op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+    ).scalar()
+
+
+def _add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _month(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo else moment
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def _create_partitions(table: str, key: str, source: str) -> None:
+    oldest, newest = op.get_bind().execute(sa.text(f"SELECT min({key}), max({key}) FROM {source}")).one()
+    now = datetime.now(timezone.utc)
+    month = _month(oldest or now)
+    last = max(_month(newest or now), _add_months(_month(now), MONTHS_AHEAD))
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{_add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+
+
+def _add_keys_and_indexes(table: str, primary_key: str, foreign_keys, indexes) -> None:
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})")
+    for column, referenced in foreign_keys:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referenced} (id)"
+        )
+    for name, columns, where in indexes:
+        op.execute(f"CREATE INDEX {name} ON {table} ({columns})" + (f" WHERE {where}" if where else ""))
+
+
+MESSAGE_EXISTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION consultant_interventions_message_exists() RETURNS trigger AS $$
+BEGIN
+    PERFORM 1 FROM messages WHERE id = NEW.message_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'message % does not exist', NEW.message_id USING ERRCODE = 'foreign_key_violation';
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    for table, (key, foreign_keys, indexes) in TABLES.items():
+        if _relkind(table) != 'r':
+            continue
+        old = f'{table}_unpartitioned'
+        op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})")
+        op.execute(f"UPDATE {old} SET {key} = now() WHERE {key} IS NULL")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL")
+        _create_partitions(table, key, old)
+        op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        # Also drops consultant_interventions' foreign key to messages
+        op.execute(f"DROP TABLE {old} CASCADE")
+        _add_keys_and_indexes(table, f'id, {key}', foreign_keys, indexes)
+        op.execute(f"ANALYZE {table}")
+
+    op.create_index(
+        'ix_consultant_interventions_message_id', 'consultant_interventions', ['message_id'], if_not_exists=True
+    )
+    op.execute(MESSAGE_EXISTS_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS consultant_interventions_message_exists ON consultant_interventions")
+    op.execute(
+        "CREATE TRIGGER consultant_interventions_message_exists "
+        "BEFORE INSERT OR UPDATE OF message_id ON consultant_interventions "
+        "FOR EACH ROW EXECUTE FUNCTION consultant_interventions_message_exists()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS consultant_interventions_message_exists ON consultant_interventions")
+    op.execute("DROP FUNCTION IF EXISTS consultant_interventions_message_exists()")
+    op.drop_index('ix_consultant_interventions_message_id', table_name='consultant_interventions', if_exists=True)
+
+    for table, (key, foreign_keys, indexes) in TABLES.items():
+        if _relkind(table) != 'p':
+            continue
+        partitioned = f'{table}_partitioned'
+        op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+        op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+        op.execute(f"DROP TABLE {partitioned} CASCADE")
+        _add_keys_and_indexes(table, 'id', foreign_keys, indexes)
+
+    op.execute("DELETE FROM consultant_interventions WHERE message_id NOT IN (SELECT id FROM messages)")
+    op.create_foreign_key(
+        'consultant_interventions_message_id_fkey', 'consultant_interventions', 'messages', ['message_id'], ['id']
+    )
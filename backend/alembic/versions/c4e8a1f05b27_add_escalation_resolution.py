@@ -0,0 +1,46 @@
+"""Track escalation resolution and index the open escalation queue
+
+Revision ID: c4e8a1f05b27
+Revises: 9b2d7e4f1c36
+Create Date: 2026-10-19 16:00:00.000000
+
+messages.escalation_resolved_at is backfilled from the 'resolve'
+consultant interventions. The open-queue index is partial (unresolved
+escalations only) and so quick to build, but messages is partitioned and
+indexes on partitioned tables can't be built CONCURRENTLY: writes to messages
+wait for the build.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f05b27'
+down_revision: Union[str, None] = '9b2d7e4f1c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('escalation_resolved_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE messages SET escalation_resolved_at = resolved.at
+        FROM (
+            SELECT message_id, min(created_at) AS at
+            FROM consultant_interventions
+            WHERE intervention_type = 'resolve'
+            GROUP BY message_id
+        ) AS resolved
+        WHERE messages.id = resolved.message_id AND messages.is_escalated = true
+    """)
+    op.create_index(
+        'ix_messages_open_escalations', 'messages', [sa.text('risk_score DESC'), 'created_at', 'id'],
+        postgresql_where=sa.text('is_escalated = true AND escalation_resolved_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_open_escalations', table_name='messages')
+    op.drop_column('messages', 'escalation_resolved_at')
@@ -1,4 +1,7 @@
 from celery import Celery
+from celery.schedules import crontab, schedule
+from celery.signals import worker_process_init
+from datetime import timedelta
 import os
 
 # Create Celery instance
@@ -16,4 +19,40 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-)
\ No newline at end of file
+    # Whisper work runs on dedicated workers: celery -A app.celery_app worker -Q audio
+    task_routes={
+        "app.tasks.prepare_transcription_job_task": {"queue": "audio"},
+        "app.tasks.transcribe_chunk_task": {"queue": "audio"},
+        "app.tasks.finalize_transcription_job_task": {"queue": "audio"},
+        # Long-running backfills stay off the notification workers
+        "app.tasks.rescore_messages_task": {"queue": "maintenance"},
+        "app.tasks.reencrypt_data_task": {"queue": "maintenance"},
+        "app.tasks.ensure_partitions_task": {"queue": "maintenance"},
+        "app.tasks.enforce_retention_policy_task": {"queue": "maintenance"},
+        "app.tasks.reconcile_counters_task": {"queue": "maintenance"},
+    },
+    # celery -A app.celery_app beat
+    beat_schedule={
+        "ensure-partitions": {
+            "task": "app.tasks.ensure_partitions_task",
+            "schedule": crontab(hour=0, minute=30),
+        },
+        "enforce-retention-policy": {
+            "task": "app.tasks.enforce_retention_policy_task",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "reconcile-counters": {
+            "task": "app.tasks.reconcile_counters_task",
+            # An interval, not a crontab step: */N minutes can't express 60 or more
+            "schedule": schedule(timedelta(minutes=int(os.getenv("COUNTER_RECONCILE_MINUTES", "15")))),
+        },
+    },
+)
+@worker_process_init.connect
+def preload_whisper(**kwargs):
+    """Audio workers (WHISPER_PRELOAD=true) load the default Whisper tier at start"""
+    from .services.whisper_models import WHISPER_PRELOAD, get_model_pool
+
+    if WHISPER_PRELOAD:
+        pool = get_model_pool()
+        pool.preload([pool.default_tier])
@@ -0,0 +1,86 @@
+"""Connection pool settings and instrumentation.
+
+Every engine gets its pool settings from the environment (DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING) and is
+exported to Prometheus under an engine label:
+
+    therapybot_db_pool_checked_out / _idle / _overflow / _capacity
+        read from the pool at scrape time
+    therapybot_db_pool_checkout_wait_seconds
+        time from asking the pool for a connection to getting one, including
+        opening a new connection and the pre-ping
+    therapybot_db_pool_timeouts_total
+        checkouts that gave up after DB_POOL_TIMEOUT
+    therapybot_db_connection_age_seconds
+        age of each connection handed out, from pool events
+
+Checked-out near capacity with checkout waits climbing means requests are
+queueing for connections, not for the database or the LLM.
+"""
+
+import os
+import time
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .services.metrics import record_connection_age, record_pool_checkout, record_pool_timeout, watch_pool
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds; connections older than this are replaced on checkout (-1 never)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+
+class _TimedCheckout:
+    """Times Pool.connect(); the pool's logging name is the engine label"""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            waited = time.perf_counter() - started
+            record_pool_timeout(self.logging_name, waited)
+            logger.warning(f"Database pool '{self.logging_name}' exhausted: no connection after {waited:.1f}s")
+            raise
+        record_pool_checkout(self.logging_name, time.perf_counter() - started)
+        return connection
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(name: str, asyncio: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments for a named pool"""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if asyncio else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_logging_name": name
+    }
+
+def instrument_engine(engine, name: str):
+    """Export an engine's pool; for an AsyncEngine pass engine.sync_engine"""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connected_at = connection_record.info.get("connected_at")
+        if connected_at is not None:
+            record_connection_age(name, time.monotonic() - connected_at)
+
+    watch_pool(name, lambda: engine.pool, DB_POOL_SIZE + DB_MAX_OVERFLOW)
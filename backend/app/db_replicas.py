@@ -0,0 +1,203 @@
+"""Read-replica routing for read-only endpoints.
+
+Endpoints declared read-only (they take get_read_db instead of get_db:
+analytics, admin metrics and audit logs, privacy export) get a RoutingSession.
+Its reads go to one of the DATABASE_REPLICA_URLS engines and anything it
+writes (flushes, INSERT/UPDATE/DELETE statements) goes to the primary,
+which it then sticks to. A replica is only used when
+
+  - its replay lag, measured at most every REPLICA_LAG_CHECK_SECONDS, is within
+    REPLICA_MAX_LAG_SECONDS (unreachable replicas count as infinitely behind),
+  - and, if the user has written recently, it has replayed past that write.
+
+For the second condition every committed write made by an authenticated user
+(get_current_user tags the request's session with the user id) stamps
+ryw:<user id> in Redis, so stickiness holds across processes. The listeners
+that stamp writes are registered when this module is imported (deps imports
+it, so every API process has them), not when the router is first built: a
+process that has only served writes must still stamp them. A replica lagging
+L seconds is used for the user only once the write is older than L plus the
+lag-check interval. Without Redis, reads stay on the primary. Without replicas
+configured, get_read_db is a plain primary session.
+
+To try it locally, point DATABASE_REPLICA_URLS at a second Postgres; an
+instance that isn't in recovery reports zero lag.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import Delete, Insert, Update
+
+from .db import engine as primary_engine
+from .db_pool import instrument_engine, pool_options
+from .redis_client import get_redis
+from .services.metrics import record_read_route, record_replica_lag
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated SQLAlchemy URLs
+DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+
+# Zero on a primary, or on a standby that has replayed everything it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 'Infinity')
+    END
+""")
+
+def _last_write_key(user_id) -> str:
+    return f"ryw:{user_id}"
+
+def mark_user_write(user_id):
+    """Record that the user just committed a write"""
+    # Past this, every replica fresh enough to be used has replayed the write
+    window = int(REPLICA_MAX_LAG_SECONDS + REPLICA_LAG_CHECK_SECONDS) + 1
+    try:
+        get_redis().set(_last_write_key(user_id), time.time(), ex=window)
+    except Exception as e:
+        logger.warning(f"Could not record write for read-your-writes routing: {e}")
+
+def last_write_age(user_id) -> Optional[float]:
+    """Seconds since the user's last recorded write, None if outside the window"""
+    try:
+        written_at = get_redis().get(_last_write_key(user_id))
+    except Exception as e:
+        logger.warning(f"Read-your-writes state unavailable, reading from primary: {e}")
+        return 0.0
+    return max(time.time() - float(written_at), 0.0) if written_at is not None else None
+
+class Replica:
+    """A replica engine and its cached replay lag"""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self._lag = float("inf")
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def measure_lag(self) -> float:
+        try:
+            with self.engine.connect() as connection:
+                return float(connection.execute(REPLICA_LAG_SQL).scalar())
+        except Exception as e:
+            logger.warning(f"Replica {self.name} unavailable: {e}")
+            return float("inf")
+
+    def lag(self) -> float:
+        """Replay lag in seconds, measured at most every REPLICA_LAG_CHECK_SECONDS"""
+        if time.monotonic() - self._checked_at < REPLICA_LAG_CHECK_SECONDS:
+            return self._lag
+        with self._lock:
+            if time.monotonic() - self._checked_at >= REPLICA_LAG_CHECK_SECONDS:
+                self._lag = self.measure_lag()
+                self._checked_at = time.monotonic()
+                record_replica_lag(self.name, self._lag)
+        return self._lag
+
+class ReplicaRouter:
+    """Picks the engine a read-only session reads from"""
+
+    def __init__(self, primary, replicas: List[Replica]):
+        self.primary = primary
+        self.replicas = replicas
+
+    def choose(self, user_id=None) -> Tuple[object, str]:
+        """(engine, reason) for a session's reads"""
+        if not self.replicas:
+            return self.primary, "no_replica"
+        fresh = [(replica.lag(), replica) for replica in self.replicas]
+        fresh = [(lag, replica) for lag, replica in fresh if lag <= REPLICA_MAX_LAG_SECONDS]
+        if not fresh:
+            return self.primary, "replica_lagging"
+        if user_id is not None:
+            written = last_write_age(user_id)
+            if written is not None:
+                fresh = [(lag, replica) for lag, replica in fresh if lag + REPLICA_LAG_CHECK_SECONDS < written]
+                if not fresh:
+                    return self.primary, "read_your_writes"
+        return random.choice(fresh)[1].engine, "replica"
+
+    def session(self, user_id=None) -> "RoutingSession":
+        return RoutingSessionLocal(router=self, user_id=user_id)
+
+class RoutingSession(Session):
+    """Reads from the engine the router picks (on first read), writes to the
+    primary; once it has written, reads stay on the primary too"""
+
+    def __init__(self, router: ReplicaRouter, user_id=None, **kw):
+        super().__init__(**kw)
+        self.router = router
+        self.info["user_id"] = user_id
+        self._read_bind = None
+        self._pinned = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self._pinned = True
+        if self._pinned:
+            return self.router.primary
+        if self._read_bind is None:
+            self._read_bind, reason = self.router.choose(self.info.get("user_id"))
+            record_read_route("primary" if self._read_bind is self.router.primary else "replica", reason)
+        return self._read_bind
+
+RoutingSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+def _on_flush(session, flush_context):
+    session.info["wrote"] = True
+
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+def _on_commit(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        mark_user_write(session.info["user_id"])
+
+def _on_rollback(session):
+    session.info.pop("wrote", None)
+
+def track_user_writes():
+    """Stamp each user's committed writes, on every Session (sync and async)"""
+    if not event.contains(Session, "after_commit", _on_commit):
+        event.listen(Session, "after_flush", _on_flush)
+        event.listen(Session, "do_orm_execute", _on_orm_execute)
+        event.listen(Session, "after_commit", _on_commit)
+        event.listen(Session, "after_rollback", _on_rollback)
+
+# Before any write, not on the first read-only request
+if DATABASE_REPLICA_URLS.strip():
+    track_user_writes()
+
+def load_replicas(urls: str = DATABASE_REPLICA_URLS) -> List[Replica]:
+    replicas = []
+    for index, url in enumerate(url.strip() for url in urls.split(",") if url.strip()):
+        name = f"replica{index + 1}"
+        engine = create_engine(url, **pool_options(name))
+        instrument_engine(engine, name)
+        replicas.append(Replica(name, engine))
+    return replicas
+
+# Global router instance
+_replica_router = None
+
+def get_replica_router() -> ReplicaRouter:
+    """Get or create the router for the configured replicas"""
+    global _replica_router
+    if _replica_router is None:
+        replicas = load_replicas()
+        if replicas:
+            logger.info(f"Routing read-only endpoints across {len(replicas)} replica(s)")
+        _replica_router = ReplicaRouter(primary_engine, replicas)
+    return _replica_router
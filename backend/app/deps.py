@@ -1,10 +1,16 @@
+import uuid
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from jose import JWTError, jwt
-from .db import SessionLocal
+from .db import SessionLocal, get_async_db
+from .db_replicas import get_replica_router
 from .models import User
 from .security import SECRET_KEY, ALGORITHM
+from .services.principals import Principal, get_principal_cache
 
 security = HTTPBearer()
 
@@ -15,26 +21,93 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+def _token_identity(credentials: HTTPAuthorizationCredentials) -> Tuple[str, Optional[uuid.UUID]]:
+    """(username, user id) from a bearer token; the id is None for tokens
+    issued before they carried it"""
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
+        return username, uuid.UUID(payload["uid"]) if payload.get("uid") else None
+    except (JWTError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    user = db.query(User).filter(User.username == username).first()
+
+def _user_by_username(username: str):
+    return select(User).options(joinedload(User.role)).where(
+        User.username == username,
+        User.is_deleted.isnot(True)
+    )
+
+def _legacy_principal(user: Optional[User]) -> Principal:
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    # Not cached: without the user id there was no version to check it against
+    return Principal.from_user(user)
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """The authenticated caller, usually served from the principal cache"""
+    username, user_id = _token_identity(credentials)
+    if user_id is None:
+        principal = _legacy_principal(db.execute(_user_by_username(username)).scalars().first())
+    else:
+        principal = get_principal_cache().get(user_id, db)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    # Attributes the request's writes to the user, for read-your-writes routing
+    db.info["user_id"] = principal.id
+    return principal
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """get_current_user for async routes"""
+    username, user_id = _token_identity(credentials)
+    if user_id is None:
+        result = await db.execute(_user_by_username(username))
+        principal = _legacy_principal(result.scalars().first())
+    else:
+        principal = await get_principal_cache().get_async(user_id, db)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    db.info["user_id"] = principal.id
+    return principal
+
+def get_read_db(current_user: Principal = Depends(get_current_user)):
+    """Session for read-only endpoints: reads may be served by a replica"""
+    db = get_replica_router().session(current_user.id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_current_user_record(
+    principal: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """The caller's User row, for routes that modify it or need other columns"""
+    user = db.query(User).options(joinedload(User.role)).filter(User.id == principal.id).first()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+async def get_current_user_record_async(
+    principal: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user_record for async routes"""
+    user = await db.get(User, principal.id, options=[joinedload(User.role)])
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 def require_role(required_role: str):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: Principal = Depends(get_current_user)):
         if current_user.role.name != required_role:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         return current_user
-    return role_checker
\ No newline at end of file
+    return role_checker
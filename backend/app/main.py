@@ -1,11 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import auth, users, messages, escalation, voice, notifications, translation, guardrails, analytics, wellness, admin, privacy, health, chat
-from .models import Base
-from .db import engine
+from .db import engine, dispose_async_engine
 from .middleware import AuditMiddleware
 from .services.metrics import get_metrics
+from .services.partitions import missing_partitions
 from .startup_checks import run_startup_checks
+import asyncio
 import logging
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Response
@@ -16,8 +17,7 @@ from .routes import voice
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic (alembic upgrade head), not created here
 
 app = FastAPI(title="TherapyBot API")
 
@@ -25,7 +25,24 @@ app = FastAPI(title="TherapyBot API")
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting TherapyBot API...")
-    run_startup_checks()
+    # The Vertex AI check makes a model call; run it without holding up startup
+    asyncio.get_running_loop().run_in_executor(None, run_startup_checks)
+    # Inserts fail if their month's partition is missing. The migration and
+    # celery beat (ensure_partitions_task) create them; only check here
+    try:
+        with engine.connect() as connection:
+            missing = missing_partitions(connection)
+        if missing:
+            logger.error(
+                f"Missing table partitions for this month: {', '.join(missing)}; "
+                f"inserts into them will fail until celery beat and the maintenance worker run ensure_partitions_task"
+            )
+    except Exception as e:
+        logger.error(f"Could not check table partitions: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dispose_async_engine()
 
 # Add CORS middleware
 app.add_middleware(
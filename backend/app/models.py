@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Boolean, ForeignKey, Float, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 Base = declarative_base()
 
@@ -35,12 +35,22 @@ class User(Base):
     messages = relationship("Message", back_populates="sender")
     interventions = relationship("ConsultantIntervention", back_populates="consultant")
 
+class UserDataKey(Base):
+    __tablename__ = "user_data_keys"
+    
+    # Per-user data key, stored wrapped (encrypted) by the master key
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    wrapped_key = Column(Text, nullable=False)
+    master_key_id = Column(String(64), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    rewrapped_at = Column(DateTime(timezone=True), nullable=True)
+
 class Session(Base):
     __tablename__ = "sessions"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     ended_at = Column(DateTime(timezone=True), nullable=True)
     
     user = relationship("User", back_populates="sessions")
@@ -54,38 +64,70 @@ class Message(Base):
     sender_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)  # Encrypted sensitive field
     audio_data = Column(Text, nullable=True)  # Base64 encoded audio
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key (monthly ranges, see services/partitions.py), so part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     is_escalated = Column(Boolean, default=False)
     risk_score = Column(Float, nullable=True)
-    risk_tags = Column(JSON, nullable=True)
+    risk_tags = Column(JSONB, nullable=True)  # ['source:category', ...]
+    # Set when a consultant resolves the escalation (see ConsultantIntervention)
+    escalation_resolved_at = Column(DateTime(timezone=True), nullable=True)
     is_deleted = Column(Boolean, default=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     
     session = relationship("Session", back_populates="messages")
     sender = relationship("User", back_populates="messages")
     
+    __table_args__ = (
+        # A session's conversation, in order
+        Index("ix_messages_session_id_created_at", "session_id", "created_at"),
+        # The escalation queue: only escalated rows, already in queue order
+        Index(
+            "ix_messages_escalated_queue", risk_score.desc(), created_at, id,
+            postgresql_where=is_escalated == True
+        ),
+        # The open queue stays small however many escalations have been resolved
+        Index(
+            "ix_messages_open_escalations", risk_score.desc(), created_at, id,
+            postgresql_where=(is_escalated == True) & (escalation_resolved_at == None)
+        ),
+        # Retention purge of soft-deleted rows
+        Index("ix_messages_deleted_at", deleted_at, postgresql_where=is_deleted == True),
+        # Escalations by tag (risk_tags @> '["crisis:self_harm"]')
+        Index(
+            "ix_messages_risk_tags", risk_tags,
+            postgresql_using="gin", postgresql_ops={"risk_tags": "jsonb_path_ops"},
+            postgresql_where=is_escalated == True
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    # Rows are identified by id alone; created_at is only in the table's key for partitioning
+    __mapper_args__ = {"primary_key": [id]}
+    
     def set_content(self, value: str):
         """Encrypt content before storing"""
-        from ..security.encryption import encrypt_data
-        self.content = encrypt_data(value) if value else None
+        from .security.encryption import encrypt_data
+        self.content = encrypt_data(value, self.sender_id) if value else None
     
     def get_content(self) -> str:
-        """Decrypt content when retrieving"""
-        from ..security.encryption import decrypt_data
-        return decrypt_data(self.content) if self.content else None
+        """Decrypt content when retrieving (None if shredded or undecryptable)"""
+        from .security.encryption import decrypt_or_none
+        return decrypt_or_none(self.content, f"message {self.id}") if self.content else None
 
 class ConsultantIntervention(Base):
     __tablename__ = "consultant_interventions"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     consultant_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    message_id = Column(UUID(as_uuid=True), ForeignKey("messages.id"), nullable=False)
+    # No foreign key: messages is partitioned, so messages.id alone can't be
+    # referenced. A trigger checks it on insert, and retention deletes
+    # interventions with the partition their message was in.
+    message_id = Column(UUID(as_uuid=True), nullable=False, index=True)
     intervention_type = Column(String(50), nullable=False)  # 'contact', 'escalate', 'resolve'
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     consultant = relationship("User", back_populates="interventions")
-    message = relationship("Message")
+    message = relationship("Message", primaryjoin="foreign(ConsultantIntervention.message_id) == Message.id")
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -93,10 +135,22 @@ class AuditLog(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     action = Column(String(100), nullable=False, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Partition key (monthly ranges), so part of the primary key
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
     audit_metadata = Column(JSON, nullable=True)
     
     user = relationship("User")
+    
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
+    __mapper_args__ = {"primary_key": [id]}
+
+class MetricCounter(Base):
+    __tablename__ = "metric_counters"
+    
+    # Running totals behind /admin/metrics, kept current by services/counters.py
+    name = Column(String(100), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class WellnessLog(Base):
     __tablename__ = "wellness_logs"
@@ -111,12 +165,17 @@ class WellnessLog(Base):
     
     patient = relationship("User")
     
+    __table_args__ = (
+        Index("ix_wellness_logs_patient_id_created_at", "patient_id", "created_at"),
+        Index("ix_wellness_logs_deleted_at", deleted_at, postgresql_where=is_deleted == True),
+    )
+    
     def set_note(self, value: str):
         """Encrypt note before storing"""
-        from ..security.encryption import encrypt_data
-        self.note = encrypt_data(value) if value else None
+        from .security.encryption import encrypt_data
+        self.note = encrypt_data(value, self.patient_id) if value else None
     
     def get_note(self) -> str:
-        """Decrypt note when retrieving"""
-        from ..security.encryption import decrypt_data
-        return decrypt_data(self.note) if self.note else None
\ No newline at end of file
+        """Decrypt note when retrieving (None if shredded or undecryptable)"""
+        from .security.encryption import decrypt_or_none
+        return decrypt_or_none(self.note, f"wellness log {self.id}") if self.note else None
\ No newline at end of file
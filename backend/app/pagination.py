@@ -0,0 +1,42 @@
+"""Keyset pagination cursors.
+
+List endpoints that can grow without bound return a page of rows plus
+next_cursor, an opaque token holding the sort key of the page's last row. The
+next request passes it back and the query resumes after that row with an
+indexed range condition instead of an OFFSET, so every page costs the same no
+matter how deep into the list it is.
+"""
+
+import json
+import base64
+from datetime import datetime
+from typing import Any, Callable, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def encode_cursor(*values: Any) -> str:
+    """Cursor for a row's sort key (numbers, strings, datetimes, UUIDs, None)"""
+    payload = json.dumps([_plain(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> Tuple:
+    """The sort key in a cursor, each value converted by its parser (None stays
+    None); a malformed cursor is a 400"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong number of values")
+        return tuple(None if value is None else parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,13 @@
+import redis
+import os
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+_redis_client = None
+
+def get_redis() -> redis.Redis:
+    """Get or create the shared Redis client (binary-safe, responses not decoded)"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_URL)
+    return _redis_client
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from typing import Dict, Any, List
 from pydantic import BaseModel
-from datetime import datetime, timedelta
-from ..models import User, Message, AuditLog, Session as SessionModel
-from ..deps import get_db, require_role
+from datetime import datetime
+from ..models import User, AuditLog
+from ..deps import get_db, get_read_db, require_role
+from ..services.principals import Principal
 from ..services.audit import log_action
+from ..services.counters import read_metrics
+from ..services.retention import AUDIT_RETENTION_DAYS, MESSAGE_RETENTION_DAYS, drop_expired_audit_logs, drop_expired_messages
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -29,43 +31,23 @@ class AuditLogRead(BaseModel):
 
 @router.get("/metrics")
 def get_system_metrics(
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    db: Session = Depends(get_read_db),
+    admin_user: Principal = Depends(require_role("admin"))
 ):
-    """Get system-wide metrics for admin dashboard"""
-    
-    # Count total users
-    total_users = db.query(User).count()
-    
-    # Count active sessions (last 24 hours)
-    yesterday = datetime.now() - timedelta(days=1)
-    active_sessions = db.query(SessionModel).filter(
-        SessionModel.started_at >= yesterday,
-        SessionModel.ended_at.is_(None)
-    ).count()
-    
-    # Count total escalations
-    total_escalations = db.query(Message).filter(Message.is_escalated == True).count()
-    
-    # Count critical cases (risk score >= 0.8)
-    critical_cases = db.query(Message).filter(
-        and_(Message.is_escalated == True, Message.risk_score >= 0.8)
-    ).count()
-    
-    # Count online consultants (mock - would need real presence tracking)
-    consultants_online = db.query(User).join(User.role).filter(
-        User.role.has(name="consultant")
-    ).count()
+    """Get system-wide metrics for admin dashboard (maintained counters, see
+    services/counters.py)"""
+    metrics = read_metrics(db)
     
     # Average response time (mock - would need actual response tracking)
     avg_response_time = 8.5
     
     return {
-        "total_users": total_users,
-        "active_sessions": active_sessions,
-        "total_escalations": total_escalations,
-        "critical_cases": critical_cases,
-        "consultants_online": consultants_online,
+        "total_users": metrics["total_users"],
+        "active_sessions": metrics["active_sessions"],
+        "total_escalations": metrics["total_escalations"],
+        "critical_cases": metrics["critical_cases"],
+        # Mock - would need real presence tracking; counts consultant accounts
+        "consultants_online": metrics["consultants"],
         "avg_response_time": avg_response_time
     }
 
@@ -76,8 +58,8 @@ def get_audit_logs(
     action_filter: str = None,
     date_from: str = None,
     date_to: str = None,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    db: Session = Depends(get_read_db),
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Get filtered audit logs"""
     
@@ -106,7 +88,7 @@ def get_audit_logs(
             user=log.user.username if log.user else None,
             action=log.action,
             timestamp=log.timestamp,
-            metadata=log.metadata
+            metadata=log.audit_metadata
         )
         for log in logs
     ]
@@ -115,7 +97,7 @@ def get_audit_logs(
 def update_retention_settings(
     settings: RetentionSettings,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Update data retention policies"""
     
@@ -141,48 +123,44 @@ def update_retention_settings(
 
 @router.delete("/cleanup/messages")
 def cleanup_old_messages(
-    days: int = 365,
+    days: int = MESSAGE_RETENTION_DAYS,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
-    """Clean up old messages based on retention policy"""
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    deleted_count = db.query(Message).filter(
-        Message.created_at < cutoff_date
-    ).delete()
+    """Clean up old messages based on retention policy (whole months older
+    than the cutoff are dropped)"""
     
-    db.commit()
+    dropped = drop_expired_messages(days)
+    deleted_count = sum(partition["estimated_rows"] for partition in dropped)
+    partitions = [partition["partition"] for partition in dropped]
     
     # Log the cleanup action
     log_action(
         db,
         "messages_cleanup",
         str(admin_user.id),
-        {"deleted_count": deleted_count, "days": days}
+        {"deleted_count": deleted_count, "days": days, "partitions": partitions}
     )
     
     return {
         "message": f"Deleted {deleted_count} old messages",
-        "deleted_count": deleted_count
+        "deleted_count": deleted_count,
+        "partitions_dropped": partitions
     }
 
 @router.delete("/cleanup/audit-logs")
 def cleanup_old_audit_logs(
-    days: int = 1095,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    days: int = AUDIT_RETENTION_DAYS,
+    admin_user: Principal = Depends(require_role("admin"))
 ):
-    """Clean up old audit logs based on retention policy"""
+    """Clean up old audit logs based on retention policy (whole months older
+    than the cutoff are dropped)"""
     
-    cutoff_date = datetime.now() - timedelta(days=days)
-    deleted_count = db.query(AuditLog).filter(
-        AuditLog.timestamp < cutoff_date
-    ).delete()
-    
-    db.commit()
+    dropped = drop_expired_audit_logs(days)
+    deleted_count = sum(partition["estimated_rows"] for partition in dropped)
     
     return {
         "message": f"Deleted {deleted_count} old audit logs",
-        "deleted_count": deleted_count
-    }
\ No newline at end of file
+        "deleted_count": deleted_count,
+        "partitions_dropped": [partition["partition"] for partition in dropped]
+    }
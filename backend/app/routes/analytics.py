@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
-from ..models import User
-from ..deps import get_db, get_current_user
+from ..deps import get_read_db, get_current_user
+from ..services.principals import Principal
 from ..services.analytics import (
     get_case_trends, 
     get_escalation_patterns, 
@@ -16,8 +16,8 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 @router.get("/trends", response_model=Dict[str, Any])
 def case_trends(
     period: str = Query("week", regex="^(week|month)$"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get escalation trends over time (consultants and admins only)"""
     if current_user.role.name not in ["consultant", "admin"]:
@@ -27,8 +27,8 @@ def case_trends(
 
 @router.get("/patterns", response_model=Dict[str, Any])
 def escalation_patterns(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get common crisis trigger patterns (consultants and admins only)"""
     if current_user.role.name not in ["consultant", "admin"]:
@@ -38,8 +38,8 @@ def escalation_patterns(
 
 @router.get("/consultant-activity", response_model=Dict[str, Any])
 def consultant_activity(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get consultant intervention activity (admins only)"""
     if current_user.role.name != "admin":
@@ -49,8 +49,8 @@ def consultant_activity(
 
 @router.get("/risk-distribution", response_model=Dict[str, Any])
 def risk_distribution(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get risk score distribution (consultants and admins only)"""
     if current_user.role.name not in ["consultant", "admin"]:
@@ -60,8 +60,8 @@ def risk_distribution(
 
 @router.get("/daily-activity", response_model=Dict[str, Any])
 def daily_activity(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get daily message and escalation activity (consultants and admins only)"""
     if current_user.role.name not in ["consultant", "admin"]:
@@ -71,8 +71,8 @@ def daily_activity(
 
 @router.get("/dashboard", response_model=Dict[str, Any])
 def dashboard_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get complete dashboard data (consultants and admins only)"""
     if current_user.role.name not in ["consultant", "admin"]:
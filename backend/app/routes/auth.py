@@ -1,50 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from datetime import timedelta
 from ..schemas import UserCreate, UserRead, LoginRequest, Token, TwoFASetup, TwoFAVerify
 from ..models import User, Role
 from ..security import verify_password, get_password_hash, create_access_token
-from ..deps import get_db, get_current_user
+from ..deps import get_async_db, get_current_user_record_async
+from ..services.principals import invalidate_principal
 from ..services.two_factor import generate_totp_secret, generate_qr_code, verify_totp
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/signup", response_model=UserRead)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user exists
-    if db.query(User).filter(User.username == user.username).first():
+    if (await db.execute(select(User.id).where(User.username == user.username))).first():
         raise HTTPException(status_code=400, detail="Username already registered")
-    if db.query(User).filter(User.email == user.email).first():
+    if (await db.execute(select(User.id).where(User.email == user.email))).first():
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Get patient role (default)
-    patient_role = db.query(Role).filter(Role.name == "patient").first()
+    patient_role = (await db.execute(select(Role).where(Role.name == "patient"))).scalars().first()
     if not patient_role:
         raise HTTPException(status_code=500, detail="Default role not found")
     
-    # Create user
+    # Create user; bcrypt is deliberately slow, so hash off the event loop
     db_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await run_in_threadpool(get_password_hash, user.password),
         role_id=patient_role.id
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     
     return UserRead(
         id=db_user.id,
         username=db_user.username,
         email=db_user.email,
-        role=db_user.role.name
+        role=patient_role.name
     )
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == login_data.username).first()
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(
+        select(User).options(joinedload(User.role)).where(User.username == login_data.username)
+    )).scalars().first()
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await run_in_threadpool(verify_password, login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -65,32 +70,32 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             )
     
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role.name},
+        data={"sub": user.username, "uid": str(user.id), "role": user.role.name},
         expires_delta=timedelta(hours=24)
     )
     
     return Token(access_token=access_token, token_type="bearer")
 
 @router.post("/2fa/setup", response_model=TwoFASetup)
-def setup_2fa(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def setup_2fa(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_record_async)
 ):
     """Generate 2FA secret and QR code"""
     secret = generate_totp_secret()
-    qr_code = generate_qr_code(current_user, secret)
+    qr_code = await run_in_threadpool(generate_qr_code, current_user, secret)
     
     # Store secret but don't enable 2FA yet
     current_user.totp_secret = secret
-    db.commit()
+    await db.commit()
     
     return TwoFASetup(secret=secret, qr_code=qr_code)
 
 @router.post("/2fa/verify")
-def verify_2fa(
+async def verify_2fa(
     verify_data: TwoFAVerify,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_record_async)
 ):
     """Verify 2FA code and enable 2FA"""
     if not current_user.totp_secret:
@@ -101,15 +106,16 @@ def verify_2fa(
     
     # Enable 2FA
     current_user.is_2fa_enabled = True
-    db.commit()
+    await db.commit()
+    invalidate_principal(current_user.id)
     
     return {"message": "2FA enabled successfully"}
 
 @router.post("/2fa/disable")
-def disable_2fa(
+async def disable_2fa(
     verify_data: TwoFAVerify,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_record_async)
 ):
     """Disable 2FA after verification"""
     if not current_user.is_2fa_enabled:
@@ -121,6 +127,7 @@ def disable_2fa(
     # Disable 2FA
     current_user.is_2fa_enabled = False
     current_user.totp_secret = None
-    db.commit()
+    await db.commit()
+    invalidate_principal(current_user.id)
     
     return {"message": "2FA disabled successfully"}
\ No newline at end of file
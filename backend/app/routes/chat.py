@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
 from typing import Optional
 from pydantic import BaseModel
 import logging
 
-from ..models import User
-from ..deps import get_db, get_current_user
+from ..deps import get_current_user_async
+from ..services.principals import Principal
 from ..services.vertex_ai import get_ai_response
 from ..services.voice import transcribe_audio
 
@@ -30,8 +29,7 @@ class VoiceChatResponse(BaseModel):
 @router.post("/text", response_model=ChatResponse)
 async def chat_text(
     request: TextChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user_async)
 ):
     """Text chat endpoint with Vertex AI + Ollama fallback"""
     try:
@@ -47,8 +45,7 @@ async def chat_text(
 @router.post("/voice")
 async def chat_voice_json(
     request: VoiceChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user_async)
 ):
     """Voice chat endpoint with JSON input"""
     try:
@@ -73,8 +70,7 @@ async def chat_voice_json(
 async def chat_voice_upload(
     message: Optional[str] = Form(None),
     audio: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user_async)
 ):
     """Voice chat endpoint with file upload"""
     try:
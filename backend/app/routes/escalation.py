@@ -1,69 +1,143 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from typing import List, Literal, Optional
 from pydantic import BaseModel
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from uuid import UUID
-from ..models import Message, User, Session as SessionModel
-from ..deps import get_db, require_role, get_current_user
+from ..models import ConsultantIntervention, Message, User, Session as SessionModel
+from ..deps import get_async_db, get_current_user_async
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from ..services.principals import Principal
 # from ..tasks import send_email_task, send_sms_task  # Disabled for MVP
-from ..services.audit import log_escalation_resolved
+from ..services.audit import escalation_resolved_entry
 
 router = APIRouter(prefix="/escalations", tags=["escalations"])
 
 class EscalationRead(BaseModel):
     id: UUID
-    content: str
+    content: Optional[str] = None  # None when shredded or undecryptable
     created_at: datetime
     session_id: UUID
     user_id: UUID
     username: str
-    risk_score: float = None
-    risk_tags: list = None
+    risk_score: Optional[float] = None
+    risk_tags: Optional[list] = None
+    resolved_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class EscalationPage(BaseModel):
+    items: List[EscalationRead]
+    next_cursor: Optional[str] = None
+
+class ResolutionRequest(BaseModel):
+    notes: Optional[str] = None
+
 class NotificationRequest(BaseModel):
     escalation_ids: List[UUID]
     message: str = None
 
-@router.get("/", response_model=List[EscalationRead])
-def get_escalations(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    risk_score_min: Optional[float] = Query(None, ge=0.0, le=1.0),
-    patient: Optional[str] = Query(None),
-    date_from: Optional[date] = Query(None),
-    date_to: Optional[date] = Query(None)
-):
-    # Only consultants and admins can view escalations
-    if current_user.role.name not in ["consultant", "admin"]:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    query = db.query(Message).join(
+def _escalated_messages():
+    """Escalated messages with their session and patient loaded in the same query"""
+    return select(Message).join(
         SessionModel, Message.session_id == SessionModel.id
     ).join(
         User, SessionModel.user_id == User.id
-    ).filter(
+    ).options(
+        contains_eager(Message.session).contains_eager(SessionModel.user)
+    ).where(
         Message.is_escalated == True
     )
+
+def _after_cursor(risk_score: Optional[float], created_at: datetime, message_id: UUID):
+    """Rows after the cursor in queue order: risk_score DESC (NULLs first, as
+    in the index), then created_at, id ascending"""
+    later = or_(
+        Message.created_at > created_at,
+        and_(Message.created_at == created_at, Message.id > message_id)
+    )
+    if risk_score is None:
+        return or_(Message.risk_score.isnot(None), and_(Message.risk_score.is_(None), later))
+    # The redundant <= bound lets the index scan start at the cursor
+    return and_(Message.risk_score <= risk_score, or_(Message.risk_score < risk_score, later))
+
+def _escalation_page(
+    status: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    risk_score_min: Optional[float] = None,
+    patient: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    tag: Optional[str] = None
+):
+    """One page of the escalation queue (limit + 1 rows, to tell if there's a next page)"""
+    query = _escalated_messages()
+    
+    if status == "open":
+        query = query.where(Message.escalation_resolved_at.is_(None))
+    else:
+        query = query.where(Message.escalation_resolved_at.isnot(None))
     
     # Apply filters
     if risk_score_min is not None:
-        query = query.filter(Message.risk_score >= risk_score_min)
+        query = query.where(Message.risk_score >= risk_score_min)
     
     if patient:
-        query = query.filter(User.username.ilike(f"%{patient}%"))
+        query = query.where(User.username.ilike(f"%{patient}%"))
     
     if date_from:
-        query = query.filter(Message.created_at >= date_from)
+        query = query.where(Message.created_at >= date_from)
     
     if date_to:
-        query = query.filter(Message.created_at <= date_to)
+        query = query.where(Message.created_at <= date_to)
     
-    escalated_messages = query.order_by(Message.risk_score.desc()).all()
+    if tag:
+        # JSONB containment, served by the GIN index on risk_tags
+        query = query.where(Message.risk_tags.contains([tag]))
     
+    if cursor:
+        query = query.where(_after_cursor(*decode_cursor(cursor, float, datetime.fromisoformat, UUID)))
+    
+    return query.order_by(Message.risk_score.desc(), Message.created_at, Message.id).limit(limit + 1)
+
+@router.get("/", response_model=EscalationPage)
+async def get_escalations(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
+    status: Literal["open", "resolved"] = Query("open"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    risk_score_min: Optional[float] = Query(None, ge=0.0, le=1.0),
+    patient: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    tag: Optional[str] = Query(None)
+):
+    """The escalation queue, highest risk first, a page at a time: pass
+    next_cursor back as cursor for the following page"""
+    # Only consultants and admins can view escalations
+    if current_user.role.name not in ["consultant", "admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    query = _escalation_page(status, limit, cursor, risk_score_min, patient, date_from, date_to, tag)
+    escalated_messages = (await db.execute(query)).scalars().all()
+    
+    next_cursor = None
+    if len(escalated_messages) > limit:
+        escalated_messages = escalated_messages[:limit]
+        last = escalated_messages[-1]
+        next_cursor = encode_cursor(last.risk_score, last.created_at, last.id)
+    
+    # Decrypting may load data keys through the sync engine
+    items = await run_in_threadpool(_escalation_reads, escalated_messages)
+    return EscalationPage(items=items, next_cursor=next_cursor)
+
+def _escalation_reads(escalated_messages) -> List[EscalationRead]:
     return [
         EscalationRead(
             id=msg.id,
@@ -73,30 +147,54 @@ def get_escalations(
             user_id=msg.session.user_id,
             username=msg.session.user.username,
             risk_score=msg.risk_score,
-            risk_tags=msg.risk_tags
+            risk_tags=msg.risk_tags,
+            resolved_at=msg.escalation_resolved_at
         )
         for msg in escalated_messages
     ]
 
+@router.post("/{message_id}/resolve", response_model=EscalationRead)
+async def resolve_escalation(
+    message_id: UUID,
+    resolution: ResolutionRequest = ResolutionRequest(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async)
+):
+    """Take an escalation off the open queue"""
+    if current_user.role.name not in ["consultant", "admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    msg = (await db.execute(_escalated_messages().where(Message.id == message_id))).scalars().first()
+    if msg is None:
+        raise HTTPException(status_code=404, detail="Escalation not found")
+    
+    if msg.escalation_resolved_at is None:
+        msg.escalation_resolved_at = datetime.now(timezone.utc)
+        db.add(ConsultantIntervention(
+            consultant_id=current_user.id,
+            message_id=msg.id,
+            intervention_type="resolve",
+            notes=resolution.notes
+        ))
+        db.add(escalation_resolved_entry(current_user, str(msg.id), resolution.notes))
+        await db.commit()
+    
+    return (await run_in_threadpool(_escalation_reads, [msg]))[0]
+
 @router.post("/notify")
-def notify_escalations(
+async def notify_escalations(
     notification_request: NotificationRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async)
 ):
     # Only consultants and admins can send notifications
     if current_user.role.name not in ["consultant", "admin"]:
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Get escalated messages
-    escalated_messages = db.query(Message).join(
-        SessionModel, Message.session_id == SessionModel.id
-    ).join(
-        User, SessionModel.user_id == User.id
-    ).filter(
-        Message.id.in_(notification_request.escalation_ids),
-        Message.is_escalated == True
-    ).all()
+    escalated_messages = (await db.execute(_escalated_messages().where(
+        Message.id.in_(notification_request.escalation_ids)
+    ))).scalars().all()
     
     if not escalated_messages:
         raise HTTPException(status_code=404, detail="No escalated messages found")
@@ -132,7 +230,8 @@ Please contact the patient immediately.
     
     # Log escalation resolution for each handled case
     for msg in escalated_messages:
-        log_escalation_resolved(db, current_user, str(msg.id), "Notification sent to consultants")
+        db.add(escalation_resolved_entry(current_user, str(msg.id), "Notification sent to consultants"))
+    await db.commit()
     
     return {
         "message": f"Notifications logged for {len(escalated_messages)} escalations",
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from ..models import User
+import json
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Callable, List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 from ..deps import get_current_user, require_role
-from ..services.guardrails import sanitize_input, validate_response, is_safe_content
+from ..services.principals import Principal
+from ..services.guardrails import (
+    sanitize_result, validate_result, sanitize_results, validate_results,
+    get_batch_pool, BATCH_WORKERS, BATCH_CHUNK_SIZE, BATCH_MAX_TEXTS
+)
 
 router = APIRouter(prefix="/guardrails", tags=["guardrails"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 class ContentCheck(BaseModel):
     text: str
 
+class BatchContentCheck(BaseModel):
+    texts: List[str]
+
 class ContentResponse(BaseModel):
     original_text: str
     sanitized_text: str
@@ -18,41 +31,115 @@ class ContentResponse(BaseModel):
 @router.post("/sanitize", response_model=ContentResponse)
 def sanitize_content(
     content: ContentCheck,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Sanitize content for PII and harmful material"""
-    sanitized = sanitize_input(content.text)
-    is_safe = is_safe_content(content.text)
-    
-    warnings = []
-    if sanitized != content.text:
-        warnings.append("Content has been sanitized for privacy/safety")
-    if not is_safe:
-        warnings.append("Content flagged for safety review")
-    
-    return ContentResponse(
-        original_text=content.text,
-        sanitized_text=sanitized,
-        is_safe=is_safe,
-        warnings=warnings
-    )
+    return ContentResponse(**sanitize_result(content.text))
 
 @router.post("/validate", response_model=ContentResponse)
 def validate_content(
     content: ContentCheck,
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Validate AI response content (admin only)"""
-    validated = validate_response(content.text)
-    is_safe = is_safe_content(content.text)
-    
-    warnings = []
-    if validated != content.text:
-        warnings.append("Response has been filtered for safety")
-    
-    return ContentResponse(
-        original_text=content.text,
-        sanitized_text=validated,
-        is_safe=is_safe,
-        warnings=warnings
-    )
\ No newline at end of file
+    return ContentResponse(**validate_result(content.text))
+
+async def _read_texts(request: Request) -> AsyncIterator[str]:
+    """Texts from a JSON body ({"texts": [...]}) or an NDJSON stream of
+    {"text": ...} objects (or bare JSON strings), one per line"""
+    if request.headers.get("content-type", "").split(";")[0].strip() != NDJSON_MEDIA_TYPE:
+        try:
+            batch = BatchContentCheck(**await request.json())
+        except (ValueError, TypeError, ValidationError):
+            raise HTTPException(status_code=422, detail='Expected {"texts": [...]} or an NDJSON body')
+        if len(batch.texts) > BATCH_MAX_TEXTS:
+            raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_TEXTS} texts per JSON batch; use NDJSON for more")
+        for text in batch.texts:
+            yield text
+        return
+
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if buffer.strip():
+        yield _parse_ndjson_line(buffer)
+
+def _parse_ndjson_line(line: bytes) -> str:
+    item = json.loads(line)
+    text = item.get("text") if isinstance(item, dict) else item
+    if not isinstance(text, str):
+        raise ValueError("Each NDJSON line must be a string or an object with a \"text\" string")
+    return text
+
+async def _stream_results(texts: AsyncIterator[str], process_chunk: Callable[[List[str]], List[dict]]):
+    """Process texts in chunks on the batch pool, yielding NDJSON results in input order"""
+    loop = asyncio.get_running_loop()
+    pool = get_batch_pool()
+    max_in_flight = max(BATCH_WORKERS, 1) * 2
+    pending = deque()
+
+    async def drain(limit: int):
+        while len(pending) > limit:
+            for result in await pending.popleft():
+                yield (json.dumps(result) + "\n").encode()
+
+    chunk = []
+    error = None
+    try:
+        async for text in texts:
+            chunk.append(text)
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                pending.append(loop.run_in_executor(pool, process_chunk, chunk))
+                chunk = []
+                async for line in drain(max_in_flight):
+                    yield line
+    except ValueError as e:
+        error = str(e)
+
+    if chunk:
+        pending.append(loop.run_in_executor(pool, process_chunk, chunk))
+    async for line in drain(0):
+        yield line
+    if error:
+        # Headers are already sent; report malformed input in-band after the
+        # results for every line before it
+        yield (json.dumps({"error": error}) + "\n").encode()
+
+async def _batch_response(request: Request, process_chunk) -> StreamingResponse:
+    texts = _read_texts(request)
+    # Pull the first text now so a malformed JSON body is a 4xx, not an in-band error
+    try:
+        first = await texts.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    async def all_texts():
+        if first is None:
+            return
+        yield first
+        async for text in texts:
+            yield text
+
+    return StreamingResponse(_stream_results(all_texts(), process_chunk), media_type=NDJSON_MEDIA_TYPE)
+
+@router.post("/sanitize/batch")
+async def sanitize_content_batch(
+    request: Request,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Sanitize many texts; results stream back as NDJSON in input order"""
+    return await _batch_response(request, sanitize_results)
+
+@router.post("/validate/batch")
+async def validate_content_batch(
+    request: Request,
+    admin_user: Principal = Depends(require_role("admin"))
+):
+    """Validate many AI responses (admin only); results stream back as NDJSON in input order"""
+    return await _batch_response(request, validate_results)
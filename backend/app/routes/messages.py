@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 import base64
@@ -17,17 +19,18 @@ class ChatResponse(BaseModel):
 class VoiceChatRequest(BaseModel):
     message: str
     return_audio: bool = True
-from ..models import Message, Session as SessionModel, User
-from ..deps import get_db, get_current_user
+from ..models import Message, Session as SessionModel
+from ..deps import get_async_db, get_current_user_async
+from ..services.principals import Principal
 from ..services.ai_service import get_ai_service
 import logging
 
 logger = logging.getLogger(__name__)
 from ..services.risk_assessment import assess_risk, detect_risk
 from ..services.voice import transcribe_audio, synthesize_speech
-from ..services.translation import translate_text, detect_language
-from ..services.guardrails import sanitize_input, validate_response, is_safe_content, get_safety_warning
-from ..services.audit import log_message_sent, log_escalation_created
+from ..services.translation import get_translation_service, detect_language
+from ..services.guardrails import sanitize_input, validate_response, is_safe_content, get_safety_warning, scan_content
+from ..services.audit import message_sent_entry, escalation_created_entry
 from ..services.metrics import record_message, record_escalation
 from ..services.logging import log_escalation_event
 
@@ -61,14 +64,14 @@ async def send_message(
     content: Optional[str] = Form(None),
     audio: Optional[UploadFile] = File(None),
     translate_to: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async)
 ):
     # Verify session exists and belongs to user
-    session = db.query(SessionModel).filter(
+    session = (await db.execute(select(SessionModel.id).where(
         SessionModel.id == session_id,
         SessionModel.user_id == current_user.id
-    ).first()
+    ))).first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -91,11 +94,12 @@ async def send_message(
     
     # Sanitize input for safety and PII protection
     original_message = message_text
-    sanitized_message = sanitize_input(message_text)
+    scan = scan_content(original_message)
+    sanitized_message = sanitize_input(message_text, scan=scan)
     safety_warning = get_safety_warning(sanitized_message)
     
     # Check if content is safe to process
-    if not is_safe_content(original_message):
+    if not is_safe_content(original_message, scan=scan):
         # For crisis situations, still process but with immediate escalation
         risk_analysis = {"is_risky": True, "risk_score": 1.0, "tags": ["crisis:immediate_intervention"]}
     else:
@@ -111,20 +115,24 @@ async def send_message(
         risk_score=risk_analysis["risk_score"],
         risk_tags=risk_analysis["tags"]
     )
-    user_message.set_content(sanitized_message)
+    # Encrypting may load the sender's data key through the sync engine
+    await run_in_threadpool(user_message.set_content, sanitized_message)
     db.add(user_message)
-    db.commit()
-    db.refresh(user_message)
+    await db.flush()
     
     # Record metrics
     record_message(current_user.role.name)
     
-    # Log message sent
-    log_message_sent(db, current_user, str(user_message.id), risk_analysis["is_risky"])
+    # Log message sent, in the same transaction as the message
+    db.add(message_sent_entry(current_user, str(user_message.id), risk_analysis["is_risky"]))
     
     # Log escalation if risky
     if risk_analysis["is_risky"]:
-        log_escalation_created(db, current_user, str(user_message.id), risk_analysis["risk_score"], risk_analysis["tags"])
+        db.add(escalation_created_entry(current_user, str(user_message.id), risk_analysis["risk_score"], risk_analysis["tags"]))
+    await db.commit()
+    await db.refresh(user_message, ["created_at"])
+    
+    if risk_analysis["is_risky"]:
         record_escalation(risk_analysis["risk_score"])
         log_escalation_event(str(user_message.id), risk_analysis["risk_score"], str(current_user.id), "escalation_created")
     
@@ -150,7 +158,8 @@ async def send_message(
     # Translate AI response if requested
     translated_ai_response = validated_ai_response
     if translate_to and translate_to != 'en':
-        translated_ai_response = translate_text(validated_ai_response, translate_to)
+        # Sentence by sentence, so recurring sentences come from the translation cache
+        translated_ai_response = get_translation_service().translate_sentences(validated_ai_response, translate_to)
     
     # Synthesize AI response to audio
     ai_audio_bytes = synthesize_speech(translated_ai_response)
@@ -160,16 +169,17 @@ async def send_message(
     ai_message = Message(
         session_id=session_id,
         sender_id=current_user.id,  # For simplicity, using same user
-        content=ai_response_text,
         is_escalated=False
     )
+    # Encrypted under the patient's data key like their message, so shredding it covers both
+    await run_in_threadpool(ai_message.set_content, ai_response_text)
     db.add(ai_message)
-    db.commit()
+    await db.commit()
     
     return MessageResponse(
         message=MessageRead(
             id=user_message.id,
-            content=user_message.get_content(),
+            content=sanitized_message,
             created_at=user_message.created_at,
             is_escalated=user_message.is_escalated,
             audio_data=user_message.audio_data,
@@ -181,13 +191,13 @@ async def send_message(
     )
 
 @router.get("/{session_id}", response_model=List[MessageRead])
-def get_messages(
+async def get_messages(
     session_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async)
 ):
     # Verify session access
-    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    session = await db.get(SessionModel, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -196,10 +206,16 @@ def get_messages(
         current_user.role.name not in ["consultant", "admin"]):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    messages = db.query(Message).filter(
-        Message.session_id == session_id
-    ).order_by(Message.created_at).all()
+    query = select(Message).where(Message.session_id == session_id).order_by(Message.created_at)
+    if session.started_at is not None:
+        # Bounds the partition key, so months before the session are pruned
+        query = query.where(Message.created_at >= session.started_at)
+    messages = (await db.execute(query)).scalars().all()
     
+    # Decrypting may load data keys through the sync engine
+    return await run_in_threadpool(_message_reads, messages)
+
+def _message_reads(messages) -> List[MessageRead]:
     return [
         MessageRead(
             id=msg.id,
@@ -216,8 +232,7 @@ def get_messages(
 @router.post("/chat")
 async def simple_chat(
     request: ChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user_async)
 ):
     """Chat endpoint with Vertex AI + Ollama fallback"""
     try:
@@ -240,8 +255,7 @@ async def simple_chat(
 @router.post("/voice-chat")
 async def voice_chat(
     request: VoiceChatRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user_async)
 ):
     """Voice-first chat endpoint with TTS response"""
     try:
@@ -270,8 +284,7 @@ async def voice_chat(
 async def chat_voice(
     message: Optional[str] = Form(None),
     audio: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user_async)
 ):
     """Voice chat endpoint with Vertex AI + Ollama fallback"""
     try:
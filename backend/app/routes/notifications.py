@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from ..models import User
 from ..deps import require_role
+from ..services.principals import Principal
 from ..services.notifications import send_email, send_sms
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
@@ -18,7 +18,7 @@ class SMSRequest(BaseModel):
 @router.post("/email")
 def send_email_notification(
     request: EmailRequest,
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Send email notification async (admin only)"""
     from ..tasks import send_email_task
@@ -28,7 +28,7 @@ def send_email_notification(
 @router.post("/sms")
 def send_sms_notification(
     request: SMSRequest,
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Send SMS notification async (admin only)"""
     from ..tasks import send_sms_task
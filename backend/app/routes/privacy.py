@@ -8,8 +8,10 @@ from pydantic import BaseModel
 import json
 import io
 from ..models import User, Message, WellnessLog, Session as SessionModel
-from ..deps import get_db, get_current_user
+from ..deps import get_db, get_read_db, get_current_user, get_current_user_record
+from ..services.principals import Principal, invalidate_principal
 from ..services.audit import log_action
+from ..security.envelope import get_data_keyring
 
 router = APIRouter(prefix="/privacy", tags=["privacy"])
 
@@ -23,8 +25,8 @@ class DataDeletionRequest(BaseModel):
 
 @router.get("/export")
 def export_user_data(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user_record)
 ):
     """Export all user data (messages, wellness logs, sessions)"""
     
@@ -113,7 +115,7 @@ def export_user_data(
 def delete_user_account(
     request: DataDeletionRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """Soft delete user account and all associated data"""
     
@@ -145,17 +147,22 @@ def delete_user_account(
         "deleted_at": now
     }, synchronize_session=False)
     
+    # Crypto-shred: without the data key, the user's encrypted content is unreadable
+    key_shredded = get_data_keyring().shred(db, current_user.id)
+    
     # Mark user as deleted (keep for audit purposes)
     current_user.is_deleted = True
     current_user.deleted_at = now
     
     db.commit()
+    invalidate_principal(current_user.id)
     
     # Log the deletion action
     log_action(db, "account_deleted", str(current_user.id), {
         "reason": request.reason,
         "messages_deleted": messages_updated,
-        "wellness_logs_deleted": wellness_updated
+        "wellness_logs_deleted": wellness_updated,
+        "data_key_shredded": key_shredded
     })
     
     return {
@@ -169,7 +176,7 @@ def delete_user_account(
 @router.delete("/messages")
 def delete_user_messages(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Soft delete all user messages"""
     
@@ -204,7 +211,7 @@ def delete_user_messages(
 @router.delete("/account")
 def delete_user_account_delete(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """DELETE method for account deletion"""
     now = datetime.now()
@@ -232,17 +239,22 @@ def delete_user_account_delete(
         "deleted_at": now
     }, synchronize_session=False)
     
+    # Crypto-shred: without the data key, the user's encrypted content is unreadable
+    key_shredded = get_data_keyring().shred(db, current_user.id)
+    
     # Mark user as deleted
     current_user.is_deleted = True
     current_user.deleted_at = now
     
     db.commit()
+    invalidate_principal(current_user.id)
     
     # Log the deletion action
     log_action(db, "account_deleted", str(current_user.id), {
         "reason": "User requested deletion via DELETE method",
         "messages_deleted": messages_updated,
-        "wellness_logs_deleted": wellness_updated
+        "wellness_logs_deleted": wellness_updated,
+        "data_key_shredded": key_shredded
     })
     
     return {
@@ -256,7 +268,7 @@ def delete_user_account_delete(
 @router.get("/retention-status")
 def get_retention_status(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get user's data retention status"""
     
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
+import os
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import Dict
-from ..models import User
+from typing import Dict, List
 from ..deps import get_current_user
-from ..services.translation import translate_text, detect_language, get_supported_languages
+from ..services.principals import Principal
+from ..services.translation import get_translation_service, detect_languages, get_supported_languages
+
+TRANSLATION_BATCH_MAX_TEXTS = int(os.getenv("TRANSLATION_BATCH_MAX_TEXTS", "1000"))
 
 router = APIRouter(prefix="/translation", tags=["translation"])
 
@@ -12,50 +15,102 @@ class TranslationRequest(BaseModel):
     target_language: str
     source_language: str = None
 
+class BatchTranslationRequest(BaseModel):
+    texts: List[str]
+    target_language: str
+    source_language: str = None
+
 class TranslationResponse(BaseModel):
     original_text: str
     translated_text: str
     source_language: str
     target_language: str
 
+class BatchDetectionRequest(BaseModel):
+    texts: List[str]
+
 class LanguageDetectionResponse(BaseModel):
     text: str
     detected_language: str
+    confidence: float
 
 @router.post("/translate", response_model=TranslationResponse)
 def translate(
     request: TranslationRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Translate text to target language"""
-    translated = translate_text(
-        request.text, 
-        request.target_language, 
+    # The provider reports the detected source language with the translation
+    result = get_translation_service().translate(
+        request.text,
+        request.target_language,
         request.source_language
     )
-    
-    source_lang = request.source_language or detect_language(request.text)
-    
+
     return TranslationResponse(
-        original_text=request.text,
-        translated_text=translated,
-        source_language=source_lang,
-        target_language=request.target_language
+        original_text=result.text,
+        translated_text=result.translated_text,
+        source_language=result.source_language,
+        target_language=result.target_language
     )
 
+@router.post("/translate/batch", response_model=List[TranslationResponse])
+def translate_batch(
+    request: BatchTranslationRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Translate many texts in as few provider calls as possible"""
+    if len(request.texts) > TRANSLATION_BATCH_MAX_TEXTS:
+        raise HTTPException(status_code=413, detail=f"At most {TRANSLATION_BATCH_MAX_TEXTS} texts per batch")
+
+    results = get_translation_service().translate_batch(
+        request.texts,
+        request.target_language,
+        request.source_language
+    )
+
+    return [
+        TranslationResponse(
+            original_text=result.text,
+            translated_text=result.translated_text,
+            source_language=result.source_language,
+            target_language=result.target_language
+        )
+        for result in results
+    ]
+
 @router.post("/detect", response_model=LanguageDetectionResponse)
 def detect(
     text: str,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Detect language of text"""
-    detected = detect_language(text)
+    detected = detect_languages([text])[0]
     
     return LanguageDetectionResponse(
         text=text,
-        detected_language=detected
+        detected_language=detected.language,
+        confidence=detected.confidence
     )
 
+@router.post("/detect/batch", response_model=List[LanguageDetectionResponse])
+def detect_batch(
+    request: BatchDetectionRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Detect the language of many texts at once"""
+    if len(request.texts) > TRANSLATION_BATCH_MAX_TEXTS:
+        raise HTTPException(status_code=413, detail=f"At most {TRANSLATION_BATCH_MAX_TEXTS} texts per batch")
+
+    return [
+        LanguageDetectionResponse(
+            text=text,
+            detected_language=detected.language,
+            confidence=detected.confidence
+        )
+        for text, detected in zip(request.texts, detect_languages(request.texts))
+    ]
+
 @router.get("/languages", response_model=Dict[str, str])
 def get_languages():
     """Get supported languages"""
@@ -6,13 +6,14 @@ from ..schemas import UserCreate, UserRead, RoleUpdate
 from ..models import User, Role
 from ..security import get_password_hash
 from ..deps import get_db, require_role
+from ..services.principals import Principal, invalidate_principal
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/consultants", response_model=List[UserRead])
 def get_consultants(
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     consultant_role = db.query(Role).filter(Role.name == "consultant").first()
     consultants = db.query(User).filter(User.role_id == consultant_role.id).all()
@@ -31,7 +32,7 @@ def get_consultants(
 def create_consultant(
     user: UserCreate,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     # Check if user exists
     if db.query(User).filter(User.username == user.username).first():
@@ -67,7 +68,7 @@ def update_user_role(
     user_id: UUID,
     role_update: RoleUpdate,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Update user role (admin only)"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -83,6 +84,7 @@ def update_user_role(
     user.role_id = new_role.id
     db.commit()
     db.refresh(user)
+    invalidate_principal(user.id)
     
     return UserRead(
         id=user.id,
@@ -95,7 +97,7 @@ def update_user_role(
 def delete_consultant(
     user_id: UUID,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -106,13 +108,14 @@ def delete_consultant(
     
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
     
     return {"message": "Consultant deleted successfully"}
 
 @router.get("/users", response_model=List[UserRead])
 def get_all_users(
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_role("admin"))
+    admin_user: Principal = Depends(require_role("admin"))
 ):
     """Get all users (admin only)"""
     users = db.query(User).all()
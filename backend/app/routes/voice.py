@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, UploadFile, File
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from ..models import User
 from ..deps import get_db, get_current_user
-from ..services.voice import transcribe_audio, synthesize_speech
+from ..services.principals import Principal
+from ..services.voice import transcribe_upload, synthesize_speech
+from ..services import transcription_jobs
+from ..redis_client import get_redis
+import json
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
@@ -11,17 +15,18 @@ router = APIRouter(prefix="/voice", tags=["voice"])
 async def transcribe(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Transcribe audio file to text"""
-    transcript = transcribe_audio(file)
-    return {"transcript": transcript}
+    # Run Whisper off the event loop so concurrent uploads count towards queue depth
+    result = await run_in_threadpool(transcribe_upload, file)
+    return {"transcript": result["text"], "model_tier": result["model_tier"]}
 
 @router.post("/synthesize")
 async def synthesize(
     text: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Convert text to speech audio"""
     audio_data = synthesize_speech(text)
@@ -29,4 +34,78 @@ async def synthesize(
         content=audio_data,
         media_type="audio/mpeg",
         headers={"Content-Disposition": "attachment; filename=speech.mp3"}
-    )
\ No newline at end of file
+    )
+
+def _get_owned_job(job_id: str, current_user: Principal) -> dict:
+    job = transcription_jobs.get_job(job_id)
+    if not job or job.pop("user_id") != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    return job
+
+@router.post("/jobs", status_code=202)
+async def create_transcription_job(
+    request: Request,
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Queue a long recording for background transcription"""
+    max_bytes = transcription_jobs.JOB_MAX_UPLOAD_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Audio uploads are limited to {max_bytes} bytes")
+    # Content-Length covers the whole multipart body, so it is checked against the limit as is
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise too_large
+    # Bounded read for uploads that don't declare a length (chunked encoding)
+    audio_bytes = await file.read(max_bytes + 1)
+    if len(audio_bytes) > max_bytes:
+        raise too_large
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="Empty audio file")
+
+    job_id = transcription_jobs.create_job(str(current_user.id), audio_bytes, file.filename)
+
+    from ..tasks import prepare_transcription_job_task
+    prepare_transcription_job_task.delay(job_id)
+
+    return {"job_id": job_id, "status": transcription_jobs.STATUS_QUEUED}
+
+@router.get("/jobs/{job_id}")
+def get_transcription_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Poll job status, progress and the partial transcript so far"""
+    return _get_owned_job(job_id, current_user)
+
+@router.get("/jobs/{job_id}/events")
+def stream_transcription_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Server-sent events with job state on every progress update"""
+    _get_owned_job(job_id, current_user)
+
+    def event_stream():
+        # Subscribe before reading state so no update is missed in between
+        pubsub = get_redis().pubsub()
+        pubsub.subscribe(transcription_jobs.events_channel(job_id))
+        try:
+            last_state = None
+            while True:
+                state = transcription_jobs.get_job(job_id)
+                if state is None:
+                    return
+                state.pop("user_id")
+
+                if state != last_state:
+                    yield f"data: {json.dumps(state)}\n\n"
+                    last_state = state
+                else:
+                    yield ": keep-alive\n\n"
+
+                if state["status"] in transcription_jobs.FINAL_STATUSES:
+                    return
+                pubsub.get_message(ignore_subscribe_messages=True, timeout=15)
+        finally:
+            pubsub.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
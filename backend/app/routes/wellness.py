@@ -1,34 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 from uuid import UUID
-from ..models import WellnessLog, User
-from ..deps import get_db, get_current_user
+from ..models import WellnessLog
+from ..db_replicas import get_replica_router
+from ..deps import get_db, get_read_db, get_current_user
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from ..security.encryption import decrypt_or_none
+from ..services.principals import Principal
 from ..services.audit import log_action
 from ..services.metrics import record_wellness_log
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/wellness", tags=["wellness"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows fetched per round trip when streaming
+STREAM_BATCH_SIZE = int(os.getenv("WELLNESS_STREAM_BATCH_SIZE", "500"))
+
 class WellnessLogCreate(BaseModel):
     mood_score: int = Field(..., ge=1, le=10)
     note: str = None
 
 class WellnessLogRead(BaseModel):
     id: UUID
+    patient_id: Optional[UUID] = None
     mood_score: int
-    note: str = None
+    note: Optional[str] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class WellnessLogPage(BaseModel):
+    items: List[WellnessLogRead]
+    next_cursor: Optional[str] = None
+
 @router.post("/log", response_model=WellnessLogRead)
 def create_wellness_log(
     wellness_data: WellnessLogCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create wellness log entry (patients only)"""
     if current_user.role.name != "patient":
@@ -53,40 +73,89 @@ def create_wellness_log(
     
     return WellnessLogRead(
         id=wellness_log.id,
+        patient_id=wellness_log.patient_id,
         mood_score=wellness_log.mood_score,
         note=wellness_log.get_note(),
         created_at=wellness_log.created_at
     )
 
-@router.get("/logs", response_model=List[WellnessLogRead])
-def get_wellness_logs(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get user's wellness logs"""
+def _visible_logs(current_user: Principal, patient_id: Optional[UUID]):
+    """Wellness logs the caller may list, newest first: patients their own,
+    consultants and admins everyone's or one patient's"""
     if current_user.role.name == "patient":
-        # Patients see only their own logs
-        logs = db.query(WellnessLog).filter(WellnessLog.patient_id == current_user.id).order_by(WellnessLog.created_at.desc()).all()
-    elif current_user.role.name in ["consultant", "admin"]:
-        # Consultants/admins see all logs
-        logs = db.query(WellnessLog).order_by(WellnessLog.created_at.desc()).all()
-    else:
+        if patient_id is not None and patient_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        patient_id = current_user.id
+    elif current_user.role.name not in ["consultant", "admin"]:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return [
-        WellnessLogRead(
-            id=log.id,
-            mood_score=log.mood_score,
-            note=log.get_note(),
-            created_at=log.created_at
-        )
-        for log in logs
-    ]
+    query = select(
+        WellnessLog.id, WellnessLog.patient_id, WellnessLog.mood_score, WellnessLog.note, WellnessLog.created_at
+    )
+    if patient_id is not None:
+        query = query.where(WellnessLog.patient_id == patient_id)
+    return query.order_by(WellnessLog.created_at.desc(), WellnessLog.id.desc())
+
+def _log_read(row) -> WellnessLogRead:
+    return WellnessLogRead(
+        id=row.id,
+        patient_id=row.patient_id,
+        mood_score=row.mood_score,
+        note=decrypt_or_none(row.note, f"wellness log {row.id}") if row.note else None,
+        created_at=row.created_at
+    )
+
+@router.get("/logs", response_model=WellnessLogPage)
+def get_wellness_logs(
+    patient_id: Optional[UUID] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Wellness logs, newest first, a page at a time: pass next_cursor back
+    as cursor for the following page"""
+    query = _visible_logs(current_user, patient_id)
+    if cursor:
+        created_at, log_id = decode_cursor(cursor, datetime.fromisoformat, UUID)
+        query = query.where(tuple_(WellnessLog.created_at, WellnessLog.id) < tuple_(created_at, log_id))
+    
+    rows = db.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return WellnessLogPage(items=[_log_read(row) for row in rows], next_cursor=next_cursor)
+
+@router.get("/logs/stream")
+def stream_wellness_logs(
+    patient_id: Optional[UUID] = Query(None),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Every visible wellness log as NDJSON, newest first. Rows come from a
+    server-side cursor STREAM_BATCH_SIZE at a time, so memory use doesn't grow
+    with the amount of history"""
+    query = _visible_logs(current_user, patient_id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    
+    def lines():
+        # Its own session: the response is still streaming after the route returns
+        db = get_replica_router().session(current_user.id)
+        try:
+            for row in db.execute(query):
+                yield (_log_read(row).model_dump_json() + "\n").encode()
+        except Exception as e:
+            logger.error(f"Wellness log stream failed: {e}")
+            yield (json.dumps({"error": "Stream interrupted"}) + "\n").encode()
+        finally:
+            db.close()
+    
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
 
 @router.delete("/delete-all")
 def delete_all_wellness_data(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete all wellness data for current user (patients only)"""
     if current_user.role.name != "patient":
@@ -104,7 +173,7 @@ def delete_all_wellness_data(
 def delete_wellness_log(
     log_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete specific wellness log entry"""
     wellness_log = db.query(WellnessLog).filter(WellnessLog.id == log_id).first()
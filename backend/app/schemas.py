@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 from uuid import UUID
-from typing import Literal
+from typing import Optional, Literal
 
 class UserCreate(BaseModel):
     username: str
@@ -31,12 +31,12 @@ class MessageCreate(BaseModel):
 
 class MessageRead(BaseModel):
     id: UUID
-    content: str
+    content: Optional[str] = None  # None when shredded or undecryptable
     created_at: datetime
     is_escalated: bool
-    audio_data: str = None
-    risk_score: float = None
-    risk_tags: list = None
+    audio_data: Optional[str] = None
+    risk_score: Optional[float] = None
+    risk_tags: Optional[list] = None
     
     class Config:
         from_attributes = True
@@ -0,0 +1,150 @@
+"""Optional compression of PHI before it is encrypted.
+
+Fernet tokens are base64 text, so a stored value is about 1.33x its payload
+plus ~60 bytes. Compressing the payload first (zstd, ideally with a dictionary
+trained on real message text so that even short messages compress) shrinks
+what ends up in messages.content / wellness_logs.note, TOAST and WAL.
+
+The payload that gets encrypted is either
+
+    <UTF-8 text>                     written before this change, or compression off
+    0xFE <version> <body>            packed
+
+0xFE never starts valid UTF-8, so the two can't be confused. Versions:
+
+    1: a zstd frame; the dictionary id in the frame header selects the
+       dictionary (0 for none)
+
+Texts shorter than ENCRYPTION_COMPRESSION_MIN_BYTES, or that don't get
+smaller, are stored as plain text.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ENCRYPTION_COMPRESSION = os.getenv("ENCRYPTION_COMPRESSION", "none").lower()
+ENCRYPTION_COMPRESSION_LEVEL = int(os.getenv("ENCRYPTION_COMPRESSION_LEVEL", "3"))
+ENCRYPTION_COMPRESSION_MIN_BYTES = int(os.getenv("ENCRYPTION_COMPRESSION_MIN_BYTES", "64"))
+# Comma-separated; the first dictionary is used to compress, all of them to decompress
+ZSTD_DICTIONARY_PATHS = os.getenv("ZSTD_DICTIONARY_PATHS", "")
+
+PACKED_MARKER = 0xFE
+VERSION_ZSTD = 1
+
+class ZstdCodec:
+    """zstd with an optional dictionary; compressor objects are per thread"""
+
+    def __init__(
+        self,
+        level: int = ENCRYPTION_COMPRESSION_LEVEL,
+        dictionaries: Sequence[bytes] = (),
+        min_bytes: int = ENCRYPTION_COMPRESSION_MIN_BYTES
+    ):
+        import zstandard
+
+        self._zstd = zstandard
+        self.level = level
+        self.min_bytes = min_bytes
+        self.dictionaries: List = [zstandard.ZstdCompressionDict(data) for data in dictionaries]
+        self._by_id: Dict[int, object] = {dictionary.dict_id(): dictionary for dictionary in self.dictionaries}
+        self._local = threading.local()
+
+    @property
+    def dict_id(self) -> int:
+        """Id of the dictionary used to compress (0 for none)"""
+        return self.dictionaries[0].dict_id() if self.dictionaries else 0
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            dictionary = self.dictionaries[0] if self.dictionaries else None
+            compressor = self._zstd.ZstdCompressor(level=self.level, dict_data=dictionary, write_content_size=True)
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int):
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        if dict_id not in decompressors:
+            if dict_id and dict_id not in self._by_id:
+                raise ValueError(f"Compressed with unknown zstd dictionary {dict_id}")
+            decompressors[dict_id] = self._zstd.ZstdDecompressor(dict_data=self._by_id.get(dict_id))
+        return decompressors[dict_id]
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor().compress(data)
+
+    def decompress(self, frame: bytes) -> bytes:
+        dict_id = self._zstd.get_frame_parameters(frame).dict_id
+        return self._decompressor(dict_id).decompress(frame)
+
+    def frame_dict_id(self, frame: bytes) -> int:
+        return self._zstd.get_frame_parameters(frame).dict_id
+
+def train_dictionary(samples: Sequence[str], size: int = 32 * 1024) -> bytes:
+    """Train a zstd dictionary on sample plaintexts"""
+    import zstandard
+    return zstandard.train_dictionary(size, [sample.encode() for sample in samples if sample]).as_bytes()
+
+def load_dictionaries(paths: str = ZSTD_DICTIONARY_PATHS) -> List[bytes]:
+    dictionaries = []
+    for path in paths.split(","):
+        if path.strip():
+            with open(path.strip(), "rb") as dictionary_file:
+                dictionaries.append(dictionary_file.read())
+    return dictionaries
+
+# Global codec instance; False when zstandard or the dictionaries can't be loaded
+_codec = None
+
+def get_codec() -> Optional[ZstdCodec]:
+    """The configured zstd codec, created on first use"""
+    global _codec
+    if _codec is None:
+        try:
+            _codec = ZstdCodec(dictionaries=load_dictionaries())
+        except ImportError:
+            _codec = False
+    return _codec or None
+
+def compression_enabled() -> bool:
+    return ENCRYPTION_COMPRESSION == "zstd"
+
+def pack(plaintext: str, codec: Optional[ZstdCodec] = None) -> bytes:
+    """Payload to encrypt for plaintext"""
+    data = plaintext.encode()
+    if codec is None:
+        if not compression_enabled():
+            return data
+        codec = get_codec()
+        if codec is None:
+            raise RuntimeError("ENCRYPTION_COMPRESSION=zstd needs the zstandard package")
+    if len(data) < codec.min_bytes:
+        return data
+    packed = bytes((PACKED_MARKER, VERSION_ZSTD)) + codec.compress(data)
+    return packed if len(packed) < len(data) else data
+
+def unpack(payload: bytes, codec: Optional[ZstdCodec] = None) -> str:
+    """Plaintext of a decrypted payload, packed or not"""
+    if not payload or payload[0] != PACKED_MARKER:
+        return payload.decode()
+    if payload[1] != VERSION_ZSTD:
+        raise ValueError(f"Unknown packed payload version {payload[1]}")
+    codec = codec or get_codec()
+    if codec is None:
+        raise RuntimeError("Payload is zstd-compressed but the zstandard package is not installed")
+    return codec.decompress(payload[2:]).decode()
+
+def payload_format(payload: bytes, codec: Optional[ZstdCodec] = None) -> Tuple[int, int]:
+    """(version, dictionary id) of a payload; (0, 0) for plain text"""
+    if not payload or payload[0] != PACKED_MARKER:
+        return 0, 0
+    codec = codec or get_codec()
+    return payload[1], codec.frame_dict_id(payload[2:]) if codec else -1
+
+def needs_repack(payload: bytes) -> bool:
+    """Whether packing the payload's text now would store it differently
+    (compression turned on or off, or a new dictionary)"""
+    return payload_format(payload) != payload_format(pack(unpack(payload)))
@@ -1,9 +1,38 @@
 import os
 import base64
-from cryptography.fernet import Fernet
+import hashlib
+import logging
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from .compression import pack, unpack, needs_repack
+
+# Encrypt per-user data under that user's own data key (see envelope.py)
+ENVELOPE_ENCRYPTION = os.getenv("ENVELOPE_ENCRYPTION", "true").lower() == "true"
+ENVELOPE_PREFIX = "env1:"
+# Every Fernet token starts with these characters (version byte, then the
+# high bytes of the timestamp)
+FERNET_TOKEN_PREFIX = "gAAAAA"
+
+logger = logging.getLogger(__name__)
+
+class DecryptionError(ValueError):
+    """Ciphertext that none of the configured keys can decrypt"""
+
+@lru_cache(maxsize=None)
+def _derive_key(password: bytes, salt: bytes) -> bytes:
+    # 100k PBKDF2 iterations are slow by design; derive once per process
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(password))
+
 # Generate or load encryption key
 def get_encryption_key():
     key = os.getenv("ENCRYPTION_KEY")
@@ -11,36 +40,126 @@ def get_encryption_key():
         # Generate key from password and salt
         password = os.getenv("ENCRYPTION_PASSWORD", "default-therapy-bot-key").encode()
         salt = os.getenv("ENCRYPTION_SALT", "therapy-bot-salt").encode()
-        
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password))
+        key = _derive_key(password, salt)
     else:
         key = key.encode()
     
     return key
 
-# Initialize Fernet cipher
-_cipher = Fernet(get_encryption_key())
+def get_encryption_keys() -> List[bytes]:
+    """Field keys, newest first: the current key, then ENCRYPTION_PREVIOUS_KEYS.
+
+    Data is always encrypted with the current key and decrypted with whichever
+    key works, so keys can be rotated online; the re-encryption worker
+    (services/reencryption.py) then moves old rows onto the current key.
+    """
+    keys = [get_encryption_key()]
+    for key in os.getenv("ENCRYPTION_PREVIOUS_KEYS", "").split(","):
+        if key.strip():
+            keys.append(key.strip().encode())
+    return keys
+
+def key_fingerprint(key: bytes) -> str:
+    """Short, non-secret identifier of a key"""
+    return hashlib.sha256(key).hexdigest()[:12]
+
+# Fernet ciphers, built on first use so importing this module stays cheap:
+# encrypt with the current key, decrypt with any
+_primary_cipher = None
+_cipher = None
+
+def _get_ciphers() -> Tuple[Fernet, MultiFernet]:
+    global _primary_cipher, _cipher
+    if _cipher is None:
+        keys = get_encryption_keys()
+        _primary_cipher = Fernet(keys[0])
+        _cipher = MultiFernet([Fernet(key) for key in keys])
+    return _primary_cipher, _cipher
+
+def encrypt_data(plaintext: str, user_id=None) -> str:
+    """Encrypt plaintext data using Fernet symmetric encryption.
 
-def encrypt_data(plaintext: str) -> str:
-    """Encrypt plaintext data using Fernet symmetric encryption"""
+    With a user_id, the data is encrypted under that user's data key so it can
+    be crypto-shredded with the account. The text is compressed first when
+    ENCRYPTION_COMPRESSION is on (see compression.py).
+    """
     if not plaintext:
         return plaintext
-    return _cipher.encrypt(plaintext.encode()).decode()
+    if user_id is not None and ENVELOPE_ENCRYPTION:
+        from .envelope import get_data_keyring
+        return get_data_keyring().encrypt(user_id, plaintext)
+    return _get_ciphers()[1].encrypt(pack(plaintext)).decode()
+
+def _decrypt_payload(ciphertext: str) -> Optional[bytes]:
+    """Decrypted payload of a Fernet or envelope token (None if shredded)"""
+    if ciphertext.startswith(ENVELOPE_PREFIX):
+        from .envelope import get_data_keyring
+        try:
+            return get_data_keyring().decrypt_payload(ciphertext)
+        except (InvalidToken, KeyError, ValueError) as e:
+            logger.error(f"Envelope decryption failed: {type(e).__name__} {e}")
+            raise DecryptionError("Could not decrypt envelope ciphertext") from None
+    try:
+        return _get_ciphers()[1].decrypt(ciphertext.encode())
+    except InvalidToken:
+        logger.error("Decryption failed: token not valid under any configured key")
+        raise DecryptionError("Could not decrypt ciphertext with any configured key") from None
+
+def _is_encrypted(value: str) -> bool:
+    return value.startswith(ENVELOPE_PREFIX) or value.startswith(FERNET_TOKEN_PREFIX)
 
 def decrypt_data(ciphertext: str) -> str:
-    """Decrypt ciphertext data using Fernet symmetric encryption"""
-    if not ciphertext:
+    """Decrypt ciphertext data using Fernet symmetric encryption.
+
+    Data whose user's data key has been shredded decrypts to None, and values
+    that were stored unencrypted (not Fernet tokens) are returned as they are.
+    Raises DecryptionError when no configured key can decrypt a token.
+    """
+    if not ciphertext or not _is_encrypted(ciphertext):
         return ciphertext
+    payload = _decrypt_payload(ciphertext)
+    if payload is None:
+        return None
+    try:
+        return unpack(payload)
+    except (ValueError, RuntimeError) as e:
+        logger.error(f"Decrypted payload could not be unpacked: {e}")
+        raise DecryptionError("Could not unpack decrypted payload") from None
+
+def decrypt_or_none(ciphertext: str, record: str = "value") -> Optional[str]:
+    """decrypt_data for read paths: a value no configured key can decrypt is
+    logged (record names it, e.g. "message <id>") and read as None, so one bad
+    row doesn't fail a whole conversation, page or export"""
     try:
-        return _cipher.decrypt(ciphertext.encode()).decode()
-    except Exception:
-        return ciphertext  # Return as-is if decryption fails
+        return decrypt_data(ciphertext)
+    except DecryptionError:
+        logger.error(f"Could not decrypt {record}; returning it without content")
+        return None
+
+def needs_reencryption(ciphertext: str) -> bool:
+    """Whether a stored value is encrypted under anything but the current scheme.
+
+    With envelope encryption on, every legacy field-key token needs moving
+    under its owner's data key; otherwise tokens not under the current field
+    key do. Unencrypted values and envelope ciphertexts are left alone (data
+    keys follow master key changes through re-wrapping instead).
+    """
+    if not ciphertext or not ciphertext.startswith(FERNET_TOKEN_PREFIX):
+        return False
+    if ENVELOPE_ENCRYPTION:
+        return True
+    try:
+        _get_ciphers()[0].decrypt(ciphertext.encode())
+        return False
+    except InvalidToken:
+        return True
+
+def needs_repacking(ciphertext: str) -> bool:
+    """Whether a stored value's payload isn't in the current compression format"""
+    if not ciphertext or not _is_encrypted(ciphertext):
+        return False
+    payload = _decrypt_payload(ciphertext)
+    return payload is not None and needs_repack(payload)
 
 # Legacy aliases for backward compatibility
 encrypt_field = encrypt_data
@@ -0,0 +1,230 @@
+"""Envelope encryption with per-user data keys.
+
+Each user's PHI (message content, wellness notes) is encrypted with that user's
+own Fernet data key. Data keys are stored in user_data_keys wrapped (encrypted)
+by a master key, and unwrapped keys are kept in a bounded in-process LRU with a
+TTL. Ciphertexts name the key they were written with:
+
+    env1:<user id>:<Fernet token>
+
+so they can be decrypted without knowing which row they came from.
+
+Deleting a user's data key (crypto-shredding) makes everything encrypted under
+it unreadable at once, without touching message or wellness rows; other
+processes drop their cached copy within DATA_KEY_CACHE_TTL_SECONDS.
+
+Rotating the master key only re-wraps the data keys, one small row per user:
+set ENVELOPE_MASTER_KEY (and ENVELOPE_MASTER_KEY_ID) to the new key, keep the
+old one in ENVELOPE_PREVIOUS_MASTER_KEYS as "<id>:<key>" and run
+scripts/rewrap_data_keys.py. Without a dedicated master key the field keys
+serve as master keys (see load_master_keys).
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
+
+from cryptography.fernet import Fernet
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+
+from ..db import SessionLocal
+from ..models import UserDataKey
+from .compression import pack, unpack
+from .encryption import ENVELOPE_PREFIX, get_encryption_keys, key_fingerprint
+
+logger = logging.getLogger(__name__)
+
+ENVELOPE_MASTER_KEY_ID = os.getenv("ENVELOPE_MASTER_KEY_ID", "default")
+DATA_KEY_CACHE_SIZE = int(os.getenv("DATA_KEY_CACHE_SIZE", "10000"))
+DATA_KEY_CACHE_TTL_SECONDS = float(os.getenv("DATA_KEY_CACHE_TTL_SECONDS", "300"))
+
+UserId = Union[str, uuid.UUID]
+
+def load_master_keys() -> Tuple[str, Dict[str, Fernet]]:
+    """Current master key id, and every master key by id (current and previous).
+
+    Without a dedicated ENVELOPE_MASTER_KEY, data keys are wrapped by the field
+    keys (ENCRYPTION_KEY and ENCRYPTION_PREVIOUS_KEYS), identified by their
+    fingerprints, so rotating the field key rotates the master key too.
+    """
+    dedicated = os.getenv("ENVELOPE_MASTER_KEY")
+    if dedicated:
+        current_id = ENVELOPE_MASTER_KEY_ID
+        keys = {current_id: Fernet(dedicated.encode())}
+    else:
+        field_keys = get_encryption_keys()
+        current_id = f"field-{key_fingerprint(field_keys[0])}"
+        keys = {f"field-{key_fingerprint(key)}": Fernet(key) for key in field_keys}
+
+    for entry in os.getenv("ENVELOPE_PREVIOUS_MASTER_KEYS", "").split(","):
+        if not entry.strip():
+            continue
+        key_id, _, key = entry.strip().partition(":")
+        if not key:
+            raise ValueError("ENVELOPE_PREVIOUS_MASTER_KEYS entries must look like <id>:<key>")
+        keys.setdefault(key_id, Fernet(key.encode()))
+    return current_id, keys
+
+def _as_uuid(user_id: UserId) -> uuid.UUID:
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+class DataKeyCache:
+    """In-process LRU of unwrapped data keys; entries expire after ttl_seconds.
+
+    A cached None records a user with no data key, so ciphertexts of a
+    shredded user don't cost a database lookup each.
+    """
+
+    def __init__(self, max_entries: int = DATA_KEY_CACHE_SIZE, ttl_seconds: float = DATA_KEY_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[uuid.UUID, Tuple[Optional[Fernet], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID) -> Tuple[bool, Optional[Fernet]]:
+        """(found, cipher) for a user"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return False, None
+            if entry[1] < time.monotonic():
+                del self._entries[user_id]
+                return False, None
+            self._entries.move_to_end(user_id)
+            return True, entry[0]
+
+    def put(self, user_id: uuid.UUID, cipher: Optional[Fernet]):
+        with self._lock:
+            self._entries[user_id] = (cipher, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id: uuid.UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class DataKeyring:
+    """Creates, unwraps, caches and shreds per-user data keys"""
+
+    def __init__(self, session_factory=SessionLocal, cache: Optional[DataKeyCache] = None, master_keys=None):
+        self.session_factory = session_factory
+        self.cache = cache or DataKeyCache()
+        self.master_key_id, self.master_keys = master_keys or load_master_keys()
+
+    def _unwrap(self, row: UserDataKey) -> Fernet:
+        master = self.master_keys.get(row.master_key_id)
+        if master is None:
+            raise KeyError(f"Master key '{row.master_key_id}' is not configured")
+        return Fernet(master.decrypt(row.wrapped_key.encode()))
+
+    def _wrap(self, data_key: bytes) -> str:
+        return self.master_keys[self.master_key_id].encrypt(data_key).decode()
+
+    def _load(self, user_id: uuid.UUID, create: bool) -> Optional[Fernet]:
+        db = self.session_factory()
+        try:
+            row = db.get(UserDataKey, user_id)
+            if row is None and create:
+                data_key = Fernet.generate_key()
+                db.add(UserDataKey(user_id=user_id, wrapped_key=self._wrap(data_key), master_key_id=self.master_key_id))
+                try:
+                    db.commit()
+                    return Fernet(data_key)
+                except IntegrityError:
+                    # Another process created it first; use theirs
+                    db.rollback()
+                    row = db.get(UserDataKey, user_id)
+            return self._unwrap(row) if row is not None else None
+        finally:
+            db.close()
+
+    def get_cipher(self, user_id: UserId, create: bool = False) -> Optional[Fernet]:
+        """The user's data key, or None if they have none (never created, or shredded)"""
+        user_id = _as_uuid(user_id)
+        found, cipher = self.cache.get(user_id)
+        if found and (cipher is not None or not create):
+            return cipher
+        cipher = self._load(user_id, create)
+        self.cache.put(user_id, cipher)
+        return cipher
+
+    def encrypt(self, user_id: UserId, plaintext: str) -> str:
+        cipher = self.get_cipher(user_id, create=True)
+        return f"{ENVELOPE_PREFIX}{_as_uuid(user_id)}:{cipher.encrypt(pack(plaintext)).decode()}"
+
+    def decrypt_payload(self, ciphertext: str) -> Optional[bytes]:
+        """Decrypted (still packed) payload, or None if its data key was shredded"""
+        user_id, _, token = ciphertext[len(ENVELOPE_PREFIX):].partition(":")
+        cipher = self.get_cipher(user_id)
+        if cipher is None:
+            return None
+        return cipher.decrypt(token.encode())
+
+    def decrypt(self, ciphertext: str) -> Optional[str]:
+        """Plaintext of an envelope ciphertext, or None if its data key was shredded"""
+        payload = self.decrypt_payload(ciphertext)
+        return unpack(payload) if payload is not None else None
+
+    def shred(self, db, user_id: UserId) -> bool:
+        """Delete the user's data key in the caller's transaction.
+
+        Once committed, everything encrypted under it is unreadable.
+        """
+        user_id = _as_uuid(user_id)
+        deleted = db.execute(delete(UserDataKey).where(UserDataKey.user_id == user_id)).rowcount
+        self.cache.evict(user_id)
+        logger.info(f"Shredded data key of user {user_id}")
+        return bool(deleted)
+
+    def rewrap_all(self, batch_size: int = 500) -> int:
+        """Re-wrap every data key held under an older master key with the current one.
+
+        Only user_data_keys rows are rewritten; ciphertexts are untouched.
+        """
+        rewrapped = 0
+        cursor = None
+        db = self.session_factory()
+        try:
+            while True:
+                query = select(UserDataKey).where(UserDataKey.master_key_id != self.master_key_id)
+                if cursor is not None:
+                    query = query.where(UserDataKey.user_id > cursor)
+                rows = db.execute(query.order_by(UserDataKey.user_id).limit(batch_size)).scalars().all()
+                if not rows:
+                    break
+                now = datetime.utcnow()
+                for row in rows:
+                    master = self.master_keys.get(row.master_key_id)
+                    if master is None:
+                        raise KeyError(f"Master key '{row.master_key_id}' is not configured")
+                    row.wrapped_key = self._wrap(master.decrypt(row.wrapped_key.encode()))
+                    row.master_key_id = self.master_key_id
+                    row.rewrapped_at = now
+                db.commit()
+                rewrapped += len(rows)
+                cursor = rows[-1].user_id
+                logger.info(f"Re-wrapped {rewrapped} data keys under master key '{self.master_key_id}'")
+            return rewrapped
+        finally:
+            db.close()
+
+# Global keyring instance
+_data_keyring = None
+
+def get_data_keyring() -> DataKeyring:
+    """Get or create the keyring for the configured master keys"""
+    global _data_keyring
+    if _data_keyring is None:
+        _data_keyring = DataKeyring()
+    return _data_keyring
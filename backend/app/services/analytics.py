@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_
+from sqlalchemy import Float, cast, func, extract, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, array
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 from ..models import Message, User, Session as SessionModel
@@ -48,25 +49,29 @@ def get_case_trends(db: Session, period: str = "week") -> Dict[str, Any]:
         }]
     }
 
+def _escalation_tag_counts(limit: int = 10):
+    """Escalations per trigger category ('source:category' tags), most common
+    first, aggregated in one pass; jsonb_typeof skips rows stored as JSON null"""
+    tag = func.jsonb_array_elements_text(Message.risk_tags).table_valued("value").alias("tag")
+    category = func.split_part(tag.c.value, ":", 2).label("category")
+    count = func.count().label("count")
+    return (
+        select(category, count)
+        .select_from(Message)
+        .join(tag, true())
+        .where(
+            Message.is_escalated == True,
+            func.jsonb_typeof(Message.risk_tags) == "array",
+            tag.c.value.contains(":")
+        )
+        .group_by(category)
+        .order_by(count.desc(), category)
+        .limit(limit)
+    )
+
 def get_escalation_patterns(db: Session) -> Dict[str, Any]:
     """Categorize common crisis triggers from risk tags"""
-    # Get escalated messages with risk tags
-    escalated_messages = db.query(Message).filter(
-        Message.is_escalated == True,
-        Message.risk_tags.isnot(None)
-    ).all()
-    
-    # Count trigger categories
-    trigger_counts = {}
-    for msg in escalated_messages:
-        if msg.risk_tags:
-            for tag in msg.risk_tags:
-                if ':' in tag:
-                    category = tag.split(':')[1]
-                    trigger_counts[category] = trigger_counts.get(category, 0) + 1
-    
-    # Sort by frequency
-    sorted_triggers = sorted(trigger_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    sorted_triggers = db.execute(_escalation_tag_counts()).all()
     
     return {
         "chart_type": "doughnut",
@@ -117,6 +122,16 @@ def get_consultant_activity(db: Session) -> Dict[str, Any]:
         ]
     }
 
+def _risk_score_histogram(bounds: List[float]):
+    """Escalated messages per score range in one pass: width_bucket numbers
+    each score by the range it falls in (0 below bounds[0])"""
+    bucket = func.width_bucket(Message.risk_score, cast(array(bounds), ARRAY(Float))).label("bucket")
+    return (
+        select(bucket, func.count())
+        .where(Message.is_escalated == True, Message.risk_score.between(0.0, 1.0))
+        .group_by(bucket)
+    )
+
 def get_risk_score_distribution(db: Session) -> Dict[str, Any]:
     """Get distribution of risk scores"""
     risk_ranges = [
@@ -126,16 +141,9 @@ def get_risk_score_distribution(db: Session) -> Dict[str, Any]:
         ("Critical (0.8-1.0)", 0.8, 1.0)
     ]
     
-    counts = []
-    for label, min_score, max_score in risk_ranges:
-        count = db.query(Message).filter(
-            and_(
-                Message.risk_score >= min_score,
-                Message.risk_score < max_score if max_score < 1.0 else Message.risk_score <= max_score,
-                Message.is_escalated == True
-            )
-        ).count()
-        counts.append(count)
+    counts = [0] * len(risk_ranges)
+    for index, count in db.execute(_risk_score_histogram([min_score for _, min_score, _ in risk_ranges[1:]])):
+        counts[index] = count
     
     return {
         "chart_type": "bar",
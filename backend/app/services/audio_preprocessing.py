@@ -0,0 +1,192 @@
+"""Audio preprocessing applied before Whisper transcription.
+
+Whisper always works on 30-second windows of 16 kHz mono audio, so any
+leading/trailing silence or over-long clip is CPU spent on nothing. This module
+decodes an upload, downmixes and resamples it to 16 kHz, trims silence using
+frame energy and caps the duration - all vectorized with NumPy.
+"""
+
+import io
+import os
+import wave
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+WHISPER_WINDOW_SECONDS = 30
+
+# Configurable limits
+MAX_DURATION_SECONDS = float(os.getenv("AUDIO_MAX_DURATION_SECONDS", "300"))
+SILENCE_THRESHOLD_DB = float(os.getenv("AUDIO_SILENCE_THRESHOLD_DB", "-40"))
+SILENCE_FRAME_MS = int(os.getenv("AUDIO_SILENCE_FRAME_MS", "30"))
+SILENCE_PADDING_MS = int(os.getenv("AUDIO_SILENCE_PADDING_MS", "200"))
+
+# Clips whose loudest frame is below this are treated as pure silence
+SILENCE_FLOOR_DB = -70.0
+
+@dataclass
+class PreprocessedAudio:
+    """Preprocessed 16 kHz mono float32 samples plus bookkeeping"""
+    samples: np.ndarray
+    sample_rate: int
+    original_duration: float
+    trimmed_seconds: float
+    capped_seconds: float
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def is_silent(self) -> bool:
+        return len(self.samples) == 0
+
+def decode_wav(data: bytes):
+    """Decode PCM WAV bytes into (float32 samples [n, channels], sample_rate)"""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / float(1 << 23)
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+    return samples.reshape(-1, channels), sample_rate
+
+def decode_audio(data: bytes):
+    """Decode uploaded audio bytes into (samples, sample_rate).
+
+    WAV is decoded in-process; any other container falls back to ffmpeg via
+    Whisper's loader, which already returns 16 kHz mono.
+    """
+    try:
+        return decode_wav(data)
+    except (wave.Error, EOFError, ValueError):
+        pass
+
+    import tempfile
+    from whisper.audio import load_audio
+
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as temp_audio_file:
+            temp_audio_file.write(data)
+            temp_path = temp_audio_file.name
+        return load_audio(temp_path, sr=TARGET_SAMPLE_RATE), TARGET_SAMPLE_RATE
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """Downmix [n, channels] samples to a 1-D float32 array"""
+    if samples.ndim == 1:
+        return samples.astype(np.float32, copy=False)
+    return samples.mean(axis=1, dtype=np.float32)
+
+def resample(samples: np.ndarray, orig_sr: int, target_sr: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Resample 1-D audio with linear interpolation"""
+    if orig_sr == target_sr or len(samples) == 0:
+        return samples.astype(np.float32, copy=False)
+
+    target_length = int(round(len(samples) * target_sr / orig_sr))
+    if orig_sr > target_sr:
+        # Cheap anti-aliasing: box filter over the decimation factor
+        width = int(orig_sr // target_sr)
+        if width > 1:
+            kernel = np.full(width, 1.0 / width, dtype=np.float32)
+            samples = np.convolve(samples, kernel, mode="same")
+
+    positions = np.arange(target_length, dtype=np.float64) * (orig_sr / target_sr)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int, frame_ms: int = SILENCE_FRAME_MS) -> np.ndarray:
+    """RMS energy per frame in dBFS"""
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        frames = samples.reshape(1, -1) if len(samples) else np.zeros((1, 1), dtype=np.float32)
+    else:
+        frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+def trim_silence(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    frame_ms: int = SILENCE_FRAME_MS,
+    padding_ms: int = SILENCE_PADDING_MS
+) -> np.ndarray:
+    """Trim leading and trailing frames quieter than threshold_db below the peak frame"""
+    if len(samples) == 0:
+        return samples
+
+    energy = frame_energy_db(samples, sample_rate, frame_ms)
+    peak = energy.max()
+    if peak < SILENCE_FLOOR_DB:
+        return samples[:0]
+    voiced = np.flatnonzero(energy >= peak + threshold_db)
+
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, voiced[0] * frame_length - padding)
+    end = min(len(samples), (voiced[-1] + 1) * frame_length + padding)
+    return samples[start:end]
+
+def cap_duration(samples: np.ndarray, sample_rate: int, max_seconds: float = MAX_DURATION_SECONDS) -> np.ndarray:
+    """Truncate audio to at most max_seconds"""
+    if max_seconds and max_seconds > 0:
+        return samples[:int(max_seconds * sample_rate)]
+    return samples
+
+def whisper_windows(duration: float) -> int:
+    """Number of 30-second windows Whisper will decode for a clip"""
+    return int(np.ceil(duration / WHISPER_WINDOW_SECONDS)) if duration > 0 else 0
+
+def preprocess_samples(
+    samples: np.ndarray,
+    sample_rate: int,
+    max_seconds: float = MAX_DURATION_SECONDS,
+    threshold_db: float = SILENCE_THRESHOLD_DB
+) -> PreprocessedAudio:
+    """Downmix, resample, trim and cap already-decoded samples"""
+    mono = to_mono(samples)
+    original_duration = len(mono) / sample_rate
+    audio = resample(mono, sample_rate, TARGET_SAMPLE_RATE)
+
+    trimmed = trim_silence(audio, TARGET_SAMPLE_RATE, threshold_db=threshold_db)
+    capped = cap_duration(trimmed, TARGET_SAMPLE_RATE, max_seconds)
+
+    return PreprocessedAudio(
+        samples=np.ascontiguousarray(capped, dtype=np.float32),
+        sample_rate=TARGET_SAMPLE_RATE,
+        original_duration=original_duration,
+        trimmed_seconds=(len(audio) - len(trimmed)) / TARGET_SAMPLE_RATE,
+        capped_seconds=(len(trimmed) - len(capped)) / TARGET_SAMPLE_RATE
+    )
+
+def preprocess_audio(data: bytes, max_seconds: float = MAX_DURATION_SECONDS) -> PreprocessedAudio:
+    """Decode uploaded audio bytes and prepare them for Whisper"""
+    samples, sample_rate = decode_audio(data)
+    result = preprocess_samples(samples, sample_rate, max_seconds=max_seconds)
+    logger.info(
+        f"Audio preprocessed: {result.original_duration:.2f}s -> {result.duration:.2f}s "
+        f"(trimmed {result.trimmed_seconds:.2f}s, capped {result.capped_seconds:.2f}s)"
+    )
+    return result
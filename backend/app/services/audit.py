@@ -4,6 +4,19 @@ from typing import Dict, Any, Optional
 from ..models import AuditLog, User
 from datetime import datetime
 import json
+import uuid
+
+def audit_entry(
+    action: str,
+    user_id: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> AuditLog:
+    """Audit log row, for callers that commit it in their own transaction"""
+    return AuditLog(
+        user_id=uuid.UUID(str(user_id)) if user_id else None,
+        action=action,
+        audit_metadata=metadata
+    )
 
 def log_action(
     db: Session,
@@ -12,12 +25,7 @@ def log_action(
     metadata: Optional[Dict[str, Any]] = None
 ):
     """Log user action for audit trail"""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        metadata=metadata
-    )
-    db.add(audit_log)
+    db.add(audit_entry(action, user_id, metadata))
     db.commit()
 
 def log_login(db: Session, user: User, success: bool = True):
@@ -29,14 +37,13 @@ def log_login(db: Session, user: User, success: bool = True):
         {"username": user.username if user else "unknown"}
     )
 
+def message_sent_entry(user: User, message_id: str, is_escalated: bool = False) -> AuditLog:
+    return audit_entry("message_sent", str(user.id), {"message_id": message_id, "escalated": is_escalated})
+
 def log_message_sent(db: Session, user: User, message_id: str, is_escalated: bool = False):
     """Log message sending"""
-    log_action(
-        db,
-        "message_sent",
-        str(user.id),
-        {"message_id": message_id, "escalated": is_escalated}
-    )
+    db.add(message_sent_entry(user, message_id, is_escalated))
+    db.commit()
 
 def log_escalation_viewed(db: Session, user: User, escalation_id: str):
     """Log escalation viewing by consultant"""
@@ -60,10 +67,8 @@ def log_role_change(db: Session, admin_user: User, target_user: User, old_role:
         }
     )
 
-def log_escalation_created(db: Session, user: User, message_id: str, risk_score: float, risk_tags: list):
-    """Log escalation creation"""
-    log_action(
-        db,
+def escalation_created_entry(user: User, message_id: str, risk_score: float, risk_tags: list) -> AuditLog:
+    return audit_entry(
         "escalation_created",
         str(user.id),
         {
@@ -74,10 +79,13 @@ def log_escalation_created(db: Session, user: User, message_id: str, risk_score:
         }
     )
 
-def log_escalation_resolved(db: Session, consultant: User, message_id: str, resolution_notes: str = None):
-    """Log escalation resolution"""
-    log_action(
-        db,
+def log_escalation_created(db: Session, user: User, message_id: str, risk_score: float, risk_tags: list):
+    """Log escalation creation"""
+    db.add(escalation_created_entry(user, message_id, risk_score, risk_tags))
+    db.commit()
+
+def escalation_resolved_entry(consultant: User, message_id: str, resolution_notes: str = None) -> AuditLog:
+    return audit_entry(
         "escalation_resolved",
         str(consultant.id),
         {
@@ -86,4 +94,9 @@ def log_escalation_resolved(db: Session, consultant: User, message_id: str, reso
             "resolved_by": consultant.username,
             "resolution_timestamp": datetime.now().isoformat()
         }
-    )
\ No newline at end of file
+    )
+
+def log_escalation_resolved(db: Session, consultant: User, message_id: str, resolution_notes: str = None):
+    """Log escalation resolution"""
+    db.add(escalation_resolved_entry(consultant, message_id, resolution_notes))
+    db.commit()
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""Precompiled content scanner shared by the guardrail functions.
+
+A scan produces structured findings (PII spans and blocklist hits) that every
+guardrail check reuses instead of rescanning the text:
+
+* the text is lower-cased once and every blocklist keyword is located with
+  str.find, which is far cheaper in CPython than an IGNORECASE regex per
+  keyword; hits may overlap, so phrases from different lists sharing words are
+  all reported;
+* numeric PII patterns (phone, SSN, card, street number) are only tried where
+  a run of digits starts, so ordinary prose costs a few str.find calls;
+* patterns anchored on a character (the '@' of an email address) only run on
+  the whitespace-delimited tokens containing it.
+
+Redaction applies categories one after another, like successive re.sub calls.
+Once a span is replaced, a later pattern can match text it didn't match in the
+original: a card number right after an SSN that the card pattern first matched
+across, or an address that backtracks to a shorter match once a following
+email is gone. So when a later category's finding touches a span already
+taken, that category is rescanned with the taken spans masked out.
+"""
+
+import re
+from dataclasses import dataclass, field
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+_WHITESPACE = re.compile(r"\s")
+_DIGIT_RUN = re.compile(r"\d+")
+_ASCII_DIGITS = "0123456789"
+# Stands in for a replaced span: like the '[' and ']' ending every replacement
+# it is a non-word character that no pattern can match
+_MASK = "\x00"
+
+@dataclass(frozen=True)
+class Finding:
+    """A PII span or blocklist hit"""
+    category: str
+    start: int
+    end: int
+    value: str
+
+@dataclass
+class ScanResult:
+    text: str
+    findings: List[Finding] = field(default_factory=list)
+    # category -> pattern, for the categories select() can rescan
+    patterns: Dict[str, Pattern] = field(default_factory=dict)
+
+    def of(self, *categories: str) -> List[Finding]:
+        return [finding for finding in self.findings if finding.category in categories]
+
+    def has(self, *categories: str) -> bool:
+        return any(finding.category in categories for finding in self.findings)
+
+    def count(self, *categories: str) -> int:
+        return sum(1 for finding in self.findings if finding.category in categories)
+
+    def values(self, *categories: str) -> set:
+        return {finding.value for finding in self.findings if finding.category in categories}
+
+    def select(self, replacements: Dict[str, str]) -> List[Finding]:
+        """The findings redact() would replace, in text order.
+
+        Categories are applied in the order given, like successive substitutions:
+        a finding overlapping one already taken from an earlier category is
+        dropped, and a pattern whose findings touch a taken span is rerun on
+        the text with those spans masked. Within a category the earliest (then
+        longest) span wins.
+        """
+        starts: List[int] = []
+        kept: List[Finding] = []
+        for category in replacements:
+            spans = self.of(category)
+            if category in self.patterns and any(_touches(starts, kept, finding) for finding in spans):
+                spans = self._rescan(category, kept)
+            for finding in sorted(spans, key=lambda finding: (finding.start, -finding.end)):
+                index = bisect_left(starts, finding.start)
+                if index > 0 and kept[index - 1].end > finding.start:
+                    continue
+                if index < len(kept) and kept[index].start < finding.end:
+                    continue
+                starts.insert(index, finding.start)
+                kept.insert(index, finding)
+        return kept
+
+    def _rescan(self, category: str, taken: List[Finding]) -> List[Finding]:
+        """category's matches once the taken spans (in text order) are replaced"""
+        parts = []
+        position = 0
+        for finding in taken:
+            parts.append(self.text[position:finding.start])
+            parts.append(_MASK * (finding.end - finding.start))
+            position = finding.end
+        parts.append(self.text[position:])
+        return [
+            Finding(category, match.start(), match.end(), match.group())
+            for match in self.patterns[category].finditer("".join(parts))
+        ]
+
+    def redact(self, replacements: Dict[str, str], selected: Optional[List[Finding]] = None) -> str:
+        """Replace findings whose category is in replacements (see select())"""
+        selected = self.select(replacements) if selected is None else selected
+        if not selected:
+            return self.text
+
+        parts = []
+        position = 0
+        for finding in selected:
+            parts.append(self.text[position:finding.start])
+            parts.append(replacements[finding.category])
+            position = finding.end
+        parts.append(self.text[position:])
+        return "".join(parts)
+
+    def has_outside(self, category: str, spans: List[Finding]) -> bool:
+        """Whether any finding of category does not overlap the given spans"""
+        return any(
+            not any(span.start < finding.end and finding.start < span.end for span in spans)
+            for finding in self.of(category)
+        )
+
+def _touches(starts: List[int], kept: List[Finding], finding: Finding) -> bool:
+    """Whether finding overlaps or abuts a kept span (kept sorted by start)"""
+    index = bisect_left(starts, finding.start)
+    if index > 0 and kept[index - 1].end >= finding.start:
+        return True
+    return index < len(kept) and kept[index].start <= finding.end
+
+def _find_all(haystack: str, needle: str) -> Iterable[int]:
+    index = haystack.find(needle)
+    while index != -1:
+        yield index
+        index = haystack.find(needle, index + 1)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+def _lower_same_length(text: str) -> str:
+    """Lower-case text without changing any offsets"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. 'İ') grow when lower-cased; leave those as they are
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+class KeywordMatcher:
+    """Case-insensitive multi-keyword matcher.
+
+    Each keyword maps to one or more categories. With word_boundaries=True a
+    keyword only matches as a whole word ("die" does not match "diet").
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]], word_boundaries: bool = False):
+        self.categories: Dict[str, List[str]] = {}
+        for category, words in keywords.items():
+            for word in words:
+                self.categories.setdefault(word.lower(), []).append(category)
+        self.word_boundaries = word_boundaries
+
+    def find(self, text: str) -> List[Finding]:
+        """All keyword hits, including overlapping ones, in text order"""
+        lowered = _lower_same_length(text)
+        findings = []
+        for keyword, categories in self.categories.items():
+            for start in _find_all(lowered, keyword):
+                end = start + len(keyword)
+                if self.word_boundaries and (
+                    (start > 0 and _is_word_char(lowered[start - 1])) or
+                    (end < len(lowered) and _is_word_char(lowered[end]))
+                ):
+                    continue
+                for category in categories:
+                    findings.append(Finding(category, start, end, keyword))
+        findings.sort(key=lambda finding: (finding.start, -finding.end))
+        return findings
+
+def _digit_run_starts(text: str) -> List[int]:
+    if not text.isascii():
+        return [match.start() for match in _DIGIT_RUN.finditer(text)]
+    positions = sorted(index for digit in _ASCII_DIGITS for index in _find_all(text, digit))
+    return [index for index in positions if index == 0 or not text[index - 1].isdigit()]
+
+class ContentScanner:
+    """Precompiled scanner over named PII patterns and categorized keyword lists.
+
+    `numeric_patterns` are (category, compiled pattern) pairs for patterns that
+    always begin at a digit or at the single character before one ('+1',
+    '(555)'); they are only tried at those positions, with the same leftmost,
+    non-overlapping results as finditer. `anchored_patterns` are
+    (category, compiled pattern, anchor) triples that only run on the tokens
+    containing the anchor character.
+    """
+
+    def __init__(
+        self,
+        keywords: Dict[str, Iterable[str]],
+        numeric_patterns: Sequence[Tuple[str, Pattern]] = (),
+        anchored_patterns: Sequence[Tuple[str, Pattern, str]] = ()
+    ):
+        self.keywords = KeywordMatcher(keywords)
+        self._numeric = list(numeric_patterns)
+        self._anchored = list(anchored_patterns)
+        self._patterns = {category: regex for category, regex in self._numeric}
+        self._patterns.update((category, regex) for category, regex, anchor in self._anchored)
+
+    def _scan_numeric(self, text: str, findings: List[Finding]):
+        run_starts = _digit_run_starts(text)
+        if not run_starts or not self._numeric:
+            return
+        candidates = sorted({start - 1 for start in run_starts if start > 0}.union(run_starts))
+        for category, regex in self._numeric:
+            position = 0
+            for candidate in candidates:
+                if candidate < position:
+                    continue
+                match = regex.match(text, candidate)
+                if match:
+                    findings.append(Finding(category, match.start(), match.end(), match.group()))
+                    position = max(match.end(), candidate + 1)
+
+    def _scan_anchored(self, text: str, findings: List[Finding]):
+        for category, regex, anchor in self._anchored:
+            index = text.find(anchor)
+            while index != -1:
+                start = index
+                while start > 0 and not text[start - 1].isspace():
+                    start -= 1
+                whitespace = _WHITESPACE.search(text, index)
+                end = whitespace.start() if whitespace else len(text)
+                # Searching with pos/endpos (not a slice) keeps \b true to the real text
+                for match in regex.finditer(text, start, end):
+                    findings.append(Finding(category, match.start(), match.end(), match.group()))
+                index = text.find(anchor, end)
+
+    def scan(self, text: str) -> ScanResult:
+        findings = []
+        self._scan_anchored(text, findings)
+        self._scan_numeric(text, findings)
+        findings.extend(self.keywords.find(text))
+        return ScanResult(text=text, findings=findings, patterns=self._patterns)
@@ -0,0 +1,214 @@
+"""Incrementally maintained counters behind /admin/metrics.
+
+The admin dashboard used to COUNT(*) users, sessions and escalated messages on
+every refresh, which gets slower as the tables grow. Instead metric_counters
+holds one row per running total and the dashboard reads a handful of rows by
+primary key.
+
+Counters change in the same transaction as the rows they count: a
+before_flush listener on every ORM session works out what the flush added,
+removed or changed (users and their role, sessions, escalated and critical
+messages) and upserts the differences. Each update locks only its own counter
+row until commit, and the rows are updated in name order so two transactions
+can't deadlock on them.
+
+Sessions active in the last 24 hours are a sliding window, not a total: starts
+are counted per UTC hour (sessions_started:YYYY-MM-DDTHH) and the dashboard
+sums the last ACTIVE_SESSION_WINDOW_HOURS + 1 buckets, i.e. the window is
+rounded out to the start of the hour.
+
+Writes that bypass the ORM unit of work (bulk UPDATEs such as the risk
+backfill, dropped message partitions, manual SQL) don't go through the
+listener. reconcile_counters() recounts the source tables every
+COUNTER_RECONCILE_MINUTES and corrects any drift; it is also what deletes
+expired session buckets. It runs on the maintenance queue, so a deployment
+needs celery beat and a maintenance worker (see the README).
+"""
+
+import os
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models import MetricCounter, Message, Role, User, Session as SessionModel
+
+logger = logging.getLogger(__name__)
+
+COUNTER_RECONCILE_MINUTES = int(os.getenv("COUNTER_RECONCILE_MINUTES", "15"))
+ACTIVE_SESSION_WINDOW_HOURS = 24
+CRITICAL_RISK_SCORE = 0.8
+
+USERS = "users"
+USERS_BY_ROLE = "users_role:"
+ESCALATIONS = "escalations"
+CRITICAL_ESCALATIONS = "escalations_critical"
+SESSIONS_STARTED = "sessions_started:"
+
+def _hour_start(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def hour_bucket(moment: Optional[datetime]) -> str:
+    """Counter name for sessions started in moment's UTC hour (None: now)"""
+    return f"{SESSIONS_STARTED}{_hour_start(moment or datetime.now(timezone.utc)):%Y-%m-%dT%H}"
+
+def active_session_buckets(now: Optional[datetime] = None) -> List[str]:
+    """Hour buckets summed for the active sessions count, oldest first"""
+    now = now or datetime.now(timezone.utc)
+    return [hour_bucket(now - timedelta(hours=hours)) for hours in range(ACTIVE_SESSION_WINDOW_HOURS, -1, -1)]
+
+# Attributes each counted model's contribution depends on
+TRACKED_ATTRIBUTES = {
+    User: ("role_id",),
+    SessionModel: ("started_at", "ended_at"),
+    Message: ("is_escalated", "risk_score"),
+}
+
+def _counts(obj, before: bool = False) -> Dict[str, int]:
+    """What obj contributes to the counters, now or as of the last flush"""
+    state = inspect(obj)
+    
+    def value(attribute):
+        history = state.attrs[attribute].history
+        if before and history.deleted:
+            return history.deleted[0]
+        return getattr(obj, attribute)
+    
+    if isinstance(obj, User):
+        role_id = value("role_id")
+        if role_id is None and obj.role is not None:
+            role_id = obj.role.id
+        return {USERS: 1, f"{USERS_BY_ROLE}{role_id}": 1}
+    if isinstance(obj, SessionModel):
+        return {} if value("ended_at") is not None else {hour_bucket(value("started_at")): 1}
+    if isinstance(obj, Message):
+        if not value("is_escalated"):
+            return {}
+        risk_score = value("risk_score")
+        if risk_score is not None and risk_score >= CRITICAL_RISK_SCORE:
+            return {ESCALATIONS: 1, CRITICAL_ESCALATIONS: 1}
+        return {ESCALATIONS: 1}
+    return {}
+
+def _changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in TRACKED_ATTRIBUTES.get(type(obj), ()))
+
+def counter_deltas(new: Iterable, dirty: Iterable, deleted: Iterable) -> Dict[str, int]:
+    """Counter changes for a flush of these objects"""
+    deltas = defaultdict(int)
+    for obj in new:
+        for name, count in _counts(obj).items():
+            deltas[name] += count
+    for obj in deleted:
+        for name, count in _counts(obj, before=True).items():
+            deltas[name] -= count
+    for obj in dirty:
+        if not _changed(obj):
+            continue
+        for name, count in _counts(obj, before=True).items():
+            deltas[name] -= count
+        for name, count in _counts(obj).items():
+            deltas[name] += count
+    return {name: delta for name, delta in deltas.items() if delta}
+
+def apply_deltas(connection, deltas: Dict[str, int]):
+    """Add deltas to the counters, creating missing ones; in name order, so
+    concurrent transactions lock counter rows in the same order"""
+    for name in sorted(deltas):
+        statement = insert(MetricCounter).values(name=name, value=deltas[name])
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[MetricCounter.name],
+            set_={"value": MetricCounter.value + statement.excluded.value, "updated_at": func.now()}
+        ))
+
+@event.listens_for(Session, "before_flush")
+def _update_counters(session, flush_context, instances):
+    # Before the flush, so rows being deleted can still load what they counted
+    deltas = counter_deltas(session.new, session.dirty, session.deleted)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+def read_metrics(db, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Dashboard totals from the counters: a role lookup and one primary key
+    read of at most ACTIVE_SESSION_WINDOW_HOURS + 5 rows"""
+    consultant_role_id = db.execute(select(Role.id).where(Role.name == "consultant")).scalar()
+    consultants = f"{USERS_BY_ROLE}{consultant_role_id}"
+    buckets = active_session_buckets(now)
+    values = dict(db.execute(
+        select(MetricCounter.name, MetricCounter.value).where(
+            MetricCounter.name.in_([USERS, ESCALATIONS, CRITICAL_ESCALATIONS, consultants] + buckets)
+        )
+    ).all())
+    return {
+        "total_users": values.get(USERS, 0),
+        "active_sessions": sum(values.get(bucket, 0) for bucket in buckets),
+        "total_escalations": values.get(ESCALATIONS, 0),
+        "critical_cases": values.get(CRITICAL_ESCALATIONS, 0),
+        "consultants": values.get(consultants, 0) if consultant_role_id is not None else 0,
+    }
+
+def source_counts(connection, now: Optional[datetime] = None) -> Dict[str, int]:
+    """The counters recomputed from the source tables"""
+    counts = {USERS: connection.execute(select(func.count()).select_from(User)).scalar()}
+    for role_id, count in connection.execute(select(User.role_id, func.count()).group_by(User.role_id)):
+        counts[f"{USERS_BY_ROLE}{role_id}"] = count
+    counts[ESCALATIONS], counts[CRITICAL_ESCALATIONS] = connection.execute(
+        select(
+            func.count(),
+            func.count().filter(Message.risk_score >= CRITICAL_RISK_SCORE)
+        ).where(Message.is_escalated == True)
+    ).one()
+
+    window_start = _hour_start((now or datetime.now(timezone.utc)) - timedelta(hours=ACTIVE_SESSION_WINDOW_HOURS))
+    hour = func.date_trunc("hour", func.timezone("UTC", SessionModel.started_at))
+    for started, count in connection.execute(
+        select(hour, func.count()).where(
+            SessionModel.started_at >= window_start,
+            SessionModel.ended_at.is_(None)
+        ).group_by(hour)
+    ):
+        counts[hour_bucket(started)] = count
+    return counts
+
+def counter_drift(expected: Dict[str, int], stored: Dict[str, int], oldest_bucket: str) -> Dict[str, int]:
+    """expected - stored for every live counter that is off; session buckets
+    older than oldest_bucket have left the window and are ignored"""
+    drift = {}
+    for name in set(expected) | set(stored):
+        if name.startswith(SESSIONS_STARTED) and name < oldest_bucket:
+            continue
+        difference = expected.get(name, 0) - stored.get(name, 0)
+        if difference:
+            drift[name] = difference
+    return drift
+
+def reconcile_counters(engine, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Recount the source tables and correct the counters; returns the drift.
+
+    The counts and the stored counters are read from one REPEATABLE READ
+    snapshot and the drift is then added, not assigned, so increments that
+    commit in between aren't lost."""
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as connection:
+        with connection.begin():
+            expected = source_counts(connection, now)
+            stored = dict(connection.execute(select(MetricCounter.name, MetricCounter.value)).all())
+
+    oldest_bucket = active_session_buckets(now)[0]
+    drift = counter_drift(expected, stored, oldest_bucket)
+    with engine.begin() as connection:
+        connection.execute(delete(MetricCounter).where(
+            MetricCounter.name.startswith(SESSIONS_STARTED),
+            MetricCounter.name < oldest_bucket
+        ))
+        apply_deltas(connection, drift)
+
+    if drift:
+        logger.warning(f"Reconciled metric counters: {drift}")
+    return drift
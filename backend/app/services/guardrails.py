@@ -1,5 +1,8 @@
+import os
 import re
-from typing import List
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .content_scanner import ContentScanner, ScanResult
 
 # PII patterns
 EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
@@ -20,82 +23,250 @@ HARMFUL_KEYWORDS = [
     'prescription abuse', 'self-medication', 'unprescribed medication'
 ]
 
-def sanitize_input(message: str) -> str:
+# Inappropriate medical advice in AI responses
+MEDICAL_DISCLAIMERS = [
+    'diagnose', 'prescribe', 'medication dosage', 'stop taking medication',
+    'medical diagnosis', 'replace doctor', 'substitute for professional'
+]
+
+# Hopeless language that needs a supportive follow-up
+DISTRESS_PHRASES = ['hopeless', 'no point', 'nothing helps']
+
+CRISIS_INDICATORS = ['want to die', 'going to kill', 'plan to hurt', 'suicide plan']
+CRISIS_WARNING_INDICATORS = {'want to die', 'going to kill', 'suicide plan'}
+
+REDACTION_MARKERS = ['[EMAIL_REDACTED]', '[PHONE_REDACTED]', '[SSN_REDACTED]']
+
+PII_REPLACEMENTS = {
+    'email': '[EMAIL_REDACTED]',
+    'phone': '[PHONE_REDACTED]',
+    'ssn': '[SSN_REDACTED]',
+    'card': '[CARD_REDACTED]',
+    'address': '[ADDRESS_REDACTED]'
+}
+
+# One precompiled scanner for every PII pattern and blocklist. The numeric
+# patterns are only tried where digits appear, and email addresses are only
+# looked for around '@'.
+SCANNER = ContentScanner(
+    numeric_patterns=[
+        ('phone', PHONE_PATTERN),
+        ('ssn', SSN_PATTERN),
+        ('card', CREDIT_CARD_PATTERN),
+        ('address', ADDRESS_PATTERN),
+    ],
+    anchored_patterns=[('email', EMAIL_PATTERN, '@')],
+    keywords={
+        'harmful': HARMFUL_KEYWORDS,
+        'unsafe': UNSAFE_SUGGESTIONS,
+        'medical': MEDICAL_DISCLAIMERS,
+        'distress': DISTRESS_PHRASES,
+        'crisis': CRISIS_INDICATORS,
+        'redaction': REDACTION_MARKERS,
+    }
+)
+
+def scan_content(text: str) -> ScanResult:
+    """Find all PII spans and blocklist hits in a single pass"""
+    return SCANNER.scan(text)
+
+def sanitize_input(message: str, scan: Optional[ScanResult] = None) -> str:
     """Remove PII and harmful content from user input"""
-    sanitized = message
-    
-    # Remove PII
-    sanitized = EMAIL_PATTERN.sub('[EMAIL_REDACTED]', sanitized)
-    sanitized = PHONE_PATTERN.sub('[PHONE_REDACTED]', sanitized)
-    sanitized = SSN_PATTERN.sub('[SSN_REDACTED]', sanitized)
-    sanitized = CREDIT_CARD_PATTERN.sub('[CARD_REDACTED]', sanitized)
-    sanitized = ADDRESS_PATTERN.sub('[ADDRESS_REDACTED]', sanitized)
-    
-    # Remove specific harmful content
-    for keyword in HARMFUL_KEYWORDS:
-        if keyword.lower() in sanitized.lower():
-            sanitized = re.sub(re.escape(keyword), '[CONTENT_FILTERED]', sanitized, flags=re.IGNORECASE)
-    
+    scan = scan or scan_content(message)
+    sanitized = scan.redact({**PII_REPLACEMENTS, 'harmful': '[CONTENT_FILTERED]'})
     return sanitized.strip()
 
-def validate_response(response: str) -> str:
+MEDICAL_DISCLAIMER_NOTE = "\n\n⚠️ This is not medical advice. Please consult a healthcare professional."
+SUPPORTIVE_NOTE = "\n\nRemember: You are not alone, and help is available. Consider reaching out to a mental health professional."
+
+def _redact_response(scan: ScanResult) -> Tuple[str, bool, bool]:
+    """Redacted response text, and whether it needs the medical and supportive notes"""
+    # Redact unsafe suggestions first; a redaction can change word boundaries
+    # around adjacent PII, so the text is only rescanned when it (rarely) changes
+    validated = scan.redact({'unsafe': '[RESPONSE_FILTERED]'})
+    if validated != scan.text:
+        scan = scan_content(validated)
+
+    # Redact any PII that might have leaked through
+    pii_replacements = {
+        'email': PII_REPLACEMENTS['email'],
+        'phone': PII_REPLACEMENTS['phone'],
+        'ssn': PII_REPLACEMENTS['ssn']
+    }
+    redacted = scan.select(pii_replacements)
+    validated = scan.redact(pii_replacements, redacted)
+
+    # Check for inappropriate medical advice, and ensure response is supportive
+    return validated, scan.has_outside('medical', redacted), scan.has_outside('distress', redacted)
+
+def validate_response(response: str, scan: Optional[ScanResult] = None) -> str:
     """Validate AI response and redact unsafe content"""
-    validated = response
-    
-    # Check for unsafe suggestions
-    for unsafe in UNSAFE_SUGGESTIONS:
-        if unsafe.lower() in validated.lower():
-            validated = re.sub(re.escape(unsafe), '[RESPONSE_FILTERED]', validated, flags=re.IGNORECASE)
-    
-    # Remove any PII that might have leaked through
-    validated = EMAIL_PATTERN.sub('[EMAIL_REDACTED]', validated)
-    validated = PHONE_PATTERN.sub('[PHONE_REDACTED]', validated)
-    validated = SSN_PATTERN.sub('[SSN_REDACTED]', validated)
-    
-    # Check for inappropriate medical advice
-    medical_disclaimers = [
-        'diagnose', 'prescribe', 'medication dosage', 'stop taking medication',
-        'medical diagnosis', 'replace doctor', 'substitute for professional'
-    ]
-    
-    for disclaimer in medical_disclaimers:
-        if disclaimer.lower() in validated.lower():
-            validated += "\n\n⚠️ This is not medical advice. Please consult a healthcare professional."
-            break
-    
-    # Ensure response is supportive
-    if any(word in validated.lower() for word in ['hopeless', 'no point', 'nothing helps']):
-        validated += "\n\nRemember: You are not alone, and help is available. Consider reaching out to a mental health professional."
-    
+    scan = scan or scan_content(response)
+    validated, needs_disclaimer, needs_support = _redact_response(scan)
+
+    if needs_disclaimer:
+        validated += MEDICAL_DISCLAIMER_NOTE
+    if needs_support:
+        validated += SUPPORTIVE_NOTE
+
     return validated.strip()
 
-def is_safe_content(text: str) -> bool:
+# Longest text a match can span across whitespace: every blocklist phrase, and
+# the numeric PII patterns (a spaced card number is 19 characters)
+STREAM_CARRY_CHARS = max(24, max(len(keyword) for keyword in SCANNER.keywords.categories))
+# Give up waiting for whitespace after this many characters of one token
+STREAM_MAX_TOKEN_CHARS = 256
+
+class StreamingResponseValidator:
+    """validate_response for a response that arrives in chunks.
+
+    feed() returns the text that is safe to emit so far. The last
+    STREAM_CARRY_CHARS characters (extended back to a whitespace boundary, so
+    an email address is never split) are held back, and the cut is moved
+    before any match that would straddle it, so phrases and PII split across
+    chunks are still redacted. finish() flushes the rest and appends the same
+    notes validate_response would.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._needs_disclaimer = False
+        self._needs_support = False
+        self._started = False
+
+    def _emit(self, scan: ScanResult) -> str:
+        if not scan.text:
+            return ""
+        validated, needs_disclaimer, needs_support = _redact_response(scan)
+        self._needs_disclaimer = self._needs_disclaimer or needs_disclaimer
+        self._needs_support = self._needs_support or needs_support
+        if not self._started:
+            # validate_response strips the reply; only leading space is known now
+            validated = validated.lstrip()
+            self._started = bool(validated)
+        return validated
+
+    def _safe_cut(self, scan: ScanResult) -> int:
+        text = scan.text
+        cut = len(text) - STREAM_CARRY_CHARS
+        if cut <= 0:
+            return 0
+        # End on whitespace so a token still being written isn't split
+        boundary = cut
+        while boundary > 0 and not text[boundary].isspace():
+            boundary -= 1
+        if boundary > 0 or cut < STREAM_MAX_TOKEN_CHARS:
+            cut = boundary
+        # Never cut through a match found in the buffered text
+        moved = True
+        while moved:
+            moved = False
+            for finding in scan.findings:
+                if finding.start < cut < finding.end:
+                    cut = finding.start
+                    moved = True
+        return cut
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of the response and return the text that can be emitted"""
+        self._pending += chunk
+        if len(self._pending) <= STREAM_CARRY_CHARS:
+            return ""
+        scan = scan_content(self._pending)
+        cut = self._safe_cut(scan)
+        if not cut:
+            return ""
+        emitted, self._pending = self._pending[:cut], self._pending[cut:]
+        if self._pending[0].isspace():
+            # No match straddles a whitespace cut, so the emitted part's findings are known
+            return self._emit(ScanResult(
+                text=emitted,
+                findings=[finding for finding in scan.findings if finding.end <= cut],
+                patterns=scan.patterns
+            ))
+        return self._emit(scan_content(emitted))
+
+    def finish(self) -> str:
+        """Flush the held-back text, followed by any notes the response needs"""
+        tail, self._pending = self._pending, ""
+        validated = self._emit(scan_content(tail))
+        if self._needs_disclaimer:
+            validated += MEDICAL_DISCLAIMER_NOTE
+        if self._needs_support:
+            validated += SUPPORTIVE_NOTE
+        return validated.rstrip()
+
+def is_safe_content(text: str, scan: Optional[ScanResult] = None) -> bool:
     """Check if content is safe for processing"""
-    text_lower = text.lower()
-    
+    scan = scan or scan_content(text)
+
     # Check for immediate safety concerns
-    crisis_indicators = ['want to die', 'going to kill', 'plan to hurt', 'suicide plan']
-    if any(indicator in text_lower for indicator in crisis_indicators):
+    if scan.has('crisis'):
         return False
-    
+
     # Check for excessive PII
-    pii_count = (
-        len(EMAIL_PATTERN.findall(text)) +
-        len(PHONE_PATTERN.findall(text)) +
-        len(SSN_PATTERN.findall(text)) +
-        len(CREDIT_CARD_PATTERN.findall(text))
-    )
-    
+    pii_count = scan.count('email', 'phone', 'ssn', 'card')
+
     return pii_count <= 2  # Allow minimal PII but flag excessive sharing
 
-def get_safety_warning(text: str) -> str:
+def get_safety_warning(text: str, scan: Optional[ScanResult] = None) -> str:
     """Generate appropriate safety warning for flagged content"""
-    text_lower = text.lower()
-    
-    if any(indicator in text_lower for indicator in ['want to die', 'going to kill', 'suicide plan']):
+    scan = scan or scan_content(text)
+
+    if scan.values('crisis') & CRISIS_WARNING_INDICATORS:
         return "⚠️ CRISIS DETECTED: If you're having thoughts of self-harm, please contact emergency services (911) or a crisis hotline immediately."
-    
-    if any(pii in text for pii in ['[EMAIL_REDACTED]', '[PHONE_REDACTED]', '[SSN_REDACTED]']):
+
+    if scan.has('redaction'):
         return "ℹ️ Personal information has been removed for your privacy and security."
-    
-    return ""
\ No newline at end of file
+
+    return ""
+
+def sanitize_result(text: str) -> dict:
+    """Sanitized text, safety flag and warnings for one user text"""
+    scan = scan_content(text)
+    sanitized = sanitize_input(text, scan=scan)
+    is_safe = is_safe_content(text, scan=scan)
+
+    warnings = []
+    if sanitized != text:
+        warnings.append("Content has been sanitized for privacy/safety")
+    if not is_safe:
+        warnings.append("Content flagged for safety review")
+
+    return {"original_text": text, "sanitized_text": sanitized, "is_safe": is_safe, "warnings": warnings}
+
+def validate_result(text: str) -> dict:
+    """Validated text, safety flag and warnings for one AI response"""
+    scan = scan_content(text)
+    validated = validate_response(text, scan=scan)
+    is_safe = is_safe_content(text, scan=scan)
+
+    warnings = []
+    if validated != text:
+        warnings.append("Response has been filtered for safety")
+
+    return {"original_text": text, "sanitized_text": validated, "is_safe": is_safe, "warnings": warnings}
+
+def sanitize_results(texts: List[str]) -> List[dict]:
+    """sanitize_result over a chunk of texts (runs in batch pool workers)"""
+    return [sanitize_result(text) for text in texts]
+
+def validate_results(texts: List[str]) -> List[dict]:
+    """validate_result over a chunk of texts (runs in batch pool workers)"""
+    return [validate_result(text) for text in texts]
+
+# Batch endpoints: scanning holds the GIL, so chunks go to worker processes.
+# Every API process starts its own pool, so keep this small and fixed rather
+# than one per core (N uvicorn workers would otherwise fork N * cores)
+BATCH_WORKERS = int(os.getenv("GUARDRAILS_BATCH_WORKERS", "4"))
+BATCH_CHUNK_SIZE = int(os.getenv("GUARDRAILS_BATCH_CHUNK_SIZE", "200"))
+BATCH_MAX_TEXTS = int(os.getenv("GUARDRAILS_BATCH_MAX_TEXTS", "50000"))
+
+_batch_pool = None
+
+def get_batch_pool() -> Optional[Executor]:
+    """Process pool for batch requests, or None to use the default thread pool"""
+    global _batch_pool
+    if _batch_pool is None and BATCH_WORKERS > 1:
+        _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _batch_pool
@@ -0,0 +1,167 @@
+"""Character n-gram language identification.
+
+Each supported language has a profile: the log-scaled, L2-normalized counts of
+its character 1..3-grams, hashed into a fixed number of buckets, built from the
+sample texts in language_samples.json. The profiles are rows of one float32
+matrix, so identifying a text is a hash of its n-grams (vectorized over the
+text's code points) followed by a dot product against every profile at once;
+a batch is one sparse matrix product. Scripts with their own alphabets
+(Cyrillic, kana, Hangul, Han) separate cleanly through their unigrams, and
+trigrams tell the Latin-script languages apart.
+
+The confidence is the softmax of the cosine similarities, so it is high when
+one language clearly wins and near 1/len(languages) when the text gives
+nothing to go on; texts with no letters, or in an unsupported script, get
+DEFAULT_LANGUAGE with confidence 0.
+"""
+
+import os
+import re
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+LANGUAGE_SAMPLES_PATH = os.getenv(
+    "LANGUAGE_SAMPLES_PATH",
+    os.path.join(os.path.dirname(__file__), "language_samples.json")
+)
+
+DEFAULT_LANGUAGE = "en"
+DEFAULT_BUCKETS = 2 ** 14
+NGRAM_MAX = 3
+# Scales cosine similarities before the softmax; higher gives sharper confidences
+TEMPERATURE = 25.0
+# Best cosine similarity under which a text is treated as unidentifiable
+MIN_SIMILARITY = 0.1
+# Below this many texts, scoring one by one beats building a sparse matrix
+SPARSE_MIN_BATCH = 64
+
+# Digits, punctuation and whitespace runs all become a single word separator
+_NON_LETTERS = re.compile(r"[\W\d_]+")
+# Fibonacci hashing multiplier, and one offset per n-gram order so a bigram
+# can't collide with a unigram by construction
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_ORDER_OFFSETS = [np.uint64(0), np.uint64(0x51ED27), np.uint64(0xA3F5B1)]
+_CODE_POINT_BASE = np.uint64(0x110000)
+
+@dataclass
+class LanguagePrediction:
+    language: str
+    confidence: float
+
+def _normalize(text: str) -> str:
+    return " " + _NON_LETTERS.sub(" ", text.lower()).strip() + " "
+
+class LanguageIdentifier:
+    """Cosine similarity against per-language hashed char n-gram profiles"""
+
+    def __init__(self, languages: Sequence[str], profiles: np.ndarray):
+        self.languages = list(languages)
+        self.profiles = np.ascontiguousarray(profiles, dtype=np.float32)
+        self.n_buckets = self.profiles.shape[1]
+        self._shift = np.uint64(64 - int(self.n_buckets).bit_length() + 1)
+
+    def _buckets(self, text: str) -> np.ndarray:
+        """Bucket of every character 1..3-gram of the normalized text"""
+        normalized = _normalize(text)
+        if len(normalized) <= 2:
+            return np.empty(0, dtype=np.int64)
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+        grams = [codes[1:-1]]  # The padding space alone says nothing
+        combined = codes
+        for order in range(1, NGRAM_MAX):
+            combined = combined[:-1] * _CODE_POINT_BASE + codes[order:]
+            grams.append(combined)
+        hashed = np.concatenate([
+            (gram + offset) * _HASH_MULTIPLIER for gram, offset in zip(grams, _ORDER_OFFSETS)
+        ])
+        return (hashed >> self._shift).astype(np.int64)
+
+    def _similarities_one(self, text: str) -> np.ndarray:
+        buckets = self._buckets(text)
+        if not len(buckets):
+            return np.zeros(len(self.languages), dtype=np.float32)
+        unique_buckets, counts = np.unique(buckets, return_counts=True)
+        values = np.log1p(counts.astype(np.float32))
+        return self.profiles[:, unique_buckets] @ values / np.sqrt(values @ values)
+
+    def transform(self, texts: Sequence[str]) -> sp.csr_matrix:
+        """Sparse (len(texts), n_buckets) log-scaled, L2-normalized n-gram counts"""
+        bucket_lists = [self._buckets(text) for text in texts]
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(buckets) for buckets in bucket_lists], out=indptr[1:])
+        indices = np.concatenate(bucket_lists) if bucket_lists else np.empty(0, dtype=np.int64)
+
+        counts = sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(texts), self.n_buckets)
+        )
+        counts.sum_duplicates()
+        np.log1p(counts.data, out=counts.data)
+
+        norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms, dtype=np.float32) @ counts)
+
+    def similarities(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), len(languages)) cosine similarities"""
+        if len(texts) < SPARSE_MIN_BATCH:
+            rows = [self._similarities_one(text) for text in texts]
+            return np.vstack(rows) if rows else np.zeros((0, len(self.languages)), dtype=np.float32)
+        return np.asarray(self.transform(texts) @ self.profiles.T)
+
+    def identify_batch(self, texts: Sequence[str]) -> List[LanguagePrediction]:
+        """Most likely language and its confidence for each text"""
+        similarities = self.similarities(texts)
+        if not len(similarities):
+            return []
+        scaled = similarities * TEMPERATURE
+        scaled -= scaled.max(axis=1, keepdims=True)
+        probabilities = np.exp(scaled)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        best = similarities.argmax(axis=1)
+        predictions = []
+        for row, index in enumerate(best):
+            if similarities[row, index] < MIN_SIMILARITY:
+                predictions.append(LanguagePrediction(DEFAULT_LANGUAGE, 0.0))
+            else:
+                predictions.append(LanguagePrediction(self.languages[index], round(float(probabilities[row, index]), 4)))
+        return predictions
+
+    def identify(self, text: str) -> LanguagePrediction:
+        return self.identify_batch([text])[0]
+
+    @classmethod
+    def from_samples(cls, samples: Dict[str, str], n_buckets: int = DEFAULT_BUCKETS) -> "LanguageIdentifier":
+        """Build one profile per language from its sample text"""
+        if n_buckets & (n_buckets - 1):
+            raise ValueError("n_buckets must be a power of two")
+        identifier = cls(list(samples), np.zeros((len(samples), n_buckets), dtype=np.float32))
+        identifier.profiles = identifier.transform(list(samples.values())).toarray()
+        return identifier
+
+    @classmethod
+    def from_file(cls, path: str = LANGUAGE_SAMPLES_PATH) -> "LanguageIdentifier":
+        with open(path, encoding="utf-8") as samples_file:
+            return cls.from_samples(json.load(samples_file))
+
+# Global identifier instance
+_language_identifier = None
+
+def get_language_identifier() -> LanguageIdentifier:
+    """Get or build the identifier from the bundled samples"""
+    global _language_identifier
+    if _language_identifier is None:
+        _language_identifier = LanguageIdentifier.from_file()
+    return _language_identifier
+
+def identify_language(text: str) -> LanguagePrediction:
+    return get_language_identifier().identify(text)
+
+def identify_languages(texts: Sequence[str]) -> List[LanguagePrediction]:
+    return get_language_identifier().identify_batch(texts)
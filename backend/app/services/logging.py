@@ -1,6 +1,5 @@
 import structlog
 import logging
-from elasticsearch import Elasticsearch
 from datetime import datetime
 import json
 import os
@@ -24,17 +23,29 @@ structlog.configure(
     cache_logger_on_first_use=True,
 )
 
-# Initialize Elasticsearch client
 ES_HOST = os.getenv("ELASTICSEARCH_HOST", "localhost:9200")
-try:
-    es_client = Elasticsearch([ES_HOST])
-except Exception:
-    es_client = None
 
 logger = structlog.get_logger()
 
+# Elasticsearch client, created on first log (the client library is slow to import)
+_es_client = None
+_es_client_loaded = False
+
+def get_es_client():
+    """Get or create the Elasticsearch client (None if it can't be created)"""
+    global _es_client, _es_client_loaded
+    if not _es_client_loaded:
+        try:
+            from elasticsearch import Elasticsearch
+            _es_client = Elasticsearch([ES_HOST])
+        except Exception:
+            _es_client = None
+        _es_client_loaded = True
+    return _es_client
+
 def log_to_elasticsearch(index: str, doc_type: str, body: dict):
     """Send log entry to Elasticsearch"""
+    es_client = get_es_client()
     if not es_client:
         return
     
@@ -42,6 +42,100 @@ DATABASE_CONNECTIONS = Gauge(
     'Number of active database connections'
 )
 
+DB_POOL_CHECKED_OUT = Gauge(
+    'therapybot_db_pool_checked_out',
+    'Connections currently checked out of the pool',
+    ['engine']
+)
+
+DB_POOL_IDLE = Gauge(
+    'therapybot_db_pool_idle',
+    'Open connections idle in the pool',
+    ['engine']
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'therapybot_db_pool_overflow',
+    'Connections open beyond pool_size',
+    ['engine']
+)
+
+DB_POOL_CAPACITY = Gauge(
+    'therapybot_db_pool_capacity',
+    'Most connections the pool will open (pool_size + max_overflow)',
+    ['engine']
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'therapybot_db_pool_checkout_wait_seconds',
+    'Time to get a connection from the pool, including opening a new one',
+    ['engine'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+DB_CONNECTION_AGE = Histogram(
+    'therapybot_db_connection_age_seconds',
+    'Age of connections when checked out',
+    ['engine'],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200, 14400, 86400)
+)
+
+DB_POOL_TIMEOUTS = Counter(
+    'therapybot_db_pool_timeouts_total',
+    'Checkouts that gave up after pool_timeout with every connection in use',
+    ['engine']
+)
+
+TRANSCRIPTIONS_TOTAL = Counter(
+    'therapybot_transcriptions_total',
+    'Total number of transcriptions served',
+    ['model_tier']
+)
+
+TRANSCRIPTION_DURATION = Histogram(
+    'therapybot_transcription_duration_seconds',
+    'Whisper transcription latency in seconds',
+    ['model_tier'],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+
+TRANSCRIPTION_REAL_TIME_FACTOR = Histogram(
+    'therapybot_transcription_real_time_factor',
+    'Transcription latency divided by audio duration',
+    ['model_tier'],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 4)
+)
+
+TRANSCRIPTION_QUEUE_DEPTH = Gauge(
+    'therapybot_transcription_queue_depth',
+    'Number of transcriptions currently in flight'
+)
+
+DB_READ_ROUTES = Counter(
+    'therapybot_db_read_routes_total',
+    'Read-only sessions by the engine they read from and why',
+    ['target', 'reason']
+)
+
+DB_REPLICA_LAG = Gauge(
+    'therapybot_db_replica_lag_seconds',
+    'Last measured replay lag of a read replica (+Inf when unreachable)',
+    ['engine']
+)
+
+PRINCIPAL_CACHE_LOOKUPS = Counter(
+    'therapybot_principal_cache_lookups_total',
+    'Authenticated principal lookups by outcome (local_hit, redis_hit, miss)',
+    ['result']
+)
+
+PRINCIPAL_CACHE_HIT_RATIO = Gauge(
+    'therapybot_principal_cache_hit_ratio',
+    'Share of principal lookups served without a database query (this process)'
+)
+
+_principal_lookups = {"hits": 0, "total": 0}
+
 def record_request(method: str, endpoint: str, status_code: int, duration: float):
     """Record HTTP request metrics"""
     REQUEST_COUNT.labels(method=method, endpoint=endpoint, status_code=status_code).inc()
@@ -60,6 +154,25 @@ def record_wellness_log():
     """Record wellness log metrics"""
     WELLNESS_LOGS_TOTAL.inc()
 
+def record_transcription(model_tier: str, duration: float, audio_seconds: float):
+    """Record transcription latency and real-time factor for a model tier"""
+    TRANSCRIPTIONS_TOTAL.labels(model_tier=model_tier).inc()
+    TRANSCRIPTION_DURATION.labels(model_tier=model_tier).observe(duration)
+    if audio_seconds > 0:
+        TRANSCRIPTION_REAL_TIME_FACTOR.labels(model_tier=model_tier).observe(duration / audio_seconds)
+
+def record_principal_lookup(result: str):
+    """Record a principal cache lookup and refresh the hit ratio"""
+    PRINCIPAL_CACHE_LOOKUPS.labels(result=result).inc()
+    _principal_lookups["total"] += 1
+    if result != "miss":
+        _principal_lookups["hits"] += 1
+    PRINCIPAL_CACHE_HIT_RATIO.set(_principal_lookups["hits"] / _principal_lookups["total"])
+
+def update_transcription_queue_depth(count: int):
+    """Update in-flight transcriptions gauge"""
+    TRANSCRIPTION_QUEUE_DEPTH.set(count)
+
 def update_active_sessions(count: int):
     """Update active sessions gauge"""
     ACTIVE_SESSIONS.set(count)
@@ -68,6 +181,42 @@ def update_database_connections(count: int):
     """Update database connections gauge"""
     DATABASE_CONNECTIONS.set(count)
 
+_watched_pools = {}
+
+def watch_pool(engine: str, get_pool, capacity: int):
+    """Export a connection pool's state, read from the pool at scrape time.
+
+    get_pool returns the engine's current pool (dispose() replaces it).
+    DATABASE_CONNECTIONS becomes the checked-out total over every watched pool.
+    """
+    _watched_pools[engine] = get_pool
+    DB_POOL_CHECKED_OUT.labels(engine=engine).set_function(lambda: get_pool().checkedout())
+    DB_POOL_IDLE.labels(engine=engine).set_function(lambda: get_pool().checkedin())
+    DB_POOL_OVERFLOW.labels(engine=engine).set_function(lambda: max(get_pool().overflow(), 0))
+    DB_POOL_CAPACITY.labels(engine=engine).set(capacity)
+    DATABASE_CONNECTIONS.set_function(lambda: sum(pool().checkedout() for pool in _watched_pools.values()))
+
+def record_pool_checkout(engine: str, wait: float):
+    """Record how long a checkout waited for a connection"""
+    DB_POOL_CHECKOUT_WAIT.labels(engine=engine).observe(wait)
+
+def record_connection_age(engine: str, age: float):
+    """Record the age of a connection handed out by the pool"""
+    DB_CONNECTION_AGE.labels(engine=engine).observe(age)
+
+def record_pool_timeout(engine: str, wait: float):
+    """Record a checkout that timed out waiting for a connection"""
+    DB_POOL_TIMEOUTS.labels(engine=engine).inc()
+    DB_POOL_CHECKOUT_WAIT.labels(engine=engine).observe(wait)
+
+def record_read_route(target: str, reason: str):
+    """Record where a read-only session was routed"""
+    DB_READ_ROUTES.labels(target=target, reason=reason).inc()
+
+def record_replica_lag(engine: str, lag: float):
+    """Update a replica's measured replay lag"""
+    DB_REPLICA_LAG.labels(engine=engine).set(lag)
+
 def get_metrics():
     """Get Prometheus metrics in text format"""
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
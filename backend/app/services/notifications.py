@@ -2,7 +2,6 @@ import smtplib
 import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from twilio.rest import Client
 
 def send_email(to_email: str, subject: str, body: str) -> bool:
     """Send email using SMTP"""
@@ -44,6 +43,7 @@ def send_sms(to_number: str, message: str) -> bool:
             print("Twilio credentials not configured")
             return False
         
+        from twilio.rest import Client
         client = Client(account_sid, auth_token)
         client.messages.create(
             body=message,
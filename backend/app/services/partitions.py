@@ -0,0 +1,158 @@
+"""Monthly range partitions of messages and audit_logs.
+
+Both tables are PARTITION BY RANGE on their timestamp (messages.created_at,
+audit_logs.timestamp) with one partition per calendar month (UTC), named
+<table>_pYYYYMM. There is no DEFAULT partition, so every insert needs its
+month to exist: ensure_partitions() creates the current month and the next
+PARTITION_MONTHS_AHEAD. It runs in the partitioning migration and daily from
+celery beat (ensure_partitions_task); API processes never run partition DDL,
+they only check at startup that this month's partitions exist
+(missing_partitions) and log an error when they don't.
+
+Queries that bound the key only touch the matching months (partition
+pruning): the analytics date ranges, the retention and cleanup statements, and
+a session's messages, which are bounded below by the session's start.
+
+Retention drops whole months instead of deleting rows: drop_partitions_before()
+detaches each partition that lies entirely before the cutoff and drops it,
+each in its own short transaction. Detaching needs a brief exclusive lock on
+the parent table, so it gives up after PARTITION_LOCK_TIMEOUT rather than
+queueing traffic behind it; the partition is picked up again on the next run.
+Rows in the month that straddles the cutoff are kept until the whole month has
+expired, i.e. data is removed at most a month after its retention period ends.
+
+Foreign keys can't reference a partitioned table's id alone, so rows that
+point at messages (consultant_interventions.message_id) are checked by a
+trigger on insert (see the partitioning migration) and deleted here, in the
+same transaction that drops the partition their message was in.
+"""
+
+import os
+import re
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {
+    "messages": "created_at",
+    "audit_logs": "timestamp",
+}
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+# Child tables of a partitioned table (resolved through the search_path)
+LIST_PARTITIONS_SQL = text("""
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = CAST(:table AS regclass)
+    ORDER BY child.relname
+""")
+
+# Rows that reference a partition's rows, deleted before it is dropped
+REFERENCING_ROWS_SQL = {
+    "messages": ["DELETE FROM consultant_interventions WHERE message_id IN (SELECT id FROM {partition})"],
+}
+
+# Planner row estimate, so dropping a partition doesn't have to read it
+ESTIMATED_ROWS_SQL = text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)")
+
+def month_start(moment: datetime) -> datetime:
+    """First instant (UTC) of the month containing moment"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+def partition_month(name: str) -> Optional[datetime]:
+    """The month a partition holds, from its name; None for other tables"""
+    match = _PARTITION_SUFFIX.search(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+def create_partition_sql(table: str, month: datetime) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+def list_partitions(connection, table: str) -> List[str]:
+    return list(connection.execute(LIST_PARTITIONS_SQL, {"table": table}).scalars())
+
+def ensure_partitions(
+    connection,
+    since: Optional[datetime] = None,
+    months_ahead: int = PARTITION_MONTHS_AHEAD
+) -> List[str]:
+    """Create the monthly partitions from since (default: this month) through
+    months_ahead months from now; returns the partitions it created"""
+    first = month_start(since or datetime.now(timezone.utc))
+    last = add_months(month_start(datetime.now(timezone.utc)), months_ahead)
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = set(list_partitions(connection, table))
+        month = first
+        while month <= last:
+            if partition_name(table, month) not in existing:
+                connection.execute(text(create_partition_sql(table, month)))
+                created.append(partition_name(table, month))
+            month = add_months(month, 1)
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    return created
+
+def missing_partitions(connection, moment: Optional[datetime] = None) -> List[str]:
+    """This month's partitions (or moment's month) that don't exist yet"""
+    month = month_start(moment or datetime.now(timezone.utc))
+    return [
+        partition_name(table, month) for table in PARTITIONED_TABLES
+        if partition_name(table, month) not in list_partitions(connection, table)
+    ]
+
+def expired_partitions(names: List[str], cutoff: datetime) -> List[str]:
+    """Partitions whose whole month is before cutoff, oldest first"""
+    cutoff = cutoff if cutoff.tzinfo else cutoff.replace(tzinfo=timezone.utc)
+    months = [(partition_month(name), name) for name in names]
+    return [name for month, name in sorted(months, key=lambda item: item[0] or cutoff)
+            if month is not None and add_months(month, 1) <= cutoff]
+
+def drop_partitions_before(engine, table: str, cutoff: datetime) -> List[Dict]:
+    """Detach and drop every partition of table entirely before cutoff;
+    returns [{"partition", "estimated_rows"}] for the ones dropped"""
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"{table} is not partitioned")
+    with engine.connect() as connection:
+        names = expired_partitions(list_partitions(connection, table), cutoff)
+
+    dropped = []
+    for name in names:
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+                rows = connection.execute(ESTIMATED_ROWS_SQL, {"name": name}).scalar() or 0
+                connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                for sql in REFERENCING_ROWS_SQL.get(table, []):
+                    connection.execute(text(sql.format(partition=name)))
+                connection.execute(text(f"DROP TABLE {name}"))
+        except OperationalError as e:
+            logger.warning(f"Could not drop partition {name}, will retry on the next run: {e}")
+            continue
+        logger.info(f"Dropped partition {name} (~{rows} rows)")
+        dropped.append({"partition": name, "estimated_rows": rows})
+    return dropped
@@ -0,0 +1,244 @@
+"""Cached principals for authentication.
+
+Access tokens carry the user id (and role), so resolving the caller of a
+request is a lookup by id. The authenticated principal (id, username, role,
+2FA flag) is cached in a short-TTL in-process LRU in front of Redis, so most
+requests need no auth-related database query at all; misses load the user
+and role in one joined query. Within a request FastAPI already reuses the
+dependency result, so require_role and get_current_user resolve it once.
+
+Anything that changes what a principal contains (role changes, deletion,
+2FA changes) must call invalidate_principal(), which drops the Redis entry
+and tells every process to drop its local copy over Redis pub/sub; if pub/sub
+is unavailable, local copies still expire within PRINCIPAL_CACHE_TTL_SECONDS.
+
+A request that misses the cache and loads the user can race an invalidation:
+if it writes its (now stale) principal back after the invalidation, the old
+role would be served for PRINCIPAL_REDIS_TTL_SECONDS. So invalidations also
+bump a per-user generation in Redis (and a per-process eviction count), the
+version seen before the load is passed to put(), and put() only writes the
+entry if neither has moved since; the Redis compare-and-set is a Lua script.
+The token's role claim is informational: authorization always uses the
+cached principal, so a role change applies before the token expires.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from ..models import User
+from ..redis_client import get_redis
+from .metrics import record_principal_lookup
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "15"))
+PRINCIPAL_REDIS_TTL_SECONDS = int(os.getenv("PRINCIPAL_REDIS_TTL_SECONDS", "300"))
+
+INVALIDATION_CHANNEL = "principal:invalidate"
+
+# KEYS: entry, generation; ARGV: principal json, ttl, generation seen before the load
+_PUT_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[3] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+@dataclass(frozen=True)
+class RoleRef:
+    name: str
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller; exposes the User fields routes read"""
+    id: uuid.UUID
+    username: str
+    role: RoleRef
+    is_2fa_enabled: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user.id, user.username, RoleRef(user.role.name), bool(user.is_2fa_enabled))
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "id": str(self.id),
+            "username": self.username,
+            "role": self.role.name,
+            "is_2fa_enabled": self.is_2fa_enabled
+        })
+
+    @classmethod
+    def from_json(cls, data) -> "Principal":
+        fields = json.loads(data)
+        return cls(uuid.UUID(fields["id"]), fields["username"], RoleRef(fields["role"]), fields["is_2fa_enabled"])
+
+def _redis_key(user_id) -> str:
+    return f"principal:{user_id}"
+
+def _generation_key(user_id) -> str:
+    return f"principal:generation:{user_id}"
+
+# (local eviction count, Redis generation or None if Redis was unavailable),
+# read before loading a principal and checked by put()
+Version = Tuple[int, Optional[bytes]]
+
+def _active_user(user_id: uuid.UUID):
+    return User.id == user_id, User.is_deleted.isnot(True)
+
+class PrincipalCache:
+    """In-process LRU (short TTL) in front of Redis (longer TTL)"""
+
+    def __init__(self, max_entries: int = PRINCIPAL_CACHE_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[uuid.UUID, Tuple[Principal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._listener = None
+
+    def _get_local(self, user_id: uuid.UUID) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def _put_local(self, principal: Principal, evictions: int):
+        with self._lock:
+            if self._evictions != evictions:
+                return
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict_local(self, user_id: uuid.UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._evictions += 1
+
+    def _ensure_listener(self):
+        """Subscribe to invalidations from other processes (once per process)"""
+        if self._listener is not None:
+            return
+        self._listener = False
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+            self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except Exception as e:
+            logger.warning(f"Principal invalidation listener unavailable: {e}")
+
+    def _on_invalidation(self, message):
+        try:
+            self.evict_local(uuid.UUID(message["data"].decode()))
+        except (ValueError, AttributeError):
+            pass
+
+    def lookup(self, user_id: uuid.UUID) -> Tuple[Optional[Principal], Version]:
+        """(cached principal (in-process, then Redis) or None, the version to
+        put() a principal loaded after a miss with)"""
+        self._ensure_listener()
+        evictions = self._evictions
+        principal = self._get_local(user_id)
+        if principal is not None:
+            record_principal_lookup("local_hit")
+            return principal, (evictions, None)
+
+        try:
+            cached, generation = get_redis().mget([_redis_key(user_id), _generation_key(user_id)])
+            generation = generation or b"0"
+        except Exception as e:
+            logger.warning(f"Principal cache unavailable: {e}")
+            cached, generation = None, None
+        if cached is None:
+            record_principal_lookup("miss")
+            return None, (evictions, generation)
+        record_principal_lookup("redis_hit")
+        principal = Principal.from_json(cached)
+        self._put_local(principal, evictions)
+        return principal, (evictions, generation)
+
+    def get(self, user_id: uuid.UUID, db: Session) -> Optional[Principal]:
+        """Principal for an active user id, or None if there is no such user"""
+        principal, version = self.lookup(user_id)
+        if principal is not None:
+            return principal
+        user = db.query(User).options(joinedload(User.role)).filter(*_active_user(user_id)).first()
+        return self._loaded(user, version)
+
+    async def get_async(self, user_id: uuid.UUID, db: AsyncSession) -> Optional[Principal]:
+        """get() for async routes; the (blocking) Redis calls run in the threadpool"""
+        principal, version = await run_in_threadpool(self.lookup, user_id)
+        if principal is not None:
+            return principal
+        result = await db.execute(select(User).options(joinedload(User.role)).where(*_active_user(user_id)))
+        return await run_in_threadpool(self._loaded, result.scalars().first(), version)
+
+    def _loaded(self, user: Optional[User], version: Version) -> Optional[Principal]:
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        self.put(principal, version)
+        return principal
+
+    def put(self, principal: Principal, version: Version):
+        """Cache a principal loaded from the database, unless it was
+        invalidated since version was read"""
+        evictions, generation = version
+        self._put_local(principal, evictions)
+        if generation is None:
+            return
+        try:
+            get_redis().eval(
+                _PUT_IF_CURRENT, 2, _redis_key(principal.id), _generation_key(principal.id),
+                principal.to_json(), PRINCIPAL_REDIS_TTL_SECONDS, generation
+            )
+        except Exception as e:
+            logger.warning(f"Principal cache unavailable: {e}")
+
+    def invalidate(self, user_id):
+        user_id = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+        self.evict_local(user_id)
+        try:
+            # The generation outlives any load that read the previous one
+            pipe = get_redis().pipeline()
+            pipe.incr(_generation_key(user_id))
+            pipe.expire(_generation_key(user_id), PRINCIPAL_REDIS_TTL_SECONDS)
+            pipe.delete(_redis_key(user_id))
+            pipe.publish(INVALIDATION_CHANNEL, str(user_id))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Principal cache invalidation for {user_id} only applied locally: {e}")
+
+# Global cache instance
+_principal_cache = None
+
+def get_principal_cache() -> PrincipalCache:
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
+
+def invalidate_principal(user_id):
+    """Call after changing a user's role, 2FA settings or deleting them"""
+    get_principal_cache().invalidate(user_id)
@@ -0,0 +1,252 @@
+"""Throttled, resumable re-encryption of stored PHI after a key change.
+
+After ENCRYPTION_KEY is rotated (the old key moved to ENCRYPTION_PREVIOUS_KEYS,
+so reads keep working through MultiFernet), or envelope encryption is turned
+on, this walks messages.content and wellness_logs.note in primary-key order
+(keyset pagination, so each batch is one short indexed query) and rewrites
+every value that needs_reencryption() under the current scheme: the owner's
+data key, or the current field key. Only legacy Fernet tokens are read, and
+each batch is written back as one executemany UPDATE in its own transaction.
+Data keys are re-wrapped under the current master key before any rows.
+Rows deleted by their user, and rows of deleted accounts, are skipped, and the
+worker never creates a data key: an owner without one may have been
+crypto-shredded, and minting a new key would make their content readable
+again. Such rows are counted as failed; a live user's legacy rows move once
+the user has a data key (created on their next write).
+With repack=True every encrypted value is read, and those whose payload isn't
+in the current compression format (see security/compression.py) are
+rewritten as well.
+
+The worker throttles itself by database load: the pause between batches
+doubles (up to REENCRYPT_MAX_PAUSE_SECONDS) while batches take longer than
+REENCRYPT_TARGET_BATCH_SECONDS or more than REENCRYPT_MAX_ACTIVE_CONNECTIONS
+Postgres backends are busy, and halves back towards
+REENCRYPT_MIN_PAUSE_SECONDS otherwise. Progress (table, cursor, counts,
+throughput, current pause) is kept in Redis under the run id, so an
+interrupted run picks up after the last committed batch.
+"""
+
+import os
+import time
+import uuid
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import select, update, text
+
+from ..db import SessionLocal
+from ..models import Message, User, WellnessLog
+from ..redis_client import get_redis
+from ..security.encryption import (
+    DecryptionError, ENVELOPE_ENCRYPTION, ENVELOPE_PREFIX, FERNET_TOKEN_PREFIX,
+    decrypt_data, encrypt_data, get_encryption_keys, key_fingerprint, needs_reencryption, needs_repacking
+)
+from ..security.compression import compression_enabled, get_codec
+from ..security.envelope import get_data_keyring
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("REENCRYPT_BATCH_SIZE", "500"))
+MIN_PAUSE_SECONDS = float(os.getenv("REENCRYPT_MIN_PAUSE_SECONDS", "0.05"))
+MAX_PAUSE_SECONDS = float(os.getenv("REENCRYPT_MAX_PAUSE_SECONDS", "10"))
+# Batches slower than this (reads plus write) are taken as a sign of database load
+TARGET_BATCH_SECONDS = float(os.getenv("REENCRYPT_TARGET_BATCH_SECONDS", "0.5"))
+MAX_ACTIVE_CONNECTIONS = int(os.getenv("REENCRYPT_MAX_ACTIVE_CONNECTIONS", "20"))
+
+# (table, model, encrypted column, owner column), in processing order
+TARGETS = [
+    ("messages", Message, "content", "sender_id"),
+    ("wellness_logs", WellnessLog, "note", "patient_id"),
+]
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+
+def _state_key(run_id: str) -> str:
+    return f"reencrypt:{run_id}"
+
+def default_run_id(repack: bool = False) -> str:
+    """One run per (current field key, scheme) pair, and compression format when repacking"""
+    scheme = "envelope" if ENVELOPE_ENCRYPTION else "field"
+    run_id = f"{key_fingerprint(get_encryption_keys()[0])}-{scheme}"
+    if repack:
+        codec = get_codec() if compression_enabled() else None
+        run_id += f"-zstd{codec.dict_id}" if codec else "-plain"
+    return run_id
+
+def get_progress(run_id: str) -> Optional[dict]:
+    """Stored progress of a re-encryption run"""
+    state = get_redis().hgetall(_state_key(run_id))
+    if not state:
+        return None
+    return {key.decode(): value.decode() for key, value in state.items()}
+
+def reencrypted_rows(rows, column: str, failed: List, repack: bool = False) -> List[dict]:
+    """UPDATE parameters re-encrypting the rows that need it (with repack, also
+    those not in the current compression format); ids of rows no configured
+    key can decrypt, or whose owner has no data key, are appended to failed"""
+    updates = []
+    for row in rows:
+        ciphertext = getattr(row, column)
+        try:
+            if not (needs_reencryption(ciphertext) or (repack and needs_repacking(ciphertext))):
+                continue
+            if ENVELOPE_ENCRYPTION and get_data_keyring().get_cipher(row.owner_id) is None:
+                # No key to move it under, and creating one could undo a crypto-shred
+                failed.append(row.id)
+                continue
+            plaintext = decrypt_data(ciphertext)
+        except DecryptionError:
+            failed.append(row.id)
+            continue
+        updates.append({"id": row.id, column: encrypt_data(plaintext, row.owner_id)})
+    return updates
+
+def next_pause(pause: float, batch_seconds: float, active_connections: Optional[int]) -> float:
+    """Back off multiplicatively under load, recover multiplicatively without it"""
+    overloaded = batch_seconds > TARGET_BATCH_SECONDS or (
+        active_connections is not None and active_connections > MAX_ACTIVE_CONNECTIONS
+    )
+    if overloaded:
+        return min(max(pause * 2, MIN_PAUSE_SECONDS), MAX_PAUSE_SECONDS)
+    return max(pause / 2, MIN_PAUSE_SECONDS)
+
+class Reencryption:
+    """One resumable re-encryption run over every encrypted column"""
+
+    def __init__(
+        self,
+        run_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        repack: bool = False,
+        session_factory=SessionLocal
+    ):
+        self.run_id = run_id or default_run_id(repack)
+        self.batch_size = batch_size or BATCH_SIZE
+        self.repack = repack
+        self.session_factory = session_factory
+
+    def _query(self, model, column: str, owner: str, cursor):
+        value = getattr(model, column)
+        owner_id = getattr(model, owner)
+        # Deleted rows and deleted accounts are left as they are (see module docstring)
+        query = select(model.id, value, owner_id.label("owner_id")).join(User, User.id == owner_id).where(
+            model.is_deleted.isnot(True),
+            User.is_deleted.isnot(True)
+        )
+        if self.repack:
+            # Any encrypted value may be in an old compression format
+            query = query.where(value.like(f"{FERNET_TOKEN_PREFIX}%") | value.like(f"{ENVELOPE_PREFIX}%"))
+        else:
+            query = query.where(value.like(f"{FERNET_TOKEN_PREFIX}%"))
+        if cursor is not None:
+            query = query.where(model.id > cursor)
+        return query.order_by(model.id).limit(self.batch_size)
+
+    def _active_connections(self, db) -> Optional[int]:
+        try:
+            return db.execute(text("SELECT count(*) FROM pg_stat_activity WHERE state = 'active'")).scalar()
+        except Exception as e:
+            db.rollback()
+            logger.debug(f"Database load unavailable: {e}")
+            return None
+
+    def _load_state(self) -> dict:
+        state = get_progress(self.run_id)
+        if state is None or state["status"] == STATUS_COMPLETED:
+            state = {
+                "run_id": self.run_id,
+                "status": STATUS_RUNNING,
+                "table": TARGETS[0][0],
+                "cursor": "",
+                "processed": 0,
+                "updated": 0,
+                "failed": 0,
+                "started_at": datetime.utcnow().isoformat()
+            }
+            get_redis().hset(_state_key(self.run_id), mapping=state)
+        else:
+            logger.info(f"Resuming re-encryption {self.run_id} in {state['table']} after {state['processed']} rows")
+        for field in ("processed", "updated", "failed"):
+            state[field] = int(state[field])
+        return state
+
+    def run(self, progress_callback: Optional[Callable[[dict], None]] = None) -> dict:
+        """Re-encrypt every stale value, returning the final progress state"""
+        rewrapped = get_data_keyring().rewrap_all()
+        if rewrapped:
+            logger.info(f"Re-wrapped {rewrapped} data keys before re-encrypting rows")
+
+        redis_client = get_redis()
+        state = self._load_state()
+        tables = [target[0] for target in TARGETS]
+        pause = MIN_PAUSE_SECONDS
+        started = time.monotonic()
+        processed_this_run = 0
+
+        db = self.session_factory()
+        try:
+            first = tables.index(state["table"])
+            for index in range(first, len(TARGETS)):
+                table, model, column, owner = TARGETS[index]
+                cursor = uuid.UUID(state["cursor"]) if index == first and state["cursor"] else None
+                while True:
+                    batch_started = time.monotonic()
+                    rows = db.execute(self._query(model, column, owner, cursor)).all()
+                    if not rows:
+                        db.commit()
+                        break
+
+                    failed = []
+                    updates = reencrypted_rows(rows, column, failed, self.repack)
+                    if updates:
+                        db.execute(update(model), updates)
+                    db.commit()
+                    batch_seconds = time.monotonic() - batch_started
+                    for row_id in failed:
+                        logger.error(
+                            f"Re-encryption: {table} row {row_id} is not decryptable with any configured key "
+                            f"or its owner has no data key"
+                        )
+
+                    cursor = rows[-1].id
+                    state["cursor"] = str(cursor)
+                    state["processed"] += len(rows)
+                    state["updated"] += len(updates)
+                    state["failed"] += len(failed)
+                    processed_this_run += len(rows)
+                    elapsed = time.monotonic() - started
+                    state["rows_per_second"] = round(processed_this_run / elapsed, 1) if elapsed else 0.0
+
+                    pause = next_pause(pause, batch_seconds, self._active_connections(db))
+                    state["pause_seconds"] = round(pause, 3)
+                    redis_client.hset(_state_key(self.run_id), mapping={
+                        "table": table,
+                        "cursor": state["cursor"],
+                        "processed": state["processed"],
+                        "updated": state["updated"],
+                        "failed": state["failed"],
+                        "rows_per_second": state["rows_per_second"],
+                        "pause_seconds": state["pause_seconds"]
+                    })
+                    logger.info(
+                        f"Re-encryption {self.run_id}: {table} {state['processed']} rows, {state['updated']} "
+                        f"re-encrypted, {state['failed']} failed, {state['rows_per_second']} rows/s, pause {pause:.2f}s"
+                    )
+                    if progress_callback:
+                        progress_callback(dict(state))
+                    time.sleep(pause)
+
+                if index + 1 < len(TARGETS):
+                    state["table"], state["cursor"] = TARGETS[index + 1][0], ""
+                    redis_client.hset(_state_key(self.run_id), mapping={"table": state["table"], "cursor": ""})
+
+            state["status"] = STATUS_COMPLETED
+            redis_client.hset(_state_key(self.run_id), mapping={
+                "status": STATUS_COMPLETED,
+                "completed_at": datetime.utcnow().isoformat()
+            })
+            return state
+        finally:
+            db.close()
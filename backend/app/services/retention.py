@@ -0,0 +1,84 @@
+"""Data retention policy, enforced daily by enforce_retention_policy_task.
+
+Messages and audit logs expire by dropping whole monthly partitions (see
+services/partitions.py). The rest are row deletes that stay small: wellness
+logs and messages users deleted, purged a retention period after deletion
+(partial indexes on deleted_at), and the escalation audit history, which is
+kept for less time than the rest of the audit log.
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from ..db import SessionLocal, engine
+from ..models import AuditLog, Message, WellnessLog
+from .audit import log_action
+from .partitions import drop_partitions_before
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS", "365"))
+WELLNESS_RETENTION_DAYS = int(os.getenv("WELLNESS_RETENTION_DAYS", "730"))
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "1095"))
+ESCALATION_AUDIT_RETENTION_DAYS = int(os.getenv("ESCALATION_AUDIT_RETENTION_DAYS", "180"))
+
+ESCALATION_AUDIT_ACTIONS = ["escalation_created", "escalation_viewed", "escalation_resolved"]
+
+def _cutoff(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+def drop_expired_messages(days: int = MESSAGE_RETENTION_DAYS):
+    return drop_partitions_before(engine, "messages", _cutoff(days))
+
+def drop_expired_audit_logs(days: int = AUDIT_RETENTION_DAYS):
+    return drop_partitions_before(engine, "audit_logs", _cutoff(days))
+
+def enforce_retention_policy() -> Dict[str, Any]:
+    """Remove data past its retention period"""
+    dropped_messages = drop_expired_messages()
+    dropped_audit_logs = drop_expired_audit_logs()
+
+    db = SessionLocal()
+    try:
+        purged_messages = db.query(Message).filter(
+            Message.is_deleted == True,
+            Message.deleted_at < _cutoff(MESSAGE_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+
+        purged_wellness = db.query(WellnessLog).filter(
+            WellnessLog.is_deleted == True,
+            WellnessLog.deleted_at < _cutoff(WELLNESS_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+
+        purged_escalations = db.query(AuditLog).filter(
+            AuditLog.action.in_(ESCALATION_AUDIT_ACTIONS),
+            AuditLog.timestamp < _cutoff(ESCALATION_AUDIT_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+
+        db.commit()
+
+        result = {
+            "message_partitions_dropped": [p["partition"] for p in dropped_messages],
+            "audit_log_partitions_dropped": [p["partition"] for p in dropped_audit_logs],
+            "messages_deleted": sum(p["estimated_rows"] for p in dropped_messages) + purged_messages,
+            "wellness_logs_deleted": purged_wellness,
+            "audit_logs_deleted": sum(p["estimated_rows"] for p in dropped_audit_logs),
+            "escalations_purged": purged_escalations
+        }
+        log_action(db, "automated_data_cleanup", None, {
+            **result,
+            "retention_policy": {
+                "messages_days": MESSAGE_RETENTION_DAYS,
+                "wellness_days": WELLNESS_RETENTION_DAYS,
+                "audit_days": AUDIT_RETENTION_DAYS,
+                "escalations_days": ESCALATION_AUDIT_RETENTION_DAYS
+            }
+        })
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
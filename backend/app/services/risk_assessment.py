@@ -1,48 +1,185 @@
+"""Keyword risk scoring.
+
+Keywords, their categories and weights come from a versioned JSON config
+(risk_keywords.json, or RISK_KEYWORDS_PATH) compiled once into a matcher.
+Matching is on whole words: a message is lower-cased and tokenized in one
+pass, keywords are found by one set intersection over its tokens, and
+phrases ("kill myself") are only checked when their first word occurs. The
+cost per message grows with its length, not with the number of keywords.
+Tokens are split on non-word characters, so "self-harm" matches "self harm"
+and "diet" no longer matches "die".
+
+Whole words don't catch inflections the way substring checks did, so a
+category can list variants of a keyword ("died", "dying" for "die";
+"hopelessness" for "hopeless"). Variants are matched as whole words too and
+count as their keyword: the tag is the keyword's, and a message with both
+only scores it once.
+
+When RISK_MODEL_PATH points to a trained hashed n-gram classifier (see
+risk_classifier.py), its probability is blended into the keyword score with
+weight RISK_MODEL_WEIGHT. The model can raise a score but never lowers the
+keyword evidence, flags a message by itself at RISK_MODEL_THRESHOLD, and
+critical keywords always escalate.
+"""
+
+import os
+import re
+import json
+import string
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RISK_KEYWORDS_PATH = os.getenv(
+    "RISK_KEYWORDS_PATH", os.path.join(os.path.dirname(__file__), "risk_keywords.json")
+)
+
+RISK_MODEL_PATH = os.getenv("RISK_MODEL_PATH", "")
+RISK_MODEL_WEIGHT = float(os.getenv("RISK_MODEL_WEIGHT", "0.5"))
+# A model probability at or above this flags the message on its own
+RISK_MODEL_THRESHOLD = float(os.getenv("RISK_MODEL_THRESHOLD", "0.8"))
+MODEL_TAG = "model:high_risk"
+
+_TOKEN = re.compile(r"\w+")
+_PUNCTUATION_TO_SPACE = str.maketrans({char: " " for char in string.punctuation})
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, split on whitespace and punctuation"""
+    lowered = text.lower()
+    if lowered.isascii():
+        # Same tokens as \w+ for ASCII text, without a per-character regex loop
+        return lowered.translate(_PUNCTUATION_TO_SPACE).split()
+    return _TOKEN.findall(lowered)
+
+class RiskScorer:
+    """Compiled keyword matcher and scorer for one keyword config version"""
+
+    def __init__(self, config: dict):
+        self.version = str(config["version"])
+        self.threshold = float(config.get("threshold", 0.5))
+
+        # keyword -> (category, weight, escalate, tagged), in config order
+        self._terms: Dict[str, Tuple[str, float, bool, bool]] = {}
+        self._rank: Dict[str, int] = {}
+        # keyword or variant -> keyword
+        self._keywords: Dict[str, str] = {}
+        self._first_words = set()
+        self._phrases: Dict[str, List[Tuple[str, str]]] = {}
+        for category, spec in config["categories"].items():
+            term = (category, float(spec["weight"]), bool(spec.get("escalate", False)), bool(spec.get("tagged", True)))
+            variants = spec.get("variants", {})
+            unknown = set(variants) - set(spec["keywords"])
+            if unknown:
+                raise ValueError(f"Risk keyword variants in '{category}' for unlisted keywords: {sorted(unknown)}")
+            for keyword in spec["keywords"]:
+                key = self._add_form(keyword, category, keyword=None)
+                self._terms[key] = term
+                self._rank[key] = len(self._rank)
+                for variant in variants.get(keyword, []):
+                    self._add_form(variant, category, keyword=key)
+
+    def _add_form(self, text: str, category: str, keyword: Optional[str]) -> str:
+        """Register a keyword (or a variant of keyword) for matching"""
+        tokens = tokenize(text)
+        if not tokens:
+            raise ValueError(f"Risk keyword {text!r} in '{category}' has no words")
+        key = " ".join(tokens)
+        if key in self._keywords:
+            raise ValueError(f"Risk keyword {text!r} is listed more than once")
+        self._keywords[key] = keyword or key
+        self._first_words.add(tokens[0])
+        if len(tokens) > 1:
+            # Bracketed by spaces so the containment check stays on word boundaries
+            self._phrases.setdefault(tokens[0], []).append((key, f" {key} "))
+        return key
+
+    @classmethod
+    def from_file(cls, path: str = RISK_KEYWORDS_PATH) -> "RiskScorer":
+        with open(path, encoding="utf-8") as config_file:
+            return cls(json.load(config_file))
+
+    def match(self, message: str) -> List[str]:
+        """Distinct keywords found in message (variants as their keyword), in config order"""
+        tokens = tokenize(message)
+        present = self._first_words.intersection(tokens)
+        found = {self._keywords[key] for key in present.intersection(self._keywords)}
+
+        phrase_starts = present.intersection(self._phrases)
+        if phrase_starts:
+            normalized = f" {' '.join(tokens)} "
+            for start in phrase_starts:
+                for key, bracketed in self._phrases[start]:
+                    if bracketed in normalized:
+                        found.add(self._keywords[key])
+
+        return sorted(found, key=self._rank.__getitem__)
+
+    def score(self, message: str, model_score: Optional[float] = None) -> dict:
+        """Keyword score for a message, blended with a classifier probability if given"""
+        found_tags = []
+        total_score = 0.0
+        escalate = False
+        for keyword in self.match(message):
+            category, weight, term_escalates, tagged = self._terms[keyword]
+            total_score += weight
+            escalate = escalate or term_escalates
+            if tagged:
+                found_tags.append(f"{category}:{keyword}")
+
+        total_score = min(total_score, 1.0)
+        if model_score is not None:
+            blended = (1.0 - RISK_MODEL_WEIGHT) * total_score + RISK_MODEL_WEIGHT * model_score
+            total_score = min(max(total_score, blended), 1.0)
+            if model_score >= RISK_MODEL_THRESHOLD:
+                escalate = True
+                found_tags.append(MODEL_TAG)
+
+        return {
+            "is_risky": total_score >= self.threshold or escalate,
+            "risk_score": round(total_score, 2),
+            "tags": found_tags,
+            "keyword_version": self.version,
+            "model_score": None if model_score is None else round(float(model_score), 3)
+        }
+
+# Global scorer instance
+_risk_scorer: Optional[RiskScorer] = None
+
+def get_risk_scorer() -> RiskScorer:
+    """Get or create the scorer for the configured keyword file"""
+    global _risk_scorer
+    if _risk_scorer is None:
+        _risk_scorer = RiskScorer.from_file()
+    return _risk_scorer
+
+# Global classifier instance (False once we know none is configured)
+_risk_classifier = None
+
+def get_risk_classifier():
+    """Get or load the configured risk classifier, or None if there isn't one"""
+    global _risk_classifier
+    if _risk_classifier is None:
+        if RISK_MODEL_PATH:
+            from .risk_classifier import HashedNgramClassifier
+            _risk_classifier = HashedNgramClassifier.load(RISK_MODEL_PATH)
+        else:
+            _risk_classifier = False
+    return _risk_classifier or None
+
 def detect_risk(message: str) -> dict:
-    """Enhanced risk detection with sentiment analysis and keyword detection"""
-    message_lower = message.lower()
-    
-    # Critical keywords that immediately escalate
-    critical_keywords = ["suicide", "kill myself", "end it all", "hurt myself", "overdose"]
-    high_risk_keywords = ["self harm", "cutting", "die", "death", "hopeless", "worthless"]
-    moderate_keywords = ["depressed", "anxious", "scared", "alone", "sad"]
-    
-    # Keyword detection
-    found_tags = []
-    keyword_score = 0.0
-    
-    for keyword in critical_keywords:
-        if keyword in message_lower:
-            found_tags.append(f"critical:{keyword}")
-            keyword_score += 1.0
-    
-    for keyword in high_risk_keywords:
-        if keyword in message_lower:
-            found_tags.append(f"high:{keyword}")
-            keyword_score += 0.7
-    
-    for keyword in moderate_keywords:
-        if keyword in message_lower:
-            found_tags.append(f"moderate:{keyword}")
-            keyword_score += 0.3
-    
-    # Simple sentiment analysis (mock VADER/TextBlob)
-    negative_words = ["bad", "terrible", "awful", "hate", "angry", "frustrated", "pain"]
-    sentiment_score = sum(0.2 for word in negative_words if word in message_lower)
-    
-    # Calculate total risk score
-    total_score = min(keyword_score + sentiment_score, 1.0)
-    
-    # Determine if risky (threshold: 0.5 or critical keywords)
-    is_risky = total_score >= 0.5 or any("critical:" in tag for tag in found_tags)
-    
-    return {
-        "is_risky": is_risky,
-        "risk_score": round(total_score, 2),
-        "tags": found_tags
-    }
+    """Enhanced risk detection with keyword detection and the optional classifier"""
+    return detect_risk_batch([message])[0]
+
+def detect_risk_batch(messages: Iterable[str]) -> List[dict]:
+    """Score many messages with the same compiled matcher; the classifier
+    scores the whole batch in one vectorized pass"""
+    messages = list(messages)
+    scorer = get_risk_scorer()
+    classifier = get_risk_classifier()
+    if classifier is None:
+        return [scorer.score(message) for message in messages]
+    model_scores = classifier.predict_proba(messages)
+    return [scorer.score(message, float(score)) for message, score in zip(messages, model_scores)]
 
 def assess_risk(message: str) -> bool:
     """Detect high-risk messages that need escalation"""
     risk_result = detect_risk(message)
-    return risk_result["is_risky"]
\ No newline at end of file
+    return risk_result["is_risky"]
@@ -0,0 +1,215 @@
+"""Resumable re-scoring of stored messages after the risk keyword config changes.
+
+Scored messages are streamed in primary-key order (keyset pagination, so each
+batch is one short indexed query no matter how far the run has got). Their
+content is decrypted and scored in a process pool while the next batch is
+being read, and only rows whose score, tags or escalation flag actually change
+are written back, as one executemany UPDATE per batch in its own transaction.
+Progress is kept in Redis under the run id (the keyword config version by
+default), so an interrupted run picks up after the last committed batch.
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import select, update, func
+
+from ..db import SessionLocal
+from ..models import Message
+from ..redis_client import get_redis
+from ..security.encryption import DecryptionError, decrypt_data
+from .risk_assessment import detect_risk_batch, get_risk_scorer
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("RISK_BACKFILL_BATCH_SIZE", "1000"))
+WORKERS = int(os.getenv("RISK_BACKFILL_WORKERS", str(os.cpu_count() or 1)))
+# Sleep between batches to leave database headroom for the API
+PAUSE_SECONDS = float(os.getenv("RISK_BACKFILL_PAUSE_SECONDS", "0"))
+# Rows per process pool task
+CHUNK_SIZE = 250
+
+# Set by the crisis check on the unsanitized text, which can't be re-run
+# from stored content
+PRESERVED_TAGS = {"crisis:immediate_intervention"}
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+
+def _state_key(run_id: str) -> str:
+    return f"risk_backfill:{run_id}"
+
+def get_progress(run_id: str) -> Optional[dict]:
+    """Stored progress of a backfill run"""
+    state = get_redis().hgetall(_state_key(run_id))
+    if not state:
+        return None
+    return {key.decode(): value.decode() for key, value in state.items()}
+
+def _decrypt_or_none(ciphertext: str) -> Optional[str]:
+    try:
+        return decrypt_data(ciphertext)
+    except DecryptionError:
+        return None
+
+def score_contents(ciphertexts: List[str]) -> List[Optional[dict]]:
+    """Decrypt and score a chunk of message contents (runs in pool workers).
+
+    Contents that can't be decrypted (or whose data key was shredded) get None
+    and keep their stored scores.
+    """
+    plaintexts = [_decrypt_or_none(ciphertext) for ciphertext in ciphertexts]
+    scores = iter(detect_risk_batch([text for text in plaintexts if text is not None]))
+    return [next(scores) if text is not None else None for text in plaintexts]
+
+def changed_rows(rows, results: List[dict]) -> List[dict]:
+    """UPDATE parameters for the rows whose stored risk fields differ from results"""
+    updates = []
+    for row, result in zip(rows, results):
+        if result is None:
+            continue
+        if row.risk_tags and PRESERVED_TAGS.intersection(row.risk_tags):
+            continue
+        if (
+            row.risk_score == result["risk_score"]
+            and (row.risk_tags or []) == result["tags"]
+            and bool(row.is_escalated) == result["is_risky"]
+        ):
+            continue
+        updates.append({
+            "id": row.id,
+            "risk_score": result["risk_score"],
+            "risk_tags": result["tags"],
+            "is_escalated": result["is_risky"]
+        })
+    return updates
+
+class RiskBackfill:
+    """One resumable re-scoring run over every previously scored message"""
+
+    def __init__(
+        self,
+        run_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        pause_seconds: Optional[float] = None,
+        session_factory=SessionLocal
+    ):
+        self.run_id = run_id or f"v{get_risk_scorer().version}"
+        self.batch_size = batch_size or BATCH_SIZE
+        self.workers = WORKERS if workers is None else workers
+        self.pause_seconds = PAUSE_SECONDS if pause_seconds is None else pause_seconds
+        self.session_factory = session_factory
+
+        if self.workers > 1 and multiprocessing.current_process().daemon:
+            # Daemonic processes (e.g. Celery prefork children) can't start a pool
+            logger.warning("Risk backfill running inside a daemon process; scoring in-process")
+            self.workers = 0
+
+    def _query(self, cursor):
+        query = select(
+            Message.id, Message.content, Message.risk_score, Message.risk_tags, Message.is_escalated
+        ).where(
+            Message.risk_score.isnot(None),
+            Message.content.isnot(None)
+        )
+        if cursor is not None:
+            query = query.where(Message.id > cursor)
+        return query.order_by(Message.id).limit(self.batch_size)
+
+    def _score(self, pool, rows):
+        contents = [row.content for row in rows]
+        if pool is None:
+            return score_contents(contents)
+        chunks = [contents[start:start + CHUNK_SIZE] for start in range(0, len(contents), CHUNK_SIZE)]
+        return pool.map(score_contents, chunks)
+
+    def _load_state(self, db) -> dict:
+        redis_client = get_redis()
+        state = get_progress(self.run_id)
+        if state is None or state["status"] == STATUS_COMPLETED:
+            total = db.execute(
+                select(func.count()).select_from(Message).where(Message.risk_score.isnot(None))
+            ).scalar()
+            state = {
+                "run_id": self.run_id,
+                "status": STATUS_RUNNING,
+                "cursor": "",
+                "total": total,
+                "processed": 0,
+                "updated": 0,
+                "started_at": datetime.utcnow().isoformat()
+            }
+            redis_client.hset(_state_key(self.run_id), mapping=state)
+        else:
+            logger.info(f"Resuming risk backfill {self.run_id} after {state['processed']} rows")
+        state["total"] = int(state["total"])
+        state["processed"] = int(state["processed"])
+        state["updated"] = int(state["updated"])
+        return state
+
+    def run(self, progress_callback: Optional[Callable[[dict], None]] = None) -> dict:
+        """Re-score every stored message, returning the final progress state"""
+        db = self.session_factory()
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        redis_client = get_redis()
+        try:
+            state = self._load_state(db)
+            cursor = state["cursor"] or None
+            started = time.monotonic()
+            processed_this_run = 0
+
+            rows = db.execute(self._query(cursor)).all()
+            db.commit()
+            pending = self._score(pool, rows) if rows else None
+
+            while rows:
+                # Read the next batch while the pool is still scoring this one
+                next_rows = db.execute(self._query(rows[-1].id)).all()
+                db.commit()
+
+                results = [result for chunk in pending for result in chunk] if pool else pending
+                updates = changed_rows(rows, results)
+                if updates:
+                    db.execute(update(Message), updates)
+                db.commit()
+
+                state["cursor"] = str(rows[-1].id)
+                state["processed"] += len(rows)
+                state["updated"] += len(updates)
+                processed_this_run += len(rows)
+                elapsed = time.monotonic() - started
+                state["rows_per_second"] = round(processed_this_run / elapsed, 1) if elapsed else 0.0
+                redis_client.hset(_state_key(self.run_id), mapping={
+                    "cursor": state["cursor"],
+                    "processed": state["processed"],
+                    "updated": state["updated"],
+                    "rows_per_second": state["rows_per_second"]
+                })
+                logger.info(
+                    f"Risk backfill {self.run_id}: {state['processed']}/{state['total']} rows, "
+                    f"{state['updated']} updated, {state['rows_per_second']} rows/s"
+                )
+                if progress_callback:
+                    progress_callback(dict(state))
+
+                rows = next_rows
+                pending = self._score(pool, rows) if rows else None
+                if rows and self.pause_seconds:
+                    time.sleep(self.pause_seconds)
+
+            state["status"] = STATUS_COMPLETED
+            redis_client.hset(_state_key(self.run_id), mapping={
+                "status": STATUS_COMPLETED,
+                "completed_at": datetime.utcnow().isoformat()
+            })
+            return state
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            db.close()
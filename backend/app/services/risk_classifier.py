@@ -0,0 +1,130 @@
+"""Hashed n-gram linear risk classifier.
+
+Messages are turned into sparse feature vectors by hashing their word 1..n-grams
+(CRC32, so feature ids are stable across processes) into a fixed number of
+buckets, with log-scaled counts and L2 normalization. A logistic-regression
+weight vector scores a whole batch with one sparse matrix-vector product.
+
+A model is two files sharing a path prefix: `<prefix>.npy` holds the float32
+weights (memory-mapped on load, so worker processes share the pages) and
+`<prefix>.json` holds the bias and featurization settings. Models are trained
+offline with benchmarks/eval_risk_classifier.py.
+"""
+
+import json
+import zlib
+from typing import List, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from .risk_assessment import tokenize
+
+DEFAULT_FEATURES = 2 ** 18
+DEFAULT_NGRAM_MAX = 2
+# Below this many messages, scoring one by one beats building a sparse matrix
+SPARSE_MIN_BATCH = 128
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-values))
+
+class HashedNgramClassifier:
+    """Logistic regression over hashed word n-grams"""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: float = 0.0,
+        ngram_max: int = DEFAULT_NGRAM_MAX,
+        version: str = "untrained"
+    ):
+        self.weights = weights
+        self.bias = float(bias)
+        self.n_features = len(weights)
+        self.ngram_max = ngram_max
+        self.version = version
+
+    def _feature_ids(self, text: str) -> List[int]:
+        tokens = tokenize(text)
+        ids = []
+        for size in range(1, self.ngram_max + 1):
+            for start in range(len(tokens) - size + 1):
+                gram = " ".join(tokens[start:start + size])
+                ids.append(zlib.crc32(gram.encode()) % self.n_features)
+        return ids
+
+    def transform(self, texts: Sequence[str]) -> sp.csr_matrix:
+        """Sparse (len(texts), n_features) feature matrix"""
+        indptr = [0]
+        indices: List[int] = []
+        for text in texts:
+            indices.extend(self._feature_ids(text))
+            indptr.append(len(indices))
+
+        counts = sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(texts), self.n_features)
+        )
+        counts.sum_duplicates()
+        np.log1p(counts.data, out=counts.data)
+
+        norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms, dtype=np.float32) @ counts)
+
+    def decision_function(self, features: sp.csr_matrix) -> np.ndarray:
+        return features @ self.weights + self.bias
+
+    def _decision_one(self, text: str) -> float:
+        ids = self._feature_ids(text)
+        if not ids:
+            return self.bias
+        unique_ids, counts = np.unique(np.asarray(ids, dtype=np.int64), return_counts=True)
+        values = np.log1p(counts.astype(np.float32))
+        return float(self.weights[unique_ids] @ values) / float(np.sqrt(values @ values)) + self.bias
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Probability that each message is risky"""
+        if len(texts) < SPARSE_MIN_BATCH:
+            decisions = np.array([self._decision_one(text) for text in texts], dtype=np.float64)
+        else:
+            decisions = self.decision_function(self.transform(texts))
+        return _sigmoid(decisions)
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[int],
+        n_features: int = DEFAULT_FEATURES,
+        ngram_max: int = DEFAULT_NGRAM_MAX,
+        epochs: int = 200,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4,
+        version: str = "untrained"
+    ) -> "HashedNgramClassifier":
+        """Fit by full-batch gradient descent on the regularized logistic loss"""
+        model = cls(np.zeros(n_features, dtype=np.float32), 0.0, ngram_max, version)
+        features = model.transform(texts)
+        targets = np.asarray(labels, dtype=np.float32)
+        transposed = features.T.tocsr()
+        count = len(targets)
+
+        for _ in range(epochs):
+            errors = _sigmoid(model.decision_function(features)) - targets
+            gradient = transposed @ errors / count + l2 * model.weights
+            model.weights -= (learning_rate * gradient).astype(np.float32)
+            model.bias -= learning_rate * float(errors.mean())
+        return model
+
+    def save(self, prefix: str):
+        np.save(f"{prefix}.npy", np.asarray(self.weights, dtype=np.float32))
+        with open(f"{prefix}.json", "w", encoding="utf-8") as meta_file:
+            json.dump({"version": self.version, "bias": self.bias, "ngram_max": self.ngram_max}, meta_file)
+
+    @classmethod
+    def load(cls, prefix: str) -> "HashedNgramClassifier":
+        with open(f"{prefix}.json", encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        weights = np.load(f"{prefix}.npy", mmap_mode="r")
+        return cls(weights, meta["bias"], meta["ngram_max"], str(meta["version"]))
@@ -0,0 +1,203 @@
+"""Asynchronous transcription jobs for long recordings.
+
+An upload is stored in Redis and handed to the Celery audio queue. A prepare
+task preprocesses it and splits it into ~30-second chunks at the quietest point
+near each boundary; chunk tasks transcribe in parallel across workers and
+record their text as they finish, so clients can poll (or stream) progress and
+the in-order partial transcript.
+
+The Whisper tier is chosen once per job, when it is split, from the backlog of
+the audio queue (the broker's list of waiting tasks, shared by every worker):
+per-process in-flight counts are always 0 in a prefork worker, and choosing per
+chunk would mix tiers within one transcript.
+"""
+
+import json
+import os
+import uuid
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..redis_client import get_redis
+from .audio_preprocessing import TARGET_SAMPLE_RATE, frame_energy_db
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL_SECONDS = int(os.getenv("TRANSCRIPTION_JOB_TTL_SECONDS", "86400"))
+JOB_MAX_DURATION_SECONDS = float(os.getenv("TRANSCRIPTION_JOB_MAX_DURATION_SECONDS", "3600"))
+# Uploads are held in Redis until they are split: roughly an hour of 16 kHz WAV
+JOB_MAX_UPLOAD_BYTES = int(os.getenv("TRANSCRIPTION_JOB_MAX_UPLOAD_BYTES", str(128 * 1024 * 1024)))
+CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "30"))
+CHUNK_SEARCH_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SEARCH_SECONDS", "2"))
+# Celery queue the chunk tasks run on; with the Redis broker it is a Redis list
+AUDIO_QUEUE = "audio"
+
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+FINAL_STATUSES = {STATUS_COMPLETED, STATUS_FAILED}
+
+def _job_key(job_id: str) -> str:
+    return f"voice_job:{job_id}"
+
+def _upload_key(job_id: str) -> str:
+    return f"voice_job:{job_id}:upload"
+
+def _chunk_key(job_id: str, index: int) -> str:
+    return f"voice_job:{job_id}:audio:{index}"
+
+def _results_key(job_id: str) -> str:
+    return f"voice_job:{job_id}:results"
+
+def events_channel(job_id: str) -> str:
+    return f"voice_job:{job_id}:events"
+
+def split_into_chunks(
+    samples: np.ndarray,
+    sample_rate: int = TARGET_SAMPLE_RATE,
+    chunk_seconds: float = CHUNK_SECONDS,
+    search_seconds: float = CHUNK_SEARCH_SECONDS
+) -> List[np.ndarray]:
+    """Split audio into ~chunk_seconds pieces, cutting at the quietest frame
+    within search_seconds of each nominal boundary so words aren't split"""
+    chunk_length = int(chunk_seconds * sample_rate)
+    if len(samples) <= chunk_length:
+        return [samples] if len(samples) else []
+
+    frame_ms = 20
+    frame_length = sample_rate * frame_ms // 1000
+    energy = frame_energy_db(samples, sample_rate, frame_ms)
+    search_frames = int(search_seconds * 1000 / frame_ms)
+
+    boundaries = [0]
+    while len(samples) - boundaries[-1] > chunk_length:
+        nominal = (boundaries[-1] + chunk_length) // frame_length
+        low = max(nominal - search_frames, boundaries[-1] // frame_length + 1)
+        high = min(nominal + 1, len(energy))
+        cut = low + int(np.argmin(energy[low:high])) if high > low else nominal
+        boundaries.append(cut * frame_length)
+    boundaries.append(len(samples))
+
+    return [samples[start:end] for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+def audio_backlog() -> Optional[int]:
+    """Tasks waiting in the audio queue, None if the broker can't be read"""
+    try:
+        return int(get_redis().llen(AUDIO_QUEUE))
+    except Exception as e:
+        logger.warning(f"Audio queue length unavailable: {e}")
+        return None
+
+def select_job_tier(pool) -> str:
+    """The Whisper tier for every chunk of a job being queued now"""
+    backlog = audio_backlog()
+    if backlog is None:
+        return pool.default_tier
+    return pool.select_tier(CHUNK_SECONDS, queue_depth=backlog)
+
+def assemble_transcript(chunk_texts: Dict[int, str], total_chunks: int) -> str:
+    """Join the in-order prefix of finished chunks"""
+    parts = []
+    for index in range(total_chunks):
+        if index not in chunk_texts:
+            break
+        parts.append(chunk_texts[index].strip())
+    return " ".join(part for part in parts if part)
+
+def _publish(job_id: str):
+    get_redis().publish(events_channel(job_id), "update")
+
+def create_job(user_id: str, audio_bytes: bytes, filename: Optional[str] = None) -> str:
+    """Store an upload and register a queued job, returning its id"""
+    job_id = str(uuid.uuid4())
+    redis_client = get_redis()
+    pipe = redis_client.pipeline()
+    pipe.hset(_job_key(job_id), mapping={
+        "user_id": user_id,
+        "filename": filename or "",
+        "status": STATUS_QUEUED,
+        "total_chunks": 0,
+        "completed_chunks": 0,
+        "audio_seconds": 0,
+        "error": "",
+        "created_at": datetime.utcnow().isoformat()
+    })
+    pipe.expire(_job_key(job_id), JOB_TTL_SECONDS)
+    pipe.set(_upload_key(job_id), audio_bytes, ex=JOB_TTL_SECONDS)
+    pipe.execute()
+    return job_id
+
+def load_upload(job_id: str) -> Optional[bytes]:
+    return get_redis().get(_upload_key(job_id))
+
+def store_chunks(job_id: str, chunks: List[np.ndarray], audio_seconds: float) -> int:
+    """Persist chunk audio (int16 PCM) and mark the job as processing"""
+    pipe = get_redis().pipeline()
+    for index, chunk in enumerate(chunks):
+        pcm = (np.clip(chunk, -1.0, 1.0) * 32767).astype("<i2")
+        pipe.set(_chunk_key(job_id, index), pcm.tobytes(), ex=JOB_TTL_SECONDS)
+    pipe.hset(_job_key(job_id), mapping={
+        "status": STATUS_PROCESSING,
+        "total_chunks": len(chunks),
+        "audio_seconds": round(audio_seconds, 2)
+    })
+    pipe.delete(_upload_key(job_id))
+    pipe.execute()
+    _publish(job_id)
+    return len(chunks)
+
+def load_chunk(job_id: str, index: int) -> Optional[np.ndarray]:
+    data = get_redis().get(_chunk_key(job_id, index))
+    if data is None:
+        return None
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+def record_chunk_result(job_id: str, index: int, text: str, model_tier: Optional[str] = None):
+    """Store a finished chunk's text and advance progress"""
+    pipe = get_redis().pipeline()
+    pipe.hset(_results_key(job_id), index, json.dumps({"text": text, "model_tier": model_tier}))
+    pipe.expire(_results_key(job_id), JOB_TTL_SECONDS)
+    pipe.hincrby(_job_key(job_id), "completed_chunks", 1)
+    pipe.delete(_chunk_key(job_id, index))
+    pipe.execute()
+    _publish(job_id)
+
+def complete_job(job_id: str):
+    get_redis().hset(_job_key(job_id), "status", STATUS_COMPLETED)
+    _publish(job_id)
+
+def fail_job(job_id: str, error: str):
+    get_redis().hset(_job_key(job_id), mapping={"status": STATUS_FAILED, "error": error})
+    _publish(job_id)
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Current job state including progress and the in-order partial transcript"""
+    redis_client = get_redis()
+    state = redis_client.hgetall(_job_key(job_id))
+    if not state:
+        return None
+    state = {key.decode(): value.decode() for key, value in state.items()}
+
+    chunk_texts = {
+        int(index): json.loads(value)["text"]
+        for index, value in redis_client.hgetall(_results_key(job_id)).items()
+    }
+    total_chunks = int(state["total_chunks"])
+    completed_chunks = int(state["completed_chunks"])
+
+    return {
+        "job_id": job_id,
+        "user_id": state["user_id"],
+        "status": state["status"],
+        "progress": round(completed_chunks / total_chunks, 3) if total_chunks else 0.0,
+        "completed_chunks": completed_chunks,
+        "total_chunks": total_chunks,
+        "audio_seconds": float(state["audio_seconds"]),
+        "transcript": assemble_transcript(chunk_texts, total_chunks),
+        "error": state["error"] or None,
+        "created_at": state["created_at"]
+    }
@@ -1,87 +1,292 @@
+"""Translation service layer.
+
+Translations go through a pluggable TranslationProvider ("local" phrasebook
+stand-in, or Google Cloud Translate) selected by TRANSLATION_PROVIDER. Results
+are cached per (provider, source, target, text hash) in an in-process LRU in
+front of Redis, and every batch sends only its cache misses to the provider,
+in as few calls as the provider's batch limit allows. Long texts such as AI
+replies can be translated sentence by sentence so recurring sentences
+(disclaimers, supportive notes) are served from the cache. The local provider
+detects languages with the char n-gram identifier in language_id.
+"""
+
 import os
-from typing import Optional
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
 
-def translate_text(text: str, target_lang: str, source_lang: str = None) -> str:
-    """Translate text using Google Translate API (stubbed)"""
-    try:
-        # TODO: Replace with actual Google Cloud Translate API
-        # from google.cloud import translate_v2 as translate
-        # translate_client = translate.Client()
-        # result = translate_client.translate(text, target_language=target_lang, source_language=source_lang)
-        # return result['translatedText']
-        
-        # Stub implementation with common translations
-        translations = {
-            'es': {
-                'hello': 'hola',
-                'help': 'ayuda',
-                'thank you': 'gracias',
-                'how are you': 'como estas',
-                'i need help': 'necesito ayuda',
-                'i feel sad': 'me siento triste',
-                'goodbye': 'adios'
-            },
-            'fr': {
-                'hello': 'bonjour',
-                'help': 'aide',
-                'thank you': 'merci',
-                'how are you': 'comment allez-vous',
-                'i need help': "j'ai besoin d'aide",
-                'i feel sad': 'je me sens triste',
-                'goodbye': 'au revoir'
-            },
-            'de': {
-                'hello': 'hallo',
-                'help': 'hilfe',
-                'thank you': 'danke',
-                'how are you': 'wie geht es dir',
-                'i need help': 'ich brauche hilfe',
-                'i feel sad': 'ich fühle mich traurig',
-                'goodbye': 'auf wiedersehen'
+from ..redis_client import get_redis
+from .language_id import LanguagePrediction, identify_languages
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_PROVIDER = os.getenv("TRANSLATION_PROVIDER", "local")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_CACHE_TTL_SECONDS = int(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Source language key for requests that rely on detection
+AUTO_SOURCE = "auto"
+
+# Sentence ends, keeping the punctuation with the sentence and the whitespace as a separator
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+PHRASEBOOK = {
+    'es': {
+        'hello': 'hola',
+        'help': 'ayuda',
+        'thank you': 'gracias',
+        'how are you': 'como estas',
+        'i need help': 'necesito ayuda',
+        'i feel sad': 'me siento triste',
+        'goodbye': 'adios'
+    },
+    'fr': {
+        'hello': 'bonjour',
+        'help': 'aide',
+        'thank you': 'merci',
+        'how are you': 'comment allez-vous',
+        'i need help': "j'ai besoin d'aide",
+        'i feel sad': 'je me sens triste',
+        'goodbye': 'au revoir'
+    },
+    'de': {
+        'hello': 'hallo',
+        'help': 'hilfe',
+        'thank you': 'danke',
+        'how are you': 'wie geht es dir',
+        'i need help': 'ich brauche hilfe',
+        'i feel sad': 'ich fühle mich traurig',
+        'goodbye': 'auf wiedersehen'
+    }
+}
+
+@dataclass
+class TranslationResult:
+    text: str
+    translated_text: str
+    source_language: str
+    target_language: str
+
+class TranslationProvider:
+    """Translates batches of texts; subclasses implement translate_batch"""
+
+    name = "base"
+    # Most texts to send in one call
+    max_batch_size = 128
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[dict]:
+        """One {"translated_text", "source_language"} dict per text, in order"""
+        raise NotImplementedError
+
+    def detect_languages(self, texts: List[str]) -> List[LanguagePrediction]:
+        """One prediction (language and confidence) per text, in order"""
+        raise NotImplementedError
+
+    def detect_language(self, text: str) -> str:
+        return self.detect_languages([text])[0].language
+
+class LocalTranslationProvider(TranslationProvider):
+    """Phrasebook stand-in used in development and tests"""
+
+    name = "local"
+    max_batch_size = 1000
+
+    def detect_languages(self, texts: List[str]) -> List[LanguagePrediction]:
+        # Char n-gram profiles, cheap enough to run inline
+        return identify_languages(texts)
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[dict]:
+        phrases = PHRASEBOOK.get(target_lang, {})
+        detected = [prediction.language for prediction in self.detect_languages(texts)] if source_lang is None else None
+        results = []
+        for index, text in enumerate(texts):
+            text_lower = text.lower().strip()
+            if text_lower in phrases:
+                translated = phrases[text_lower]
+            else:
+                # Return original text with language indicator if no translation found
+                translated = f"[{target_lang.upper()}] {text}"
+            results.append({
+                "translated_text": translated,
+                "source_language": source_lang or detected[index]
+            })
+        return results
+
+class GoogleTranslationProvider(TranslationProvider):
+    """Google Cloud Translate (v2 API); many texts per request"""
+
+    name = "google"
+    max_batch_size = 128
+
+    def __init__(self):
+        from google.cloud import translate_v2 as translate
+        self._client = translate.Client()
+
+    def detect_languages(self, texts: List[str]) -> List[LanguagePrediction]:
+        response = self._client.detect_language(texts)
+        return [LanguagePrediction(item["language"], float(item.get("confidence", 0.0))) for item in response]
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[dict]:
+        response = self._client.translate(
+            texts, target_language=target_lang, source_language=source_lang, format_="text"
+        )
+        return [
+            {
+                "translated_text": item["translatedText"],
+                "source_language": source_lang or item.get("detectedSourceLanguage", "en")
             }
-        }
-        
-        # Simple stub translation
-        text_lower = text.lower().strip()
-        if target_lang in translations and text_lower in translations[target_lang]:
-            return translations[target_lang][text_lower]
-        
-        # Return original text with language indicator if no translation found
-        return f"[{target_lang.upper()}] {text}"
-        
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return text
+            for item in response
+        ]
+
+PROVIDERS = {
+    "local": LocalTranslationProvider,
+    "google": GoogleTranslationProvider,
+}
+
+class TranslationCache:
+    """In-process LRU in front of a shared Redis cache"""
+
+    def __init__(self, namespace: str, max_entries: int = TRANSLATION_CACHE_SIZE, ttl_seconds: int = TRANSLATION_CACHE_TTL_SECONDS):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text: str, source_lang: str, target_lang: str) -> str:
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        return f"translation:{self.namespace}:{source_lang}:{target_lang}:{digest}"
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, dict]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            try:
+                values = get_redis().mget(missing)
+            except Exception as e:
+                logger.warning(f"Translation cache unavailable: {e}")
+                return found
+            remote = {key: json.loads(value) for key, value in zip(missing, values) if value is not None}
+            self._remember(remote)
+            found.update(remote)
+        return found
+
+    def set_many(self, entries: Dict[str, dict]):
+        if not entries:
+            return
+        self._remember(entries)
+        try:
+            pipe = get_redis().pipeline()
+            for key, value in entries.items():
+                pipe.set(key, json.dumps(value), ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Translation cache unavailable: {e}")
+
+    def _remember(self, entries: Dict[str, dict]):
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class TranslationService:
+    """Cached, batched translation through one provider"""
+
+    def __init__(self, provider: TranslationProvider, cache: Optional[TranslationCache] = None):
+        self.provider = provider
+        self.cache = cache or TranslationCache(provider.name)
+
+    def translate_batch(
+        self, texts: Sequence[str], target_lang: str, source_lang: Optional[str] = None
+    ) -> List[TranslationResult]:
+        """Translate texts, calling the provider once per chunk of distinct cache misses"""
+        source_key = source_lang or AUTO_SOURCE
+        keys = [self.cache.key(text, source_key, target_lang) for text in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        misses = list(dict.fromkeys(
+            text for text, key in zip(texts, keys) if key not in cached and text.strip()
+        ))
+        fresh = {}
+        for start in range(0, len(misses), self.provider.max_batch_size):
+            chunk = misses[start:start + self.provider.max_batch_size]
+            try:
+                translated = self.provider.translate_batch(chunk, target_lang, source_lang)
+            except Exception as e:
+                logger.error(f"Translation error ({self.provider.name}): {e}")
+                continue
+            for text, result in zip(chunk, translated):
+                fresh[self.cache.key(text, source_key, target_lang)] = result
+        self.cache.set_many(fresh)
+        cached.update(fresh)
+
+        results = []
+        for text, key in zip(texts, keys):
+            # Untranslatable (blank) or failed texts come back unchanged
+            result = cached.get(key) or {"translated_text": text, "source_language": source_lang or "en"}
+            results.append(TranslationResult(text, result["translated_text"], result["source_language"], target_lang))
+        return results
+
+    def translate(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> TranslationResult:
+        return self.translate_batch([text], target_lang, source_lang)[0]
+
+    def translate_sentences(self, text: str, target_lang: str, source_lang: Optional[str] = None) -> str:
+        """Translate a longer text sentence by sentence, keeping its separators,
+        so sentences seen before are served from the cache"""
+        parts = _SENTENCE_BOUNDARY.split(text)
+        separators = _SENTENCE_BOUNDARY.findall(text)
+        sentences = [part for part in parts if part.strip()]
+        translated = iter(self.translate_batch(sentences, target_lang, source_lang))
+
+        pieces = []
+        for index, part in enumerate(parts):
+            pieces.append(next(translated).translated_text if part.strip() else part)
+            if index < len(separators):
+                pieces.append(separators[index])
+        return "".join(pieces)
+
+# Global service instance
+_translation_service = None
+
+def get_translation_service() -> TranslationService:
+    """Get or create the service for the configured provider"""
+    global _translation_service
+    if _translation_service is None:
+        provider_class = PROVIDERS.get(TRANSLATION_PROVIDER)
+        if provider_class is None:
+            raise ValueError(f"Unknown translation provider '{TRANSLATION_PROVIDER}'")
+        _translation_service = TranslationService(provider_class())
+    return _translation_service
+
+def translate_text(text: str, target_lang: str, source_lang: str = None) -> str:
+    """Translate text with the configured provider (cached)"""
+    return get_translation_service().translate(text, target_lang, source_lang).translated_text
 
 def detect_language(text: str) -> str:
-    """Detect language of text (stubbed)"""
+    """Detect language of text"""
     try:
-        # TODO: Replace with actual Google Cloud Translate API
-        # from google.cloud import translate_v2 as translate
-        # translate_client = translate.Client()
-        # result = translate_client.detect_language(text)
-        # return result['language']
-        
-        # Simple stub detection based on common words
-        text_lower = text.lower()
-        
-        spanish_words = ['hola', 'gracias', 'ayuda', 'necesito', 'siento', 'triste']
-        french_words = ['bonjour', 'merci', 'aide', 'besoin', 'sens', 'triste']
-        german_words = ['hallo', 'danke', 'hilfe', 'brauche', 'fühle', 'traurig']
-        
-        if any(word in text_lower for word in spanish_words):
-            return 'es'
-        elif any(word in text_lower for word in french_words):
-            return 'fr'
-        elif any(word in text_lower for word in german_words):
-            return 'de'
-        
-        return 'en'  # Default to English
-        
+        return get_translation_service().provider.detect_language(text)
     except Exception as e:
-        print(f"Language detection error: {e}")
+        logger.error(f"Language detection error: {e}")
         return 'en'
 
+def detect_languages(texts: Sequence[str]) -> List[LanguagePrediction]:
+    """Detect the language of many texts, with a confidence for each"""
+    return get_translation_service().provider.detect_languages(list(texts))
+
 def get_supported_languages() -> dict:
     """Get list of supported languages"""
     return {
@@ -95,4 +300,4 @@ def get_supported_languages() -> dict:
         'ja': 'Japanese',
         'ko': 'Korean',
         'zh': 'Chinese'
-    }
\ No newline at end of file
+    }
@@ -1,5 +1,4 @@
 import pyotp
-import qrcode
 import io
 import base64
 from ..models import User
@@ -10,6 +9,9 @@ def generate_totp_secret() -> str:
 
 def generate_qr_code(user: User, secret: str) -> str:
     """Generate QR code for TOTP setup"""
+    # Only needed when enabling 2FA, and slow to import (pulls in PIL)
+    import qrcode
+    
     totp_uri = pyotp.totp.TOTP(secret).provisioning_uri(
         name=user.email,
         issuer_name="TherapyBot"
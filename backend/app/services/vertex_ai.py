@@ -1,15 +1,20 @@
 import os
 import logging
+from importlib.util import find_spec
 from typing import Optional
 
-try:
-    import vertexai
-    from vertexai.generative_models import GenerativeModel, GenerationConfig
-    VERTEX_AI_AVAILABLE = True
-except ImportError:
-    VERTEX_AI_AVAILABLE = False
-    GenerativeModel = None
-    GenerationConfig = None
+# The SDK takes seconds to import, so it's only imported when a client is set up
+VERTEX_AI_AVAILABLE = find_spec("vertexai") is not None
+vertexai = None
+GenerativeModel = None
+GenerationConfig = None
+
+def _load_sdk():
+    global vertexai, GenerativeModel, GenerationConfig
+    if GenerativeModel is None:
+        import vertexai as sdk
+        from vertexai.generative_models import GenerativeModel as model_class, GenerationConfig as config_class
+        vertexai, GenerativeModel, GenerationConfig = sdk, model_class, config_class
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +48,7 @@ class VertexAIClient:
                 logger.info(f"Using credentials from: {credentials_path}")
             
             # Initialize Vertex AI
+            _load_sdk()
             vertexai.init(project=self.project_id, location=self.region)
             
             # Initialize the generative model
@@ -1,33 +1,56 @@
 # backend/app/services/voice.py
 
-import whisper
-import pyttsx3
 import tempfile
 import os
 import io
+import time
+import logging
 from fastapi import UploadFile
+from .audio_preprocessing import preprocess_audio, PreprocessedAudio
+from .whisper_models import get_model_pool
+from .metrics import record_transcription
 
-# Load the "base" Whisper model.
-model = whisper.load_model("base")
+logger = logging.getLogger(__name__)
+
+# Tiers load on first use; audio workers preload the default one (WHISPER_PRELOAD)
+model_pool = get_model_pool()
+
+def transcribe_samples(audio: PreprocessedAudio, model_tier: str = None) -> dict:
+    """Transcribe preprocessed audio with a load-adaptive Whisper tier"""
+    # Nothing but silence - skip Whisper entirely
+    if audio.is_silent:
+        return {"text": "", "model_tier": None, "latency": 0.0, "real_time_factor": 0.0}
+
+    tier = model_tier or model_pool.select_tier(audio.duration)
+    with model_pool.track():
+        start = time.perf_counter()
+        result = model_pool.get_model(tier).transcribe(audio.samples)
+        latency = time.perf_counter() - start
+
+    record_transcription(tier, latency, audio.duration)
+    real_time_factor = latency / audio.duration
+    logger.info(f"Transcribed {audio.duration:.1f}s with Whisper '{tier}' in {latency:.2f}s (RTF {real_time_factor:.2f})")
+
+    return {
+        "text": result["text"],
+        "model_tier": tier,
+        "latency": latency,
+        "real_time_factor": real_time_factor
+    }
+
+def transcribe_upload(file: UploadFile) -> dict:
+    """Preprocess and transcribe an uploaded audio file, returning text and tier details"""
+    file.file.seek(0)
+    return transcribe_samples(preprocess_audio(file.file.read()))
 
 def transcribe_audio(file: UploadFile) -> str:
     """Transcribe audio to text using local Whisper model"""
-    temp_audio_file_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as temp_audio_file:
-            content = file.file.read()
-            temp_audio_file.write(content)
-            temp_audio_file_path = temp_audio_file.name
-
-        result = model.transcribe(temp_audio_file_path)
-        return result["text"]
-    finally:
-        if temp_audio_file_path and os.path.exists(temp_audio_file_path):
-            os.remove(temp_audio_file_path)
+    return transcribe_upload(file)["text"]
 
 def synthesize_speech(text: str) -> bytes:
     """Convert text to speech using local pyttsx3 and return audio bytes"""
     try:
+        import pyttsx3
         engine = pyttsx3.init()
         with tempfile.NamedTemporaryFile(delete=True, suffix=".mp3") as temp_audio_file:
             temp_path = temp_audio_file.name
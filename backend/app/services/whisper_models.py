@@ -0,0 +1,118 @@
+"""Whisper model tiers and load-adaptive tier selection.
+
+Several Whisper sizes can be loaded side by side. Each transcription picks a
+tier from the current number of in-flight transcriptions and the clip length:
+under pressure (or for very long clips) we degrade to the fastest tier, and
+when the worker is idle short clips are upgraded to the most accurate one.
+Chunked transcription jobs pass the audio queue backlog instead (see
+transcription_jobs.select_job_tier), since in-flight counts are per process.
+"""
+
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from .metrics import update_transcription_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# Ordered fastest -> most accurate
+KNOWN_TIERS = ["tiny", "base", "small", "medium", "large"]
+
+WHISPER_MODEL_TIERS = [
+    tier.strip() for tier in os.getenv("WHISPER_MODEL_TIERS", "tiny,base,small").split(",") if tier.strip()
+]
+WHISPER_DEFAULT_TIER = os.getenv("WHISPER_DEFAULT_TIER", "base")
+# Load the default tier when a worker process starts rather than on its first clip
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "false").lower() == "true"
+
+# Selection thresholds
+PRESSURE_QUEUE_DEPTH = int(os.getenv("WHISPER_PRESSURE_QUEUE_DEPTH", "4"))
+IDLE_QUEUE_DEPTH = int(os.getenv("WHISPER_IDLE_QUEUE_DEPTH", "0"))
+LONG_CLIP_SECONDS = float(os.getenv("WHISPER_LONG_CLIP_SECONDS", "120"))
+SHORT_CLIP_SECONDS = float(os.getenv("WHISPER_SHORT_CLIP_SECONDS", "30"))
+
+def _ordered_tiers(tiers):
+    unknown = [tier for tier in tiers if tier not in KNOWN_TIERS]
+    if unknown:
+        raise ValueError(f"Unknown Whisper model tier(s): {', '.join(unknown)}")
+    return sorted(set(tiers), key=KNOWN_TIERS.index)
+
+class WhisperModelPool:
+    """Lazily loaded Whisper models keyed by tier, plus in-flight tracking"""
+
+    def __init__(self, tiers=None, default_tier: str = None):
+        self.tiers = _ordered_tiers(tiers or WHISPER_MODEL_TIERS)
+        default_tier = default_tier or WHISPER_DEFAULT_TIER
+        self.default_tier = default_tier if default_tier in self.tiers else self.tiers[len(self.tiers) // 2]
+        self._models = {}
+        self._load_lock = threading.Lock()
+        self._depth_lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Transcriptions currently running or waiting in this process"""
+        return self._in_flight
+
+    @property
+    def fastest_tier(self) -> str:
+        return self.tiers[0]
+
+    @property
+    def best_tier(self) -> str:
+        return self.tiers[-1]
+
+    def select_tier(self, audio_seconds: float, queue_depth: int = None) -> str:
+        """Pick a tier for a clip given the current load"""
+        depth = self.queue_depth if queue_depth is None else queue_depth
+
+        if depth >= PRESSURE_QUEUE_DEPTH or audio_seconds > LONG_CLIP_SECONDS:
+            return self.fastest_tier
+        if depth <= IDLE_QUEUE_DEPTH and audio_seconds <= SHORT_CLIP_SECONDS:
+            return self.best_tier
+        return self.default_tier
+
+    def get_model(self, tier: str):
+        """Return the loaded model for a tier, loading it on first use"""
+        if tier not in self.tiers:
+            raise ValueError(f"Whisper tier '{tier}' is not enabled")
+
+        model = self._models.get(tier)
+        if model is None:
+            with self._load_lock:
+                model = self._models.get(tier)
+                if model is None:
+                    import whisper
+                    logger.info(f"Loading Whisper '{tier}' model")
+                    model = whisper.load_model(tier)
+                    self._models[tier] = model
+        return model
+
+    def preload(self, tiers=None):
+        """Load models up front so the first requests don't pay for it"""
+        for tier in tiers or self.tiers:
+            self.get_model(tier)
+
+    @contextmanager
+    def track(self):
+        """Count a transcription as in flight for the duration of the block"""
+        with self._depth_lock:
+            self._in_flight += 1
+            update_transcription_queue_depth(self._in_flight)
+        try:
+            yield
+        finally:
+            with self._depth_lock:
+                self._in_flight -= 1
+                update_transcription_queue_depth(self._in_flight)
+
+# Global pool instance
+_model_pool = None
+
+def get_model_pool() -> WhisperModelPool:
+    """Get or create the process-wide Whisper model pool"""
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = WhisperModelPool()
+    return _model_pool
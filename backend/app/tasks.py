@@ -1,5 +1,7 @@
+from celery import chord
 from .celery_app import celery_app
 from .services.notifications import send_email, send_sms
+from .services import transcription_jobs
 import logging
 
 logger = logging.getLogger(__name__)
@@ -69,4 +71,142 @@ def escalate_case_task(user_id: str, message_content: str, risk_score: float):
         
     except Exception as e:
         logger.error(f"Escalation task error: {e}")
-        return {"status": "error", "error": str(e)}
\ No newline at end of file
+        return {"status": "error", "error": str(e)}
+
+@celery_app.task
+def prepare_transcription_job_task(job_id: str):
+    """Preprocess an uploaded recording, split it into chunks and fan out transcription"""
+    from .services.audio_preprocessing import preprocess_audio
+    from .services.whisper_models import get_model_pool
+
+    try:
+        audio_bytes = transcription_jobs.load_upload(job_id)
+        if audio_bytes is None:
+            raise ValueError("Upload expired or missing")
+
+        audio = preprocess_audio(audio_bytes, max_seconds=transcription_jobs.JOB_MAX_DURATION_SECONDS)
+        chunks = transcription_jobs.split_into_chunks(audio.samples, audio.sample_rate)
+        total = transcription_jobs.store_chunks(job_id, chunks, audio.duration)
+
+        if total == 0:
+            transcription_jobs.complete_job(job_id)
+            return {"status": "completed", "job_id": job_id, "chunks": 0}
+
+        # Chunks of one recording are transcribed in parallel across audio workers,
+        # all with the tier chosen for the job
+        model_tier = transcription_jobs.select_job_tier(get_model_pool())
+        chord(
+            [transcribe_chunk_task.s(job_id, index, model_tier) for index in range(total)]
+        )(finalize_transcription_job_task.s(job_id))
+
+        logger.info(
+            f"Transcription job {job_id}: {audio.duration:.1f}s split into {total} chunks, Whisper '{model_tier}'"
+        )
+        return {"status": "processing", "job_id": job_id, "chunks": total}
+
+    except Exception as e:
+        logger.error(f"Transcription job {job_id} preparation error: {e}")
+        transcription_jobs.fail_job(job_id, str(e))
+        return {"status": "error", "error": str(e)}
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=5)
+def transcribe_chunk_task(self, job_id: str, index: int, model_tier: str = None):
+    """Transcribe one chunk of a transcription job with the job's Whisper tier"""
+    from .services.audio_preprocessing import PreprocessedAudio, TARGET_SAMPLE_RATE
+    from .services.voice import transcribe_samples
+
+    samples = transcription_jobs.load_chunk(job_id, index)
+    if samples is None:
+        # Already transcribed by an earlier attempt, or the job expired
+        return {"job_id": job_id, "index": index, "status": "skipped"}
+
+    try:
+        audio = PreprocessedAudio(
+            samples=samples,
+            sample_rate=TARGET_SAMPLE_RATE,
+            original_duration=len(samples) / TARGET_SAMPLE_RATE,
+            trimmed_seconds=0.0,
+            capped_seconds=0.0
+        )
+        result = transcribe_samples(audio, model_tier)
+    except Exception as e:
+        logger.error(f"Transcription job {job_id} chunk {index} error: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        # Return instead of raising so the chord still reaches the finalize step
+        return {"job_id": job_id, "index": index, "status": "error", "error": str(e)}
+
+    transcription_jobs.record_chunk_result(job_id, index, result["text"], result["model_tier"])
+    return {"job_id": job_id, "index": index, "status": "success", "model_tier": result["model_tier"]}
+
+@celery_app.task
+def finalize_transcription_job_task(results: list, job_id: str):
+    """Mark a transcription job finished once every chunk task has returned"""
+    job = transcription_jobs.get_job(job_id)
+    if job is None:
+        return {"status": "expired", "job_id": job_id}
+
+    if job["completed_chunks"] < job["total_chunks"]:
+        transcription_jobs.fail_job(job_id, f"{job['total_chunks'] - job['completed_chunks']} chunk(s) failed")
+        return {"status": "failed", "job_id": job_id}
+
+    transcription_jobs.complete_job(job_id)
+    logger.info(f"Transcription job {job_id} completed ({job['total_chunks']} chunks)")
+    return {"status": "completed", "job_id": job_id}
+
+@celery_app.task(bind=True)
+def rescore_messages_task(self, run_id: str = None, batch_size: int = None):
+    """Re-score stored messages with the current risk keyword config (resumable)"""
+    from .services.risk_backfill import RiskBackfill
+
+    def report(state: dict):
+        self.update_state(state="PROGRESS", meta=state)
+
+    try:
+        return RiskBackfill(run_id=run_id, batch_size=batch_size).run(progress_callback=report)
+    except Exception as e:
+        logger.error(f"Risk backfill error: {e}")
+        return {"status": "error", "error": str(e)}
+
+@celery_app.task(bind=True)
+def reencrypt_data_task(self, run_id: str = None, batch_size: int = None, repack: bool = False):
+    """Re-encrypt stored PHI under the current key and, with repack, the
+    current compression format (throttled, resumable)"""
+    from .services.reencryption import Reencryption
+
+    def report(state: dict):
+        self.update_state(state="PROGRESS", meta=state)
+
+    try:
+        return Reencryption(run_id=run_id, batch_size=batch_size, repack=repack).run(progress_callback=report)
+    except Exception as e:
+        logger.error(f"Re-encryption error: {e}")
+        return {"status": "error", "error": str(e)}
+
+@celery_app.task
+def ensure_partitions_task():
+    """Create upcoming monthly partitions of messages and audit_logs"""
+    from .db import engine
+    from .services.partitions import ensure_partitions
+
+    with engine.begin() as connection:
+        return {"created": ensure_partitions(connection)}
+
+@celery_app.task
+def enforce_retention_policy_task():
+    """Drop and purge data past its retention period"""
+    from .services.retention import enforce_retention_policy
+
+    try:
+        return enforce_retention_policy()
+    except Exception as e:
+        logger.error(f"Retention policy error: {e}")
+        return {"status": "error", "error": str(e)}
+
+@celery_app.task
+def reconcile_counters_task():
+    """Correct drift in the /admin/metrics counters against the source tables"""
+    from .db import engine
+    from .services.counters import reconcile_counters
+
+    return {"drift": reconcile_counters(engine)}
@@ -0,0 +1,176 @@
+"""Fakes shared by the unit tests: Redis, database sessions, field keys and callers.
+
+Each is exposed as a fixture; tests patch the fake into the module under test
+themselves (e.g. monkeypatch.setattr("app.services.principals.get_redis", ...)),
+since every module looks its clients up under its own name.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from cryptography.fernet import Fernet, MultiFernet
+from sqlalchemy.dialects import postgresql
+
+from app.security import encryption
+from app.services.principals import Principal, RoleRef
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value if isinstance(value, bytes) else str(value).encode()
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, b"0")) + 1).encode()
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def eval(self, script, numkeys, key, generation_key, value, ex, generation):
+        """The principal cache's put-if-current script"""
+        if self.values.get(generation_key, b"0") == generation:
+            self.set(key, value, ex)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((getattr(self.client, name), args))
+
+    def execute(self):
+        for command, args in self.commands:
+            command(*args)
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return self
+
+class FakeSession:
+    """A database session whose every query returns rows.
+
+    Counts the queries that reach it, keeps the last statement executed and
+    what is added, and fills in ids on flush like the database would.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = 0
+        self.statement = None
+        self.added = []
+        self.closed = False
+
+    def execute(self, statement):
+        self.queries += 1
+        self.statement = statement
+        return FakeResult(self.rows)
+
+    def query(self, *entities):
+        return self
+
+    def options(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        self.queries += 1
+        return self.rows[0] if self.rows else None
+
+    def add(self, row):
+        self.added.append(row)
+
+    def _assign_ids(self):
+        for row in self.added:
+            if getattr(row, "id", None) is None:
+                row.id = uuid.uuid4()
+
+    def flush(self):
+        self._assign_ids()
+
+    def commit(self):
+        self._assign_ids()
+
+    def close(self):
+        self.closed = True
+
+class FakeAsyncSession(FakeSession):
+    """FakeSession behind AsyncSession's awaitable methods"""
+
+    async def execute(self, statement):
+        return FakeSession.execute(self, statement)
+
+    async def flush(self):
+        self._assign_ids()
+
+    async def commit(self):
+        self._assign_ids()
+
+    async def refresh(self, row, attribute_names=None):
+        row.created_at = datetime.now(timezone.utc)
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+@pytest.fixture
+def fake_session():
+    """fake_session(rows) -> FakeSession"""
+    return FakeSession
+
+@pytest.fixture
+def fake_async_session():
+    """fake_async_session(rows) -> FakeAsyncSession"""
+    return FakeAsyncSession
+
+@pytest.fixture
+def field_key(monkeypatch):
+    """The only field key; envelope encryption off"""
+    key = Fernet(Fernet.generate_key())
+    monkeypatch.setattr(encryption, "_primary_cipher", key)
+    monkeypatch.setattr(encryption, "_cipher", MultiFernet([key]))
+    monkeypatch.setattr(encryption, "ENVELOPE_ENCRYPTION", False)
+    return key
+
+@pytest.fixture
+def retired_key():
+    """A key no longer configured, for rows nothing can decrypt"""
+    return Fernet(Fernet.generate_key())
+
+@pytest.fixture
+def sql():
+    """sql(statement) -> the statement compiled for Postgres"""
+    return lambda statement: str(statement.compile(dialect=postgresql.dialect()))
+
+@pytest.fixture
+def principal():
+    """principal(role) -> an authenticated caller with that role"""
+    return lambda role: Principal(uuid.uuid4(), f"{role}1", RoleRef(role), False)
@@ -0,0 +1,38 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.analytics import get_escalation_patterns, get_risk_score_distribution
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return FakeResult(self.rows)
+
+class FakeResult(list):
+    def all(self):
+        return list(self)
+
+class TestEscalationPatterns:
+
+    def test_tags_are_counted_in_one_aggregate(self):
+        db = FakeDB([("self_harm", 12), ("hopelessness", 5)])
+        chart = get_escalation_patterns(db)
+        assert chart["labels"] == ["Self Harm", "Hopelessness"]
+        assert chart["datasets"][0]["data"] == [12, 5]
+        [query] = db.statements
+        assert "JOIN jsonb_array_elements_text(messages.risk_tags) AS tag ON true" in query
+        assert "jsonb_typeof(messages.risk_tags)" in query
+        assert "GROUP BY split_part(tag.value" in query
+
+class TestRiskScoreDistribution:
+
+    def test_ranges_come_from_one_width_bucket_query(self):
+        db = FakeDB([(0, 3), (3, 7), (1, 2)])
+        chart = get_risk_score_distribution(db)
+        assert chart["datasets"][0]["data"] == [3, 2, 0, 7]
+        [query] = db.statements
+        assert "width_bucket(messages.risk_score, CAST(ARRAY[" in query
+        assert "messages.risk_score BETWEEN" in query
@@ -0,0 +1,77 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from app.services.audio_preprocessing import (
+    TARGET_SAMPLE_RATE, decode_wav, preprocess_samples, resample, to_mono,
+    trim_silence, cap_duration, whisper_windows
+)
+
+def tone(seconds, sample_rate=TARGET_SAMPLE_RATE, amplitude=0.5, freq=220):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def silence(seconds, sample_rate=TARGET_SAMPLE_RATE):
+    return np.zeros(int(seconds * sample_rate), dtype=np.float32)
+
+def wav_bytes(samples, sample_rate, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+class TestAudioPreprocessing:
+
+    def test_decode_wav_stereo(self):
+        """Interleaved stereo PCM decodes to [n, 2] floats"""
+        stereo = np.stack([tone(0.1), -tone(0.1)], axis=1)
+        samples, sample_rate = decode_wav(wav_bytes(stereo.reshape(-1), TARGET_SAMPLE_RATE, channels=2))
+
+        assert sample_rate == TARGET_SAMPLE_RATE
+        assert samples.shape == stereo.shape
+        assert np.allclose(samples, stereo, atol=1e-3)
+
+    def test_to_mono_averages_channels(self):
+        stereo = np.stack([tone(0.1), -tone(0.1)], axis=1)
+        assert np.allclose(to_mono(stereo), 0.0)
+
+    def test_resample_length(self):
+        audio = tone(1.0, sample_rate=44100)
+        resampled = resample(audio, 44100)
+        assert resampled.dtype == np.float32
+        assert len(resampled) == TARGET_SAMPLE_RATE
+
+    def test_trim_silence_removes_leading_and_trailing(self):
+        audio = np.concatenate([silence(5), tone(2), silence(10)])
+        trimmed = trim_silence(audio, TARGET_SAMPLE_RATE, padding_ms=0)
+
+        assert len(trimmed) / TARGET_SAMPLE_RATE == pytest.approx(2.0, abs=0.05)
+
+    def test_trim_silence_keeps_padding(self):
+        audio = np.concatenate([silence(5), tone(2), silence(10)])
+        trimmed = trim_silence(audio, TARGET_SAMPLE_RATE, padding_ms=200)
+
+        assert len(trimmed) / TARGET_SAMPLE_RATE == pytest.approx(2.4, abs=0.05)
+
+    def test_all_silence_is_empty(self):
+        result = preprocess_samples(silence(10), TARGET_SAMPLE_RATE)
+        assert result.is_silent
+        assert result.original_duration == pytest.approx(10.0)
+
+    def test_cap_duration(self):
+        assert len(cap_duration(tone(10), TARGET_SAMPLE_RATE, max_seconds=3)) == 3 * TARGET_SAMPLE_RATE
+        assert len(cap_duration(tone(10), TARGET_SAMPLE_RATE, max_seconds=0)) == 10 * TARGET_SAMPLE_RATE
+
+    def test_preprocess_reduces_whisper_windows(self):
+        """45s of silence around 10s of speech drops from 2 windows to 1"""
+        audio = np.concatenate([silence(20), tone(10), silence(25)])
+        result = preprocess_samples(audio, TARGET_SAMPLE_RATE, max_seconds=60)
+
+        assert whisper_windows(result.original_duration) == 2
+        assert whisper_windows(result.duration) == 1
+        assert result.trimmed_seconds > 40
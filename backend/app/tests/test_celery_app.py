@@ -0,0 +1,14 @@
+import importlib
+from datetime import timedelta
+
+import app.celery_app
+
+def test_counter_reconciliation_interval_can_exceed_an_hour(monkeypatch):
+    monkeypatch.setenv("COUNTER_RECONCILE_MINUTES", "90")
+    try:
+        module = importlib.reload(app.celery_app)
+        schedule = module.celery_app.conf.beat_schedule["reconcile-counters"]["schedule"]
+        assert schedule.run_every == timedelta(minutes=90)
+    finally:
+        monkeypatch.delenv("COUNTER_RECONCILE_MINUTES")
+        importlib.reload(app.celery_app)
@@ -0,0 +1,60 @@
+import pytest
+
+from app.security import compression
+from app.security.compression import ZstdCodec, pack, unpack, payload_format, needs_repack, train_dictionary
+from app.security.encryption import encrypt_data, decrypt_data, needs_repacking
+
+SAMPLES = [
+    f"Session {index}: I have been feeling anxious about work and my sleep has been poor this week."
+    for index in range(200)
+]
+LONG_TEXT = "I tried the breathing exercise again and it helped a little when I felt overwhelmed. " * 4
+
+@pytest.fixture
+def zstd_enabled(monkeypatch):
+    codec = ZstdCodec(dictionaries=[train_dictionary(SAMPLES, 4096)])
+    monkeypatch.setattr(compression, "ENCRYPTION_COMPRESSION", "zstd")
+    monkeypatch.setattr(compression, "_codec", codec)
+    return codec
+
+class TestPacking:
+
+    def test_plain_payloads_still_unpack(self):
+        assert unpack("legacy text é".encode()) == "legacy text é"
+        assert payload_format(b"legacy") == (0, 0)
+
+    def test_long_text_is_compressed_with_the_dictionary(self, zstd_enabled):
+        payload = pack(LONG_TEXT)
+        assert payload[:2] == bytes((compression.PACKED_MARKER, compression.VERSION_ZSTD))
+        assert len(payload) < len(LONG_TEXT) / 2
+        assert payload_format(payload) == (1, zstd_enabled.dict_id)
+        assert unpack(payload) == LONG_TEXT
+
+    def test_short_text_stays_plain(self, zstd_enabled):
+        assert pack("hello") == b"hello"
+
+    def test_unknown_dictionary_is_an_error(self, zstd_enabled):
+        payload = pack(LONG_TEXT)
+        with pytest.raises(ValueError):
+            unpack(payload, ZstdCodec())
+
+    def test_repack_needed_when_format_changes(self, zstd_enabled, monkeypatch):
+        assert needs_repack(LONG_TEXT.encode())
+        assert not needs_repack(pack(LONG_TEXT))
+        monkeypatch.setattr(compression, "ENCRYPTION_COMPRESSION", "none")
+        assert needs_repack(pack(LONG_TEXT, zstd_enabled))
+
+class TestCompressThenEncrypt:
+
+    def test_round_trip_and_smaller_ciphertext(self, zstd_enabled):
+        ciphertext = encrypt_data(LONG_TEXT)
+        assert decrypt_data(ciphertext) == LONG_TEXT
+        assert not needs_repacking(ciphertext)
+
+    def test_rows_written_before_compression_decrypt_and_need_repacking(self, zstd_enabled, monkeypatch):
+        monkeypatch.setattr(compression, "ENCRYPTION_COMPRESSION", "none")
+        old = encrypt_data(LONG_TEXT)
+        monkeypatch.setattr(compression, "ENCRYPTION_COMPRESSION", "zstd")
+        assert decrypt_data(old) == LONG_TEXT
+        assert needs_repacking(old)
+        assert len(encrypt_data(LONG_TEXT)) < len(old)
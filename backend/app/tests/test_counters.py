@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Message, User, Session as SessionModel
+from app.services.counters import (
+    ACTIVE_SESSION_WINDOW_HOURS, CRITICAL_ESCALATIONS, ESCALATIONS, USERS,
+    active_session_buckets, apply_deltas, counter_deltas, counter_drift, hour_bucket, read_metrics
+)
+
+NOW = datetime(2026, 10, 19, 14, 35, tzinfo=timezone.utc)
+
+def loaded(obj, **committed):
+    """obj as if these values had been loaded from the database"""
+    for attribute, value in committed.items():
+        set_committed_value(obj, attribute, value)
+    return obj
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows[0][0] if self.rows else None
+
+    def all(self):
+        return self.rows
+
+class FakeDB:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.results.pop(0))
+
+class TestBuckets:
+
+    def test_window_is_rounded_out_to_the_hour(self):
+        buckets = active_session_buckets(NOW)
+        assert len(buckets) == ACTIVE_SESSION_WINDOW_HOURS + 1
+        assert buckets[0] == "sessions_started:2026-10-18T14"
+        assert buckets[-1] == hour_bucket(NOW) == "sessions_started:2026-10-19T14"
+
+    def test_naive_times_are_utc(self):
+        assert hour_bucket(datetime(2026, 10, 19, 9, 59)) == "sessions_started:2026-10-19T09"
+
+class TestDeltas:
+
+    def test_new_rows(self):
+        deltas = counter_deltas(
+            new=[
+                User(username="a", role_id=3),
+                SessionModel(started_at=NOW),
+                Message(is_escalated=True, risk_score=0.95),
+                Message(is_escalated=True, risk_score=0.5),
+                Message(is_escalated=False, risk_score=0.1),
+            ],
+            dirty=[], deleted=[]
+        )
+        assert deltas == {
+            USERS: 1, "users_role:3": 1, hour_bucket(NOW): 1, ESCALATIONS: 2, CRITICAL_ESCALATIONS: 1
+        }
+
+    def test_changed_rows_move_between_counters(self):
+        message = loaded(Message(), is_escalated=True, risk_score=0.5)
+        message.risk_score = 0.9
+        user = loaded(User(), role_id=1)
+        user.role_id = 2
+        session = loaded(SessionModel(), started_at=NOW, ended_at=None)
+        session.ended_at = NOW
+        assert counter_deltas(new=[], dirty=[message, user, session], deleted=[]) == {
+            CRITICAL_ESCALATIONS: 1, "users_role:1": -1, "users_role:2": 1, hour_bucket(NOW): -1
+        }
+
+    def test_untracked_changes_are_ignored(self):
+        message = loaded(Message(), is_escalated=True, risk_score=0.9, is_deleted=False)
+        message.is_deleted = True
+        assert counter_deltas(new=[], dirty=[message], deleted=[]) == {}
+
+    def test_deleted_rows(self):
+        user = loaded(User(), role_id=2)
+        message = loaded(Message(), is_escalated=True, risk_score=0.85)
+        assert counter_deltas(new=[], dirty=[], deleted=[user, message]) == {
+            USERS: -1, "users_role:2": -1, ESCALATIONS: -1, CRITICAL_ESCALATIONS: -1
+        }
+
+class TestStorage:
+
+    def test_deltas_are_upserted_in_name_order(self):
+        db = FakeDB([], [])
+        apply_deltas(db, {USERS: 1, ESCALATIONS: -2})
+        sql = [str(statement.compile(dialect=postgresql.dialect())) for statement in db.statements]
+        assert [statement.compile().params["name"] for statement in db.statements] == [ESCALATIONS, USERS]
+        assert "ON CONFLICT (name) DO UPDATE SET value = (metric_counters.value + excluded.value)" in sql[0]
+
+    def test_read_metrics_sums_the_session_window(self):
+        buckets = active_session_buckets(NOW)
+        db = FakeDB([(4,)], [
+            (USERS, 120), ("users_role:4", 7), (ESCALATIONS, 9), (buckets[0], 2), (buckets[-1], 3)
+        ])
+        assert read_metrics(db, NOW) == {
+            "total_users": 120, "active_sessions": 5, "total_escalations": 9, "critical_cases": 0, "consultants": 7
+        }
+
+    def test_drift_skips_buckets_outside_the_window(self):
+        oldest = active_session_buckets(NOW)[0]
+        expected = {USERS: 10, ESCALATIONS: 4, oldest: 1}
+        stored = {USERS: 10, ESCALATIONS: 6, "users_role:9": 1, "sessions_started:2026-10-17T08": 5}
+        assert counter_drift(expected, stored, oldest) == {ESCALATIONS: -2, "users_role:9": -1, oldest: 1}
@@ -0,0 +1,55 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db import async_database_url
+from app.db_pool import instrument_engine, pool_options
+
+class TestAsyncDatabaseUrl:
+
+    def test_sync_urls_use_asyncpg(self):
+        assert async_database_url("postgresql://u:p@db:5432/therapybot") == "postgresql+asyncpg://u:p@db:5432/therapybot"
+        assert async_database_url("postgresql+psycopg2://db/x") == "postgresql+asyncpg://db/x"
+
+    def test_other_urls_are_kept(self):
+        assert async_database_url("postgresql+asyncpg://db/x") == "postgresql+asyncpg://db/x"
+        assert async_database_url("sqlite:///test.db") == "sqlite:///test.db"
+
+def _sample(name, engine):
+    return REGISTRY.get_sample_value(name, {"engine": engine}) or 0.0
+
+def _engine(tmp_path, name, pool_size=1, max_overflow=0, timeout=30.0):
+    options = dict(pool_options(name), pool_size=pool_size, max_overflow=max_overflow, pool_timeout=timeout)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **options)
+    instrument_engine(engine, name)
+    return engine
+
+class TestPoolInstrumentation:
+
+    def test_checkout_state_wait_and_age(self, tmp_path):
+        engine = _engine(tmp_path, "test-state", pool_size=2)
+        waits = _sample("therapybot_db_pool_checkout_wait_seconds_count", "test-state")
+
+        with engine.connect() as first:
+            first.execute(text("SELECT 1"))
+            assert _sample("therapybot_db_pool_checked_out", "test-state") == 1
+        assert _sample("therapybot_db_pool_checked_out", "test-state") == 0
+        assert _sample("therapybot_db_pool_idle", "test-state") == 1
+        assert _sample("therapybot_db_pool_capacity", "test-state") > 0
+        assert _sample("therapybot_db_pool_checkout_wait_seconds_count", "test-state") == waits + 1
+        assert _sample("therapybot_db_connection_age_seconds_count", "test-state") == 1
+
+    def test_timeout_is_counted(self, tmp_path):
+        engine = _engine(tmp_path, "test-timeout", timeout=0.05)
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        assert _sample("therapybot_db_pool_timeouts_total", "test-timeout") == 1
+
+    def test_instrumentation_survives_dispose(self, tmp_path):
+        engine = _engine(tmp_path, "test-dispose")
+        engine.dispose()
+        with engine.connect():
+            assert _sample("therapybot_db_pool_checked_out", "test-dispose") == 1
+        assert _sample("therapybot_db_connection_age_seconds_count", "test-dispose") == 1
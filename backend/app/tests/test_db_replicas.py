@@ -0,0 +1,158 @@
+import os
+import subprocess
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, update
+
+from app.db_replicas import (
+    REPLICA_LAG_CHECK_SECONDS, REPLICA_MAX_LAG_SECONDS, Replica, ReplicaRouter, _on_commit, _on_flush, _on_rollback
+)
+from app.models import Message
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeReplica(Replica):
+    def __init__(self, name, lag):
+        super().__init__(name, engine=f"{name}-engine")
+        self.measured_lag = lag
+        self.measurements = 0
+
+    def measure_lag(self):
+        self.measurements += 1
+        return self.measured_lag
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("redis down")
+
+@pytest.fixture
+def redis_client(fake_redis, monkeypatch):
+    monkeypatch.setattr("app.db_replicas.get_redis", lambda: fake_redis)
+    return fake_redis
+
+class TestReplicaRouter:
+
+    def test_without_replicas_reads_hit_primary(self, redis_client):
+        assert ReplicaRouter("primary", []).choose(uuid.uuid4()) == ("primary", "no_replica")
+
+    def test_fresh_replica_serves_reads(self, redis_client):
+        router = ReplicaRouter("primary", [FakeReplica("replica1", 0.0)])
+        assert router.choose(uuid.uuid4()) == ("replica1-engine", "replica")
+
+    def test_lagging_or_unreachable_replicas_fall_back(self, redis_client):
+        router = ReplicaRouter("primary", [
+            FakeReplica("replica1", REPLICA_MAX_LAG_SECONDS + 1),
+            FakeReplica("replica2", float("inf"))
+        ])
+        assert router.choose() == ("primary", "replica_lagging")
+
+    def test_lagging_replica_is_skipped(self, redis_client):
+        router = ReplicaRouter("primary", [
+            FakeReplica("replica1", REPLICA_MAX_LAG_SECONDS + 1),
+            FakeReplica("replica2", 0.0)
+        ])
+        assert router.choose() == ("replica2-engine", "replica")
+
+    def test_lag_is_measured_at_most_once_per_interval(self, redis_client):
+        replica = FakeReplica("replica1", 0.0)
+        router = ReplicaRouter("primary", [replica])
+        for _ in range(5):
+            router.choose()
+        assert replica.measurements == 1
+
+    def test_recent_write_reads_from_primary(self, redis_client):
+        user_id = uuid.uuid4()
+        router = ReplicaRouter("primary", [FakeReplica("replica1", 1.0)])
+        redis_client.set(f"ryw:{user_id}", time.time())
+        assert router.choose(user_id) == ("primary", "read_your_writes")
+        # Other users still read from the replica
+        assert router.choose(uuid.uuid4())[1] == "replica"
+
+    def test_replica_past_the_write_is_used(self, redis_client):
+        user_id = uuid.uuid4()
+        router = ReplicaRouter("primary", [FakeReplica("replica1", 0.5)])
+        redis_client.set(f"ryw:{user_id}", time.time() - (0.5 + REPLICA_LAG_CHECK_SECONDS + 1))
+        assert router.choose(user_id) == ("replica1-engine", "replica")
+
+    def test_without_redis_reads_stay_on_primary(self, monkeypatch):
+        monkeypatch.setattr("app.db_replicas.get_redis", lambda: BrokenRedis())
+        router = ReplicaRouter("primary", [FakeReplica("replica1", 0.0)])
+        assert router.choose(uuid.uuid4()) == ("primary", "read_your_writes")
+
+class TestRoutingSession:
+
+    def test_reads_replica_then_pins_to_primary_after_a_write(self, redis_client):
+        session = ReplicaRouter("primary", [FakeReplica("replica1", 0.0)]).session(uuid.uuid4())
+        assert session.get_bind(clause=select(Message.id)) == "replica1-engine"
+        assert session.get_bind(clause=update(Message).values(is_escalated=True)) == "primary"
+        assert session.get_bind(clause=select(Message.id)) == "primary"
+
+class TestWriteTracking:
+
+    def test_committed_writes_mark_the_user(self, redis_client):
+        user_id = uuid.uuid4()
+        session = SimpleNamespace(info={"user_id": user_id})
+        _on_flush(session, None)
+        _on_commit(session)
+        assert f"ryw:{user_id}" in redis_client.values
+
+    def test_rolled_back_and_anonymous_writes_are_not_marked(self, redis_client):
+        user_id = uuid.uuid4()
+        session = SimpleNamespace(info={"user_id": user_id})
+        _on_flush(session, None)
+        _on_rollback(session)
+        _on_commit(session)
+        anonymous = SimpleNamespace(info={})
+        _on_flush(anonymous, None)
+        _on_commit(anonymous)
+        assert redis_client.values == {}
+
+# A process that writes before it has ever built the router (or served a read)
+WRITE_THEN_READ = """
+import time, uuid
+import app.deps
+from app import db_replicas
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, update
+from sqlalchemy.orm import Session
+
+class FakeRedis:
+    values = {}
+    def get(self, key):
+        return self.values.get(key)
+    def set(self, key, value, ex=None):
+        self.values[key] = str(value).encode()
+
+redis_client = FakeRedis()
+db_replicas.get_redis = lambda: redis_client
+assert db_replicas._replica_router is None
+
+engine = create_engine("sqlite://")
+counts = Table("counts", MetaData(), Column("id", Integer, primary_key=True), Column("value", Integer))
+counts.create(engine)
+user_id = uuid.uuid4()
+with Session(engine) as db:
+    db.info["user_id"] = user_id
+    db.execute(update(counts).values(value=1))
+    db.commit()
+
+class Replica(db_replicas.Replica):
+    def measure_lag(self):
+        return 1.0
+
+router = db_replicas.ReplicaRouter("primary", [Replica("replica1", "replica1-engine")])
+print(router.choose(user_id)[1])
+"""
+
+class TestWriteTrackingAcrossProcesses:
+
+    def test_writes_are_stamped_before_the_router_is_built(self):
+        result = subprocess.run(
+            [sys.executable, "-c", WRITE_THEN_READ], cwd=BACKEND_DIR, capture_output=True, text=True,
+            env={**os.environ, "DATABASE_REPLICA_URLS": "postgresql://replica.invalid/therapybot"}
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert result.stdout.strip() == "read_your_writes"
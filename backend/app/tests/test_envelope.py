@@ -0,0 +1,129 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.models import UserDataKey
+from app.security.encryption import encrypt_data, decrypt_data
+from app.security.envelope import DataKeyring, DataKeyCache
+
+class FakeKeyStore:
+    """Minimal stand-in for the sessions the keyring opens"""
+
+    def __init__(self):
+        self.rows = {}
+        self.loads = 0
+
+    def __call__(self):
+        return self
+
+    def get(self, model, user_id):
+        self.loads += 1
+        return self.rows.get(user_id)
+
+    def add(self, row):
+        self.rows[row.user_id] = row
+
+    def execute(self, statement):
+        # delete() by user id, or the re-wrap select of every row
+        if statement.is_delete:
+            user_id = statement.whereclause.right.value
+            return SimpleNamespace(rowcount=1 if self.rows.pop(user_id, None) else 0)
+        pending = [row for row in self.rows.values() if not getattr(row, "_seen", False)]
+        for row in pending:
+            row._seen = True
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: pending))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def _keyring(store, key_id="m1", previous=None):
+    keys = {key_id: Fernet(Fernet.generate_key())}
+    keys.update(previous or {})
+    return DataKeyring(session_factory=store, master_keys=(key_id, keys))
+
+class TestDataKeyring:
+
+    def test_round_trip_with_cached_key(self):
+        store = FakeKeyStore()
+        keyring = _keyring(store)
+        user_id = uuid.uuid4()
+
+        ciphertext = keyring.encrypt(user_id, "I feel anxious")
+        assert ciphertext.startswith(f"env1:{user_id}:")
+        assert keyring.decrypt(ciphertext) == "I feel anxious"
+        assert store.rows[user_id].master_key_id == "m1"
+        assert store.loads == 1
+
+    def test_keys_are_per_user(self):
+        keyring = _keyring(FakeKeyStore())
+        first, second = uuid.uuid4(), uuid.uuid4()
+        assert keyring.get_cipher(first, create=True)._signing_key != keyring.get_cipher(second, create=True)._signing_key
+
+    def test_shredding_makes_data_unreadable(self):
+        store = FakeKeyStore()
+        keyring = _keyring(store)
+        user_id = uuid.uuid4()
+        ciphertext = keyring.encrypt(user_id, "private note")
+
+        assert keyring.shred(store, user_id) is True
+        assert keyring.decrypt(ciphertext) is None
+        # The missing key is cached too
+        loads = store.loads
+        assert keyring.decrypt(ciphertext) is None
+        assert store.loads == loads
+
+    def test_cache_evicts_least_recently_used_and_expired(self):
+        cache = DataKeyCache(max_entries=2, ttl_seconds=60)
+        first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        cache.put(first, "a")
+        cache.put(second, "b")
+        cache.get(first)
+        cache.put(third, "c")
+        assert cache.get(second) == (False, None)
+        assert cache.get(first) == (True, "a")
+
+        expired = DataKeyCache(ttl_seconds=-1)
+        expired.put(first, "a")
+        assert expired.get(first) == (False, None)
+
+    def test_rewrap_keeps_existing_ciphertexts_readable(self):
+        store = FakeKeyStore()
+        old_master = Fernet(Fernet.generate_key())
+        old = DataKeyring(session_factory=store, master_keys=("old", {"old": old_master}))
+        user_id = uuid.uuid4()
+        ciphertext = old.encrypt(user_id, "hello")
+
+        new = _keyring(store, key_id="new", previous={"old": old_master})
+        assert new.rewrap_all() == 1
+        assert store.rows[user_id].master_key_id == "new"
+        assert store.rows[user_id].rewrapped_at is not None
+        assert DataKeyring(session_factory=store, master_keys=("new", {"new": new.master_keys["new"]})).decrypt(ciphertext) == "hello"
+
+    def test_unknown_master_key_is_an_error(self):
+        store = FakeKeyStore()
+        user_id = uuid.uuid4()
+        store.rows[user_id] = UserDataKey(user_id=user_id, wrapped_key="x", master_key_id="gone")
+        with pytest.raises(KeyError):
+            _keyring(store).get_cipher(user_id)
+
+class TestEncryptionIntegration:
+
+    def test_legacy_ciphertexts_still_decrypt(self):
+        assert decrypt_data(encrypt_data("legacy")) == "legacy"
+
+    def test_user_data_goes_through_the_keyring(self, monkeypatch):
+        keyring = _keyring(FakeKeyStore())
+        monkeypatch.setattr("app.security.envelope._data_keyring", keyring)
+        user_id = uuid.uuid4()
+
+        ciphertext = encrypt_data("mine", user_id)
+        assert ciphertext.startswith("env1:")
+        assert decrypt_data(ciphertext) == "mine"
@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import encode_cursor
+from app.models import Message
+from app.routes.escalation import _after_cursor, _escalation_page, _escalation_reads
+
+CURSOR_KEY = (0.8, datetime(2026, 10, 1, tzinfo=timezone.utc), uuid.uuid4())
+
+class TestEscalationQueue:
+
+    def test_pages_follow_the_queue_index_order(self, sql):
+        query = sql(_escalation_page("open", 50))
+        assert "messages.escalation_resolved_at IS NULL" in query
+        assert "ORDER BY messages.risk_score DESC, messages.created_at, messages.id" in query
+        assert "LIMIT" in query
+
+    def test_resolved_filter(self, sql):
+        assert "messages.escalation_resolved_at IS NOT NULL" in sql(_escalation_page("resolved", 50))
+
+    def test_tag_filter_is_a_jsonb_containment(self, sql):
+        assert "messages.risk_tags @> " in sql(_escalation_page("open", 50, tag="crisis:self_harm"))
+
+    def test_cursor_starts_the_scan_at_the_last_row(self, sql):
+        query = sql(_escalation_page("open", 50, encode_cursor(*CURSOR_KEY)))
+        assert "messages.risk_score <= " in query
+        assert "messages.risk_score < " in query
+
+    def test_cursor_on_unscored_rows_continues_into_scored_ones(self, sql):
+        predicate = sql(_after_cursor(None, *CURSOR_KEY[1:]))
+        assert "messages.risk_score IS NOT NULL OR messages.risk_score IS NULL AND" in predicate
+
+    def test_malformed_cursor(self):
+        with pytest.raises(HTTPException) as error:
+            _escalation_page("open", 50, "garbage")
+        assert error.value.status_code == 400
+
+class TestEscalationReads:
+
+    def test_a_row_under_a_retired_key_reads_without_content(self, field_key, retired_key):
+        session = SimpleNamespace(user_id=uuid.uuid4(), user=SimpleNamespace(username="patient1"))
+        rows = []
+        for token in [field_key.encrypt(b"help").decode(), retired_key.encrypt(b"lost").decode()]:
+            msg = Message(id=uuid.uuid4(), content=token, created_at=CURSOR_KEY[1], session_id=uuid.uuid4(), risk_score=0.9)
+            msg.__dict__["session"] = session
+            rows.append(msg)
+        assert [read.content for read in _escalation_reads(rows)] == ["help", None]
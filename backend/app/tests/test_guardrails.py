@@ -0,0 +1,97 @@
+from app.services.guardrails import (
+    sanitize_input, validate_response, is_safe_content, get_safety_warning, scan_content,
+    StreamingResponseValidator, STREAM_CARRY_CHARS, sanitize_results, validate_results
+)
+from app.services.content_scanner import KeywordMatcher
+
+class TestContentScanner:
+
+    def test_finds_pii_and_keywords_in_one_scan(self):
+        scan = scan_content("Mail john.doe@example.com or call 555-123-4567, I feel hopeless")
+        assert scan.values('email') == {'john.doe@example.com'}
+        assert scan.values('phone') == {'555-123-4567'}
+        assert scan.has('distress')
+
+    def test_overlapping_phrases_report_every_category(self):
+        scan = scan_content("I will commit suicide plan tonight")
+        assert scan.has('unsafe')
+        assert scan.has('crisis')
+
+    def test_keywords_are_case_insensitive(self):
+        assert scan_content("A WEAPON").values('harmful') == {'weapon'}
+
+    def test_word_boundaries(self):
+        matcher = KeywordMatcher({'risk': ['die']}, word_boundaries=True)
+        assert matcher.find("a healthy diet") == []
+        assert [finding.value for finding in matcher.find("I could die")] == ['die']
+
+class TestGuardrails:
+
+    def test_sanitize_redacts_pii_and_harmful_keywords(self):
+        sanitized = sanitize_input("Card 4111 1111 1111 1111, email a@b.com, about a bomb")
+        assert sanitized == "Card [CARD_REDACTED], email [EMAIL_REDACTED], about a [CONTENT_FILTERED]"
+
+    def test_card_right_after_ssn_or_phone_is_redacted(self):
+        assert sanitize_input("123-45-6789 4111 1111 1111 1111") == "[SSN_REDACTED] [CARD_REDACTED]"
+        assert sanitize_input("555-123-4567 4111 1111 1111 1111") == "[PHONE_REDACTED] [CARD_REDACTED]"
+
+    def test_later_patterns_match_as_if_earlier_ones_were_replaced(self):
+        # The address pattern alone runs on into "word", which the email redaction removes
+        assert sanitize_input("12 Main Street word-a@b.com") == "[ADDRESS_REDACTED] [EMAIL_REDACTED]"
+        # '(' after a replacement is no longer at a word boundary
+        assert sanitize_input("x@y.comdiagnose(555) 123-4567") == "[EMAIL_REDACTED]([PHONE_REDACTED]"
+
+    def test_sanitize_leaves_plain_text_alone(self):
+        assert sanitize_input("  just a normal day  ") == "just a normal day"
+
+    def test_validate_filters_unsafe_and_adds_notes(self):
+        validated = validate_response("Do not overdose. I cannot diagnose you. It feels hopeless.")
+        assert validated.startswith("Do not [RESPONSE_FILTERED].")
+        assert "not medical advice" in validated
+        assert "You are not alone" in validated
+
+    def test_is_safe_content(self):
+        assert not is_safe_content("I want to die")
+        assert not is_safe_content("a@b.com 555-123-4567 123-45-6789")
+        assert is_safe_content("a@b.com 555-123-4567")
+
+    def test_safety_warning(self):
+        assert get_safety_warning("I am going to kill it").startswith("⚠️ CRISIS")
+        assert get_safety_warning("call [PHONE_REDACTED]").startswith("ℹ️")
+        assert get_safety_warning("hello") == ""
+
+    def test_scan_is_reusable_across_checks(self):
+        text = "email me at a@b.com"
+        scan = scan_content(text)
+        assert sanitize_input(text, scan=scan) == sanitize_input(text)
+        assert is_safe_content(text, scan=scan)
+
+    def test_batch_results_keep_input_order(self):
+        texts = ["call 555-123-4567", "hello", "I want to die"]
+        results = sanitize_results(texts)
+        assert [result["original_text"] for result in results] == texts
+        assert results[0]["sanitized_text"] == "call [PHONE_REDACTED]"
+        assert results[2]["warnings"] == ["Content flagged for safety review"]
+        assert validate_results(["overdose"])[0]["sanitized_text"] == "[RESPONSE_FILTERED]"
+
+def _stream(text, chunk_size):
+    validator = StreamingResponseValidator()
+    chunks = [validator.feed(text[start:start + chunk_size]) for start in range(0, len(text), chunk_size)]
+    return "".join(chunks) + validator.finish()
+
+class TestStreamingResponseValidator:
+
+    def test_redacts_matches_split_across_chunks(self):
+        text = "Please never kill yourself. Write to john.doe@example.com or call 555-123-4567 today."
+        for chunk_size in (1, 3, 7, 50):
+            assert _stream(text, chunk_size) == validate_response(text)
+
+    def test_holds_back_only_a_small_window(self):
+        text = "This is a long and entirely harmless sentence about gardening in spring. "
+        emitted = StreamingResponseValidator().feed(text)
+        assert text.startswith(emitted)
+        assert len(text) - len(emitted) <= STREAM_CARRY_CHARS + len("spring. ")
+
+    def test_notes_are_appended_on_finish(self):
+        text = "I cannot diagnose this, and it is not hopeless."
+        assert _stream(text, 4) == validate_response(text)
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services import language_id
+from app.services.language_id import LanguageIdentifier, get_language_identifier
+from app.services.translation import get_supported_languages
+
+# Sentences that are not in the bundled samples
+HELD_OUT = {
+    "en": "my therapist suggested that I should try keeping a journal",
+    "es": "no puedo dormir y estoy muy cansado",
+    "fr": "je ne peux pas dormir et je suis fatigué",
+    "de": "ich kann nicht schlafen und bin sehr müde",
+    "it": "non riesco a dormire e sono molto stanco",
+    "pt": "não consigo dormir e estou muito cansado",
+    "ru": "я не могу спать по ночам",
+    "ja": "夜になると眠れません",
+    "ko": "밤에 잠을 못 자요",
+    "zh": "我晚上睡不着",
+}
+
+class TestLanguageIdentifier:
+
+    def test_covers_supported_languages(self):
+        assert set(get_language_identifier().languages) == set(get_supported_languages())
+
+    @pytest.mark.parametrize("language,text", HELD_OUT.items())
+    def test_identifies_held_out_sentences(self, language, text):
+        prediction = get_language_identifier().identify(text)
+        assert prediction.language == language
+        assert prediction.confidence > 0.3
+
+    def test_unidentifiable_text_defaults_with_zero_confidence(self):
+        identifier = get_language_identifier()
+        for text in ["", "12345 !!!", "مرحبا بكم"]:
+            prediction = identifier.identify(text)
+            assert (prediction.language, prediction.confidence) == ("en", 0.0)
+
+    def test_batch_matches_single_path(self, monkeypatch):
+        identifier = get_language_identifier()
+        texts = list(HELD_OUT.values()) * 3 + ["", "hola"]
+        singles = [identifier.identify(text) for text in texts]
+
+        monkeypatch.setattr(language_id, "SPARSE_MIN_BATCH", 1)
+        batched = identifier.identify_batch(texts)
+        assert [prediction.language for prediction in batched] == [prediction.language for prediction in singles]
+        assert [prediction.confidence for prediction in batched] == pytest.approx(
+            [prediction.confidence for prediction in singles], abs=1e-3
+        )
+
+    def test_bucket_count_must_be_power_of_two(self):
+        with pytest.raises(ValueError):
+            LanguageIdentifier.from_samples({"en": "hello"}, n_buckets=1000)
@@ -0,0 +1,42 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from app.models import Message
+from app.routes import messages
+from app.routes.messages import _message_reads, send_message
+
+def message(content: str) -> Message:
+    return Message(id=uuid.uuid4(), content=content, created_at=datetime.now(timezone.utc), is_escalated=False)
+
+class TestConversation:
+
+    def test_a_row_under_a_retired_key_reads_without_content(self, field_key, retired_key):
+        good = message(field_key.encrypt(b"hello").decode())
+        bad = message(retired_key.encrypt(b"lost").decode())
+        reads = _message_reads([good, bad])
+        assert [read.content for read in reads] == ["hello", None]
+        assert reads[1].id == bad.id
+
+class TestSendMessage:
+
+    def test_both_sides_of_the_exchange_are_stored_encrypted(self, field_key, fake_async_session, principal, monkeypatch):
+        async def get_ai_response(text):
+            return "Breathing exercises can help."
+        monkeypatch.setattr(messages, "get_ai_response", get_ai_response, raising=False)
+        monkeypatch.setattr(messages, "synthesize_speech", lambda text: b"")
+        patient = principal("patient")
+        session_id = uuid.uuid4()
+        db = fake_async_session([(session_id,)])
+
+        response = asyncio.run(send_message(
+            session_id=session_id, content="I feel anxious today", audio=None, translate_to=None,
+            db=db, current_user=patient
+        ))
+
+        stored = [row for row in db.added if isinstance(row, Message)]
+        assert len(stored) == 2
+        assert all(row.sender_id == patient.id for row in stored)
+        assert "Breathing" not in stored[1].content
+        assert [row.get_content() for row in stored] == ["I feel anxious today", "Breathing exercises can help."]
+        assert response.ai_response == "Breathing exercises can help."
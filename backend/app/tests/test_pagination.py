@@ -0,0 +1,23 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import decode_cursor, encode_cursor
+
+class TestCursors:
+
+    def test_round_trip(self):
+        key = (0.75, datetime(2026, 10, 19, 12, 30, tzinfo=timezone.utc), uuid.uuid4())
+        assert decode_cursor(encode_cursor(*key), float, datetime.fromisoformat, uuid.UUID) == key
+
+    def test_none_values_survive(self):
+        message_id = uuid.uuid4()
+        assert decode_cursor(encode_cursor(None, message_id), float, uuid.UUID) == (None, message_id)
+
+    @pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(1, 2), encode_cursor("x", "y", "z")])
+    def test_malformed_cursors_are_rejected(self, cursor):
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor, float, datetime.fromisoformat, uuid.UUID)
+        assert error.value.status_code == 400
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.services.partitions import (
+    add_months, create_partition_sql, drop_partitions_before, ensure_partitions, expired_partitions,
+    missing_partitions, month_start, partition_month, partition_name
+)
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return iter(self.rows)
+
+    def scalar(self):
+        return self.rows[0] if self.rows else None
+
+class FakeConnection:
+    """Records executed SQL; answers the partition listing and row estimate"""
+
+    def __init__(self, existing, lock_busy=()):
+        self.existing = existing
+        self.lock_busy = set(lock_busy)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return FakeResult(sorted(self.existing.get(params["table"], [])))
+        if "reltuples" in sql:
+            return FakeResult([1000])
+        if "DETACH" in sql and sql.split()[-1] in self.lock_busy:
+            raise OperationalError(sql, {}, Exception("lock timeout"))
+        self.statements.append(sql)
+        return FakeResult([])
+
+class FakeEngine:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @contextmanager
+    def connect(self):
+        yield self.connection
+
+    begin = connect
+
+class TestMonths:
+
+    def test_month_math(self):
+        assert month_start(datetime(2026, 10, 19, 13, 5)) == utc(2026, 10, 1)
+        assert add_months(utc(2026, 11, 1), 2) == utc(2027, 1, 1)
+        assert add_months(utc(2026, 1, 1), -1) == utc(2025, 12, 1)
+
+    def test_partition_names_round_trip(self):
+        assert partition_name("audit_logs", utc(2026, 3, 1)) == "audit_logs_p202603"
+        assert partition_month("audit_logs_p202603") == utc(2026, 3, 1)
+        assert partition_month("audit_logs") is None
+
+    def test_partition_bounds_cover_one_month(self):
+        sql = create_partition_sql("messages", utc(2026, 12, 1))
+        assert "messages_p202612 PARTITION OF messages" in sql
+        assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in sql
+
+class TestEnsurePartitions:
+
+    def test_creates_missing_months_ahead(self):
+        connection = FakeConnection({"messages": [partition_name("messages", month_start(datetime.now(timezone.utc)))]})
+        created = ensure_partitions(connection, months_ahead=2)
+        assert len([name for name in created if name.startswith("messages_")]) == 2
+        assert len([name for name in created if name.startswith("audit_logs_")]) == 3
+        assert all("IF NOT EXISTS" in sql for sql in connection.statements)
+
+    def test_missing_partitions_only_reads(self):
+        connection = FakeConnection({"messages": ["messages_p202610"], "audit_logs": ["audit_logs_p202609"]})
+        assert missing_partitions(connection, utc(2026, 10, 19)) == ["audit_logs_p202610"]
+        assert connection.statements == []
+
+class TestRetention:
+
+    def test_only_whole_months_before_the_cutoff_expire(self):
+        names = ["messages_p202603", "messages_p202601", "messages_p202602", "messages_default"]
+        assert expired_partitions(names, utc(2026, 3, 1)) == ["messages_p202601", "messages_p202602"]
+        assert expired_partitions(names, utc(2026, 2, 28)) == ["messages_p202601"]
+
+    def test_detaches_and_drops_expired_partitions(self):
+        connection = FakeConnection({"messages": ["messages_p202601", "messages_p202602"]})
+        dropped = drop_partitions_before(FakeEngine(connection), "messages", utc(2026, 2, 15))
+        assert dropped == [{"partition": "messages_p202601", "estimated_rows": 1000}]
+        assert any("lock_timeout" in sql for sql in connection.statements)
+        assert connection.statements[-3:] == [
+            "ALTER TABLE messages DETACH PARTITION messages_p202601",
+            "DELETE FROM consultant_interventions WHERE message_id IN (SELECT id FROM messages_p202601)",
+            "DROP TABLE messages_p202601",
+        ]
+        assert not any("messages_p202602" in sql for sql in connection.statements)
+
+    def test_locked_partition_is_left_for_the_next_run(self):
+        connection = FakeConnection({"audit_logs": ["audit_logs_p202601", "audit_logs_p202602"]},
+                                    lock_busy=["audit_logs_p202601"])
+        dropped = drop_partitions_before(FakeEngine(connection), "audit_logs", utc(2026, 4, 1))
+        assert [partition["partition"] for partition in dropped] == ["audit_logs_p202602"]
+
+    def test_unpartitioned_tables_are_rejected(self):
+        with pytest.raises(ValueError):
+            drop_partitions_before(FakeEngine(FakeConnection({})), "wellness_logs", utc(2026, 1, 1))
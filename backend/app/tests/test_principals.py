@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.principals import Principal, PrincipalCache, RoleRef
+
+def invalidated_during_load(db, user, invalidate):
+    """The user is changed and invalidated while db is loading them"""
+    load = db.first
+
+    def first():
+        stale = SimpleNamespace(**vars(load()))
+        user.role = SimpleNamespace(name="consultant")
+        invalidate(user.id)
+        return stale
+
+    db.first = first
+    return db
+
+def _user(role="patient"):
+    return SimpleNamespace(id=uuid.uuid4(), username="alice", role=SimpleNamespace(name=role), is_2fa_enabled=False)
+
+@pytest.fixture
+def redis_client(fake_redis, monkeypatch):
+    monkeypatch.setattr("app.services.principals.get_redis", lambda: fake_redis)
+    return fake_redis
+
+@pytest.fixture
+def cache(redis_client):
+    principal_cache = PrincipalCache(ttl_seconds=60)
+    principal_cache._listener = False
+    return principal_cache
+
+class TestPrincipalCache:
+
+    def test_miss_queries_once_then_hits_locally(self, cache, redis_client, fake_session):
+        user = _user()
+        db = fake_session([user])
+
+        first = cache.get(user.id, db)
+        second = cache.get(user.id, db)
+        assert first == second == Principal(user.id, "alice", RoleRef("patient"), False)
+        assert db.queries == 1
+        assert f"principal:{user.id}" in redis_client.values
+
+    def test_redis_hit_needs_no_query(self, cache, redis_client, fake_session):
+        user = _user("consultant")
+        redis_client.set(f"principal:{user.id}", Principal.from_user(user).to_json())
+        db = fake_session([])
+
+        assert cache.get(user.id, db).role.name == "consultant"
+        assert db.queries == 0
+
+    def test_unknown_user_is_none(self, cache, fake_session):
+        assert cache.get(uuid.uuid4(), fake_session([])) is None
+
+    def test_invalidation_evicts_and_publishes(self, cache, redis_client, fake_session):
+        user = _user()
+        db = fake_session([user])
+        cache.get(user.id, db)
+
+        user.role = SimpleNamespace(name="consultant")
+        cache.invalidate(str(user.id))
+        assert redis_client.published == [("principal:invalidate", str(user.id))]
+        assert cache.get(user.id, db).role.name == "consultant"
+        assert db.queries == 2
+
+    def test_invalidation_message_from_another_process(self, cache, fake_session):
+        user = _user()
+        db = fake_session([user])
+        cache.get(user.id, db)
+
+        cache._on_invalidation({"data": str(user.id).encode()})
+        cache._on_invalidation({"data": b"not-a-uuid"})
+        assert cache._get_local(user.id) is None
+
+    def test_expired_entries_are_reloaded(self, redis_client, fake_session):
+        cache = PrincipalCache(ttl_seconds=-1)
+        cache._listener = False
+        user = _user()
+        db = fake_session([user])
+        cache.get(user.id, db)
+        redis_client.values.clear()
+        cache.get(user.id, db)
+        assert db.queries == 2
+
+    def test_put_after_invalidate_is_dropped(self, cache, redis_client, fake_session):
+        user = _user()
+        assert cache.get(user.id, invalidated_during_load(fake_session([user]), user, cache.invalidate)).role.name == "patient"
+        assert f"principal:{user.id}" not in redis_client.values
+        assert cache._get_local(user.id) is None
+
+        db = fake_session([user])
+        assert cache.get(user.id, db).role.name == "consultant"
+        assert cache.get(user.id, db).role.name == "consultant"
+        assert db.queries == 1
+
+    def test_put_after_invalidate_in_another_process_is_dropped(self, cache, redis_client, fake_session):
+        other_process = PrincipalCache()
+        other_process._listener = False
+
+        def invalidate(user_id):
+            other_process.invalidate(user_id)
+            cache._on_invalidation({"data": str(user_id).encode()})
+
+        user = _user()
+        cache.get(user.id, invalidated_during_load(fake_session([user]), user, invalidate))
+        assert f"principal:{user.id}" not in redis_client.values
+        assert cache._get_local(user.id) is None
+        assert cache.get(user.id, fake_session([user])).role.name == "consultant"
+
+    def test_json_round_trip(self):
+        principal = Principal.from_user(_user("admin"))
+        assert Principal.from_json(principal.to_json().encode()) == principal
+
+class TestAsyncLookup:
+
+    @pytest.mark.asyncio
+    async def test_async_miss_then_local_hit(self, cache, fake_async_session):
+        user = _user("consultant")
+        db = fake_async_session([user])
+
+        assert (await cache.get_async(user.id, db)).role.name == "consultant"
+        assert (await cache.get_async(user.id, db)).role.name == "consultant"
+        assert db.queries == 1
+
+    def test_redis_calls_run_off_the_event_loop(self, cache, redis_client, monkeypatch, fake_async_session):
+        threads = []
+        for name in ("mget", "eval"):
+            command = getattr(redis_client, name)
+            monkeypatch.setattr(
+                redis_client, name,
+                lambda *args, command=command: threads.append(threading.get_ident()) or command(*args)
+            )
+        user = _user()
+        db = fake_async_session([user])
+
+        async def request():
+            loop_thread = threading.get_ident()
+            assert (await cache.get_async(user.id, db)).role.name == "patient"
+            return loop_thread
+
+        loop_thread = asyncio.run(request())
+        assert len(threads) == 2
+        assert loop_thread not in threads
+        assert f"principal:{user.id}" in redis_client.values
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.models import Message, WellnessLog
+from app.routes.privacy import export_user_data
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def join(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+class FakeDB:
+    def __init__(self, messages, wellness_logs):
+        self.results = {Message: messages, WellnessLog: wellness_logs}
+
+    def query(self, model):
+        return FakeQuery(self.results.get(model, []))
+
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        pass
+
+class TestExport:
+
+    async def read(self, response):
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    def test_rows_under_a_retired_key_are_exported_without_content(self, field_key, retired_key):
+        messages = [
+            Message(id=uuid.uuid4(), session_id=uuid.uuid4(), content=token, created_at=NOW, is_escalated=False)
+            for token in [field_key.encrypt(b"hello").decode(), retired_key.encrypt(b"lost").decode()]
+        ]
+        logs = [WellnessLog(id=uuid.uuid4(), mood_score=4, note=retired_key.encrypt(b"lost").decode(), created_at=NOW)]
+        user = SimpleNamespace(
+            id=uuid.uuid4(), username="patient1", email="p@example.com", role=SimpleNamespace(name="patient"),
+            created_at=NOW, preferred_language="en"
+        )
+
+        response = export_user_data(db=FakeDB(messages, logs), current_user=user)
+        export = json.loads(asyncio.run(self.read(response)))
+        assert [message["content"] for message in export["messages"]] == ["hello", None]
+        assert export["wellness_logs"][0]["note"] is None
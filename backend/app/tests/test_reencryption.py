@@ -0,0 +1,115 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet, MultiFernet
+from sqlalchemy.dialects import postgresql
+
+from app.security import encryption
+from app.security.encryption import DecryptionError, decrypt_data, encrypt_data, needs_reencryption
+from app.services import reencryption
+from app.models import Message
+from app.security import envelope
+from app.services.reencryption import Reencryption, next_pause, reencrypted_rows
+
+@pytest.fixture
+def rotated_keys(monkeypatch):
+    """Field keys after a rotation: new key first, old key still accepted"""
+    old, new = Fernet(Fernet.generate_key()), Fernet(Fernet.generate_key())
+    monkeypatch.setattr(encryption, "_primary_cipher", new)
+    monkeypatch.setattr(encryption, "_cipher", MultiFernet([new, old]))
+    monkeypatch.setattr(encryption, "ENVELOPE_ENCRYPTION", False)
+    monkeypatch.setattr(reencryption, "ENVELOPE_ENCRYPTION", False)
+    return old, new
+
+class FakeKeyring:
+    """Data keys by owner; records any key it is asked to create"""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.created = []
+
+    def get_cipher(self, user_id, create=False):
+        if user_id not in self.keys and create:
+            self.created.append(user_id)
+            self.keys[user_id] = Fernet(Fernet.generate_key())
+        return self.keys.get(user_id)
+
+    def encrypt(self, user_id, plaintext):
+        cipher = self.get_cipher(user_id, create=True)
+        return f"env1:{user_id}:{cipher.encrypt(plaintext.encode()).decode()}"
+
+class TestKeyRotation:
+
+    def test_old_and_new_tokens_decrypt(self, rotated_keys):
+        old, _ = rotated_keys
+        assert decrypt_data(old.encrypt(b"before rotation").decode()) == "before rotation"
+        assert decrypt_data(encrypt_data("after rotation")) == "after rotation"
+
+    def test_undecryptable_token_raises(self, rotated_keys):
+        stranger = Fernet(Fernet.generate_key())
+        with pytest.raises(DecryptionError):
+            decrypt_data(stranger.encrypt(b"secret").decode())
+
+    def test_unencrypted_values_pass_through(self, rotated_keys):
+        assert decrypt_data("plain AI reply") == "plain AI reply"
+
+    def test_only_old_tokens_need_reencryption(self, rotated_keys):
+        old, _ = rotated_keys
+        assert needs_reencryption(old.encrypt(b"x").decode())
+        assert not needs_reencryption(encrypt_data("x"))
+        assert not needs_reencryption("plain")
+        assert not needs_reencryption(None)
+
+class TestReencryptionWorker:
+
+    def test_rows_are_moved_to_the_current_key(self, rotated_keys):
+        old, new = rotated_keys
+        stale = SimpleNamespace(id=uuid.uuid4(), content=old.encrypt(b"old note").decode(), owner_id=uuid.uuid4())
+        current = SimpleNamespace(id=uuid.uuid4(), content=encrypt_data("new note"), owner_id=uuid.uuid4())
+        broken = SimpleNamespace(
+            id=uuid.uuid4(), content=Fernet(Fernet.generate_key()).encrypt(b"?").decode(), owner_id=uuid.uuid4()
+        )
+
+        failed = []
+        updates = reencrypted_rows([stale, current, broken], "content", failed)
+        assert [update["id"] for update in updates] == [stale.id]
+        assert new.decrypt(updates[0]["content"].encode()) == b"old note"
+        assert failed == [broken.id]
+
+    def test_shredded_owners_get_no_new_data_key(self, rotated_keys, monkeypatch):
+        old, _ = rotated_keys
+        live_owner, shredded_owner = uuid.uuid4(), uuid.uuid4()
+        keyring = FakeKeyring({live_owner: Fernet(Fernet.generate_key())})
+        monkeypatch.setattr(encryption, "ENVELOPE_ENCRYPTION", True)
+        monkeypatch.setattr(reencryption, "ENVELOPE_ENCRYPTION", True)
+        monkeypatch.setattr(reencryption, "get_data_keyring", lambda: keyring)
+        monkeypatch.setattr(envelope, "get_data_keyring", lambda: keyring)
+        live = SimpleNamespace(id=uuid.uuid4(), content=old.encrypt(b"kept").decode(), owner_id=live_owner)
+        shredded = SimpleNamespace(id=uuid.uuid4(), content=old.encrypt(b"forgotten").decode(), owner_id=shredded_owner)
+
+        failed = []
+        updates = reencrypted_rows([live, shredded], "content", failed)
+        assert [update["id"] for update in updates] == [live.id]
+        assert updates[0]["content"].startswith(f"env1:{live_owner}:")
+        assert failed == [shredded.id]
+        assert keyring.created == []
+
+    def test_deleted_rows_and_accounts_are_not_selected(self, rotated_keys):
+        query = str(Reencryption(run_id="test")._query(Message, "content", "sender_id", None).compile(
+            dialect=postgresql.dialect()
+        ))
+        assert "JOIN users ON users.id = messages.sender_id" in query
+        assert "messages.is_deleted IS NOT true" in query
+        assert "users.is_deleted IS NOT true" in query
+
+    def test_pause_backs_off_under_load_and_recovers(self, monkeypatch):
+        monkeypatch.setattr(reencryption, "MIN_PAUSE_SECONDS", 0.1)
+        monkeypatch.setattr(reencryption, "MAX_PAUSE_SECONDS", 1.0)
+        monkeypatch.setattr(reencryption, "TARGET_BATCH_SECONDS", 0.5)
+        monkeypatch.setattr(reencryption, "MAX_ACTIVE_CONNECTIONS", 10)
+
+        assert next_pause(0.1, 0.9, None) == 0.2
+        assert next_pause(0.8, 0.1, 50) == 1.0
+        assert next_pause(0.8, 0.1, 3) == 0.4
+        assert next_pause(0.1, 0.1, None) == 0.1
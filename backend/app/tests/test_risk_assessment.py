@@ -0,0 +1,101 @@
+import pytest
+
+from app.services.risk_assessment import RiskScorer, detect_risk, detect_risk_batch
+
+CONFIG = {
+    "version": "test-1",
+    "threshold": 0.5,
+    "categories": {
+        "critical": {
+            "weight": 1.0, "escalate": True, "keywords": ["kill myself"],
+            "variants": {"kill myself": ["killing myself"]}
+        },
+        "high": {"weight": 0.7, "keywords": ["die", "self harm"], "variants": {"die": ["died", "dying"]}},
+        "negative": {"weight": 0.2, "tagged": False, "keywords": ["awful"]}
+    }
+}
+
+class TestRiskScorer:
+
+    def test_matches_whole_words_only(self):
+        scorer = RiskScorer(CONFIG)
+        assert scorer.match("on a diet") == []
+        assert scorer.match("I could die.") == ["die"]
+
+    def test_phrases_match_across_punctuation(self):
+        scorer = RiskScorer(CONFIG)
+        assert scorer.match("thinking about self-harm") == ["self harm"]
+        assert scorer.match("harm self") == []
+
+    def test_weights_tags_and_escalation(self):
+        scorer = RiskScorer(CONFIG)
+        result = scorer.score("I want to KILL MYSELF")
+        assert result == {
+            "is_risky": True, "risk_score": 1.0, "tags": ["critical:kill myself"],
+            "keyword_version": "test-1", "model_score": None
+        }
+        result = scorer.score("awful, awful day")
+        assert result["risk_score"] == 0.2
+        assert result["tags"] == []
+        assert not result["is_risky"]
+
+    def test_model_score_can_raise_but_not_lower(self):
+        scorer = RiskScorer(CONFIG)
+        assert scorer.score("I could die", model_score=0.0)["risk_score"] == 0.7
+        result = scorer.score("nothing matches here", model_score=0.9)
+        assert result["risk_score"] == 0.45
+        assert result["model_score"] == 0.9
+        # Confident enough to flag the message without any keyword
+        assert result["is_risky"]
+        assert result["tags"] == ["model:high_risk"]
+
+    def test_variants_count_as_their_keyword(self):
+        scorer = RiskScorer(CONFIG)
+        assert scorer.match("she died") == ["die"]
+        assert scorer.match("I'm dying, I could die") == ["die"]
+        assert scorer.match("thought about killing myself") == ["kill myself"]
+        assert scorer.score("he died")["tags"] == ["high:die"]
+        assert scorer.score("died and dying")["risk_score"] == 0.7
+
+    def test_duplicate_keywords_rejected(self):
+        config = {"version": "x", "categories": {"a": {"weight": 1, "keywords": ["die", "Die"]}}}
+        with pytest.raises(ValueError):
+            RiskScorer(config)
+        config = {"version": "x", "categories": {
+            "a": {"weight": 1, "keywords": ["die"]},
+            "b": {"weight": 1, "keywords": ["death"], "variants": {"death": ["die"]}}
+        }}
+        with pytest.raises(ValueError):
+            RiskScorer(config)
+
+    def test_variants_of_unlisted_keywords_rejected(self):
+        config = {"version": "x", "categories": {"a": {"weight": 1, "keywords": ["die"], "variants": {"dead": ["died"]}}}}
+        with pytest.raises(ValueError):
+            RiskScorer(config)
+
+class TestDetectRisk:
+
+    def test_default_config_scores_messages(self):
+        result = detect_risk("I feel hopeless and alone")
+        assert result["tags"] == ["high:hopeless", "moderate:alone"]
+        assert result["is_risky"]
+
+    @pytest.mark.parametrize("message, tag", [
+        ("my brother died last year", "high:die"),
+        ("I overdosed once", "critical:overdose"),
+        ("the hopelessness is constant", "high:hopeless"),
+        ("I keep having suicidal thoughts", "critical:suicide"),
+        ("I've been hurting myself", "critical:hurt myself"),
+        ("thinking about self-harming", "high:self harm"),
+    ])
+    def test_default_config_matches_inflections(self, message, tag):
+        result = detect_risk(message)
+        assert tag in result["tags"]
+        assert result["is_risky"]
+
+    def test_default_config_still_skips_partial_words(self):
+        assert detect_risk("starting a new diet")["tags"] == []
+
+    def test_batch_matches_single_scoring(self):
+        messages = ["I feel fine", "I want to end it all", "so sad"]
+        assert detect_risk_batch(messages) == [detect_risk(message) for message in messages]
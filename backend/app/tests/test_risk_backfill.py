@@ -0,0 +1,39 @@
+import uuid
+from types import SimpleNamespace
+
+from app.security.encryption import encrypt_data
+from app.services.risk_backfill import changed_rows, score_contents
+
+def _row(risk_score, risk_tags, is_escalated):
+    return SimpleNamespace(id=uuid.uuid4(), risk_score=risk_score, risk_tags=risk_tags, is_escalated=is_escalated)
+
+class TestRiskBackfill:
+
+    def test_score_contents_decrypts_before_scoring(self):
+        results = score_contents([encrypt_data("I feel hopeless"), encrypt_data("nice day")])
+        assert results[0]["tags"] == ["high:hopeless"]
+        assert results[1]["risk_score"] == 0.0
+
+    def test_only_changed_rows_are_updated(self):
+        unchanged = _row(0.7, ["high:hopeless"], True)
+        stale = _row(0.7, ["high:die"], True)
+        results = [
+            {"risk_score": 0.7, "tags": ["high:hopeless"], "is_risky": True},
+            {"risk_score": 0.0, "tags": [], "is_risky": False},
+        ]
+        assert changed_rows([unchanged, stale], results) == [
+            {"id": stale.id, "risk_score": 0.0, "risk_tags": [], "is_escalated": False}
+        ]
+
+    def test_crisis_overrides_are_preserved(self):
+        crisis = _row(1.0, ["crisis:immediate_intervention"], True)
+        results = [{"risk_score": 0.0, "tags": [], "is_risky": False}]
+        assert changed_rows([crisis], results) == []
+
+    def test_undecryptable_contents_keep_their_scores(self):
+        from cryptography.fernet import Fernet
+        foreign = Fernet(Fernet.generate_key()).encrypt(b"I feel hopeless").decode()
+        results = score_contents([foreign, encrypt_data("I feel hopeless")])
+        assert results[0] is None
+        assert results[1]["tags"] == ["high:hopeless"]
+        assert changed_rows([_row(0.7, ["high:die"], True)], [None]) == []
@@ -0,0 +1,30 @@
+import numpy as np
+
+from app.services.risk_classifier import HashedNgramClassifier
+
+RISKY = ["i can not go on anymore", "nobody would miss me", "i want it all to stop", "i am a burden to everyone"]
+SAFE = ["had a nice walk today", "work was fine", "looking forward to the weekend", "dinner with friends was fun"]
+
+class TestHashedNgramClassifier:
+
+    def test_features_are_normalized_rows(self):
+        model = HashedNgramClassifier(np.zeros(1024, dtype=np.float32))
+        features = model.transform(["a b c", "", "a a a"])
+        assert features.shape == (3, 1024)
+        norms = np.sqrt(np.asarray(features.multiply(features).sum(axis=1)).ravel())
+        assert np.allclose(norms, [1.0, 0.0, 1.0], atol=1e-6)
+
+    def test_training_separates_classes(self):
+        model = HashedNgramClassifier.train(RISKY + SAFE, [1] * 4 + [0] * 4, n_features=4096)
+        scores = model.predict_proba(RISKY + SAFE)
+        assert scores[:4].min() > scores[4:].max()
+
+    def test_save_and_memory_mapped_load(self, tmp_path):
+        model = HashedNgramClassifier.train(RISKY + SAFE, [1] * 4 + [0] * 4, n_features=4096, version="t1")
+        prefix = str(tmp_path / "risk_model")
+        model.save(prefix)
+
+        loaded = HashedNgramClassifier.load(prefix)
+        assert isinstance(loaded.weights, np.memmap)
+        assert loaded.version == "t1"
+        assert np.allclose(loaded.predict_proba(RISKY), model.predict_proba(RISKY))
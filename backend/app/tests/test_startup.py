@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from app.security import encryption
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Heavy optional dependencies that load on first use, not when the API starts
+LAZY_MODULES = ["vertexai", "elasticsearch", "twilio.rest", "whisper", "torch", "pyttsx3", "qrcode"]
+
+class TestColdStart:
+
+    def test_importing_the_app_skips_heavy_dependencies(self):
+        code = (
+            "import sys, app.main; "
+            f"print(','.join(module for module in {LAZY_MODULES!r} if module in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert result.stdout.strip() == ""
+
+    def test_password_derived_key_is_derived_once(self, monkeypatch):
+        monkeypatch.delenv("ENCRYPTION_KEY", raising=False)
+        monkeypatch.setenv("ENCRYPTION_PASSWORD", "cold-start-test")
+        encryption._derive_key.cache_clear()
+        first = encryption.get_encryption_key()
+        assert encryption.get_encryption_key() == first
+        assert encryption._derive_key.cache_info().misses == 1
@@ -0,0 +1,146 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app import tasks
+from app.routes import voice
+from app.services import audio_preprocessing, transcription_jobs, whisper_models
+from app.services.transcription_jobs import split_into_chunks, assemble_transcript, select_job_tier
+from app.services.whisper_models import PRESSURE_QUEUE_DEPTH, WhisperModelPool
+
+SAMPLE_RATE = 16000
+
+def speech_with_pauses(seconds, pause_every=7.0, pause_length=0.5):
+    """Tone that goes quiet for pause_length every pause_every seconds"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.5 * np.sin(2 * np.pi * 200 * t)
+    audio[(t % pause_every) > pause_every - pause_length] = 0.0
+    return audio.astype(np.float32)
+
+class TestSplitIntoChunks:
+
+    def test_short_audio_is_single_chunk(self):
+        audio = speech_with_pauses(10)
+        chunks = split_into_chunks(audio, SAMPLE_RATE, chunk_seconds=30)
+        assert len(chunks) == 1
+        assert len(chunks[0]) == len(audio)
+
+    def test_empty_audio_has_no_chunks(self):
+        assert split_into_chunks(np.zeros(0, dtype=np.float32), SAMPLE_RATE) == []
+
+    def test_chunks_cover_audio_without_overlap(self):
+        audio = speech_with_pauses(100)
+        chunks = split_into_chunks(audio, SAMPLE_RATE, chunk_seconds=30, search_seconds=2)
+
+        assert sum(len(chunk) for chunk in chunks) == len(audio)
+        assert np.array_equal(np.concatenate(chunks), audio)
+        assert all(len(chunk) <= 30 * SAMPLE_RATE for chunk in chunks)
+
+    def test_cuts_land_in_pauses(self):
+        """Nominal 30s boundary moves back into the pause at 27.5-28s"""
+        audio = speech_with_pauses(60)
+        chunks = split_into_chunks(audio, SAMPLE_RATE, chunk_seconds=30, search_seconds=3)
+
+        cut = len(chunks[0])
+        assert np.abs(audio[cut:cut + SAMPLE_RATE // 10]).max() < 1e-6
+        assert 27.5 <= cut / SAMPLE_RATE <= 28.0
+
+class TestAssembleTranscript:
+
+    def test_in_order_prefix_only(self):
+        texts = {0: " Hello", 1: "there ", 3: "later"}
+        assert assemble_transcript(texts, 4) == "Hello there"
+
+    def test_skips_empty_chunks(self):
+        assert assemble_transcript({0: "a", 1: "  ", 2: "b"}, 3) == "a b"
+
+class FakeBroker:
+    def __init__(self, waiting):
+        self.waiting = waiting
+
+    def llen(self, key):
+        assert key == transcription_jobs.AUDIO_QUEUE
+        if isinstance(self.waiting, Exception):
+            raise self.waiting
+        return self.waiting
+
+class TestJobTier:
+
+    def test_tier_follows_the_shared_audio_backlog(self, monkeypatch):
+        pool = WhisperModelPool(tiers=["tiny", "base", "small"])
+        monkeypatch.setattr(transcription_jobs, "get_redis", lambda: FakeBroker(0))
+        assert select_job_tier(pool) == "small"
+        monkeypatch.setattr(transcription_jobs, "get_redis", lambda: FakeBroker(PRESSURE_QUEUE_DEPTH * 30))
+        assert select_job_tier(pool) == "tiny"
+
+    def test_unknown_backlog_uses_the_default_tier(self, monkeypatch):
+        pool = WhisperModelPool(tiers=["tiny", "base", "small"])
+        monkeypatch.setattr(transcription_jobs, "get_redis", lambda: FakeBroker(ConnectionError("down")))
+        assert select_job_tier(pool) == "base"
+
+    def test_every_chunk_gets_the_job_tier(self, monkeypatch):
+        audio = speech_with_pauses(100)
+        queued = []
+        monkeypatch.setattr(transcription_jobs, "load_upload", lambda job_id: b"upload")
+        monkeypatch.setattr(transcription_jobs, "store_chunks", lambda job_id, chunks, seconds: len(chunks))
+        monkeypatch.setattr(transcription_jobs, "get_redis", lambda: FakeBroker(PRESSURE_QUEUE_DEPTH))
+        monkeypatch.setattr(audio_preprocessing, "preprocess_audio", lambda data, max_seconds: SimpleNamespace(
+            samples=audio, sample_rate=SAMPLE_RATE, duration=len(audio) / SAMPLE_RATE
+        ))
+        monkeypatch.setattr(whisper_models, "_model_pool", WhisperModelPool(tiers=["tiny", "base", "small"]))
+        monkeypatch.setattr(tasks, "chord", lambda header: (lambda callback: queued.extend(header)))
+
+        result = tasks.prepare_transcription_job_task("job-1")
+        assert result["status"] == "processing"
+        assert len(queued) == result["chunks"] > 1
+        assert {signature.args[2] for signature in queued} == {"tiny"}
+
+class FakeUpload:
+    filename = "session.wav"
+
+    def __init__(self, data):
+        self.data = data
+        self.read_sizes = []
+
+    async def read(self, size=-1):
+        self.read_sizes.append(size)
+        return self.data if size < 0 else self.data[:size]
+
+class TestUploadLimit:
+
+    @pytest.fixture
+    def created(self, monkeypatch):
+        jobs = []
+        monkeypatch.setattr(transcription_jobs, "JOB_MAX_UPLOAD_BYTES", 10)
+        monkeypatch.setattr(transcription_jobs, "create_job", lambda *args: jobs.append(args) or "job-1")
+        monkeypatch.setattr(tasks.prepare_transcription_job_task, "delay", lambda job_id: None)
+        return jobs
+
+    def _post(self, upload, content_length=None):
+        headers = {} if content_length is None else {"content-length": str(content_length)}
+        return asyncio.run(voice.create_transcription_job(
+            SimpleNamespace(headers=headers), upload, SimpleNamespace(id="user-1")
+        ))
+
+    def test_declared_length_over_the_limit_is_rejected_unread(self, created):
+        upload = FakeUpload(b"x" * 5)
+        with pytest.raises(HTTPException) as error:
+            self._post(upload, content_length=11)
+        assert error.value.status_code == 413
+        assert upload.read_sizes == []
+        assert created == []
+
+    def test_undeclared_length_is_read_up_to_the_limit(self, created):
+        upload = FakeUpload(b"x" * 50)
+        with pytest.raises(HTTPException) as error:
+            self._post(upload)
+        assert error.value.status_code == 413
+        assert upload.read_sizes == [11]
+        assert created == []
+
+    def test_upload_within_the_limit_is_queued(self, created):
+        assert self._post(FakeUpload(b"x" * 10), content_length=10)["job_id"] == "job-1"
+        assert created == [("user-1", b"x" * 10, "session.wav")]
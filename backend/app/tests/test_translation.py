@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import patch, Mock
+
+from app.services.translation import (
+    TranslationService, TranslationCache, TranslationProvider, LocalTranslationProvider
+)
+
+class CountingProvider(TranslationProvider):
+    name = "counting"
+    max_batch_size = 2
+
+    def __init__(self):
+        self.calls = []
+
+    def translate_batch(self, texts, target_lang, source_lang=None):
+        self.calls.append(list(texts))
+        return [{"translated_text": text.upper(), "source_language": source_lang or "en"} for text in texts]
+
+@pytest.fixture
+def redis_down():
+    redis_client = Mock()
+    redis_client.mget.side_effect = ConnectionError("redis down")
+    redis_client.pipeline.side_effect = ConnectionError("redis down")
+    with patch("app.services.translation.get_redis", return_value=redis_client):
+        yield
+
+class TestTranslationService:
+
+    def test_batches_distinct_misses_per_provider_limit(self, redis_down):
+        provider = CountingProvider()
+        service = TranslationService(provider)
+        results = service.translate_batch(["a", "b", "a", "c"], "es")
+        assert [result.translated_text for result in results] == ["A", "B", "A", "C"]
+        assert provider.calls == [["a", "b"], ["c"]]
+
+    def test_cached_texts_skip_the_provider(self, redis_down):
+        provider = CountingProvider()
+        service = TranslationService(provider)
+        service.translate_batch(["hello"], "es")
+        service.translate_batch(["hello"], "es")
+        service.translate_batch(["hello"], "fr")
+        assert provider.calls == [["hello"], ["hello"]]
+
+    def test_lru_evicts_oldest(self, redis_down):
+        cache = TranslationCache("test", max_entries=2)
+        service = TranslationService(CountingProvider(), cache)
+        service.translate_batch(["a", "b", "c"], "es")
+        assert cache.key("a", "auto", "es") not in cache._entries
+        assert cache.key("c", "auto", "es") in cache._entries
+
+    def test_sentences_are_translated_and_cached_individually(self, redis_down):
+        provider = CountingProvider()
+        service = TranslationService(provider)
+        assert service.translate_sentences("One. Two!\n\nThree", "es") == "ONE. TWO!\n\nTHREE"
+        service.translate_sentences("Two! Four.", "es")
+        assert provider.calls[-1] == ["Four."]
+
+class TestLocalTranslationProvider:
+
+    def test_phrasebook_and_fallback(self):
+        results = LocalTranslationProvider().translate_batch(["Hello", "something else"], "es")
+        assert results[0] == {"translated_text": "hola", "source_language": "en"}
+        assert results[1]["translated_text"] == "[ES] something else"
+
+    def test_detection(self):
+        assert LocalTranslationProvider().detect_language("necesito ayuda") == "es"
+
+    def test_detection_with_confidence(self):
+        predictions = LocalTranslationProvider().detect_languages(["merci beaucoup", "vielen Dank"])
+        assert [prediction.language for prediction in predictions] == ["fr", "de"]
+        assert all(0 < prediction.confidence <= 1 for prediction in predictions)
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.routes import wellness
+from app.routes.wellness import STREAM_BATCH_SIZE, _log_read, _visible_logs, stream_wellness_logs
+
+class TestVisibleLogs:
+
+    def test_patients_only_list_their_own(self, principal, sql):
+        patient = principal("patient")
+        assert "wellness_logs.patient_id = " in sql(_visible_logs(patient, None))
+        with pytest.raises(HTTPException) as error:
+            _visible_logs(patient, uuid.uuid4())
+        assert error.value.status_code == 403
+
+    def test_consultants_list_everyone_or_one_patient(self, principal, sql):
+        consultant = principal("consultant")
+        assert "WHERE" not in sql(_visible_logs(consultant, None))
+        assert "wellness_logs.patient_id = " in sql(_visible_logs(consultant, uuid.uuid4()))
+        assert "ORDER BY wellness_logs.created_at DESC, wellness_logs.id DESC" in sql(_visible_logs(consultant, None))
+
+    def test_other_roles_are_refused(self, principal):
+        with pytest.raises(HTTPException):
+            _visible_logs(principal("guest"), None)
+
+class TestLogReads:
+
+    def test_a_note_under_a_retired_key_reads_as_none(self, field_key, retired_key):
+        rows = [
+            SimpleNamespace(id=uuid.uuid4(), patient_id=uuid.uuid4(), mood_score=5, note=token,
+                            created_at=datetime(2026, 10, 19, tzinfo=timezone.utc))
+            for token in [field_key.encrypt(b"calm").decode(), retired_key.encrypt(b"lost").decode()]
+        ]
+        assert [_log_read(row).note for row in rows] == ["calm", None]
+
+class TestStream:
+
+    def test_streams_ndjson_from_a_server_side_cursor(self, monkeypatch, fake_session, principal):
+        patient_id = uuid.uuid4()
+        rows = [
+            SimpleNamespace(id=uuid.uuid4(), patient_id=patient_id, mood_score=score, note=None,
+                            created_at=datetime(2026, 10, day, tzinfo=timezone.utc))
+            for day, score in [(19, 7), (18, 4)]
+        ]
+        session = fake_session(rows)
+        monkeypatch.setattr(wellness, "get_replica_router", lambda: SimpleNamespace(session=lambda user_id: session))
+
+        response = stream_wellness_logs(patient_id=patient_id, current_user=principal("consultant"))
+
+        async def read():
+            return [json.loads(chunk) async for chunk in response.body_iterator]
+
+        lines = asyncio.run(read())
+
+        assert [line["mood_score"] for line in lines] == [7, 4]
+        assert session.statement.get_execution_options()["yield_per"] == STREAM_BATCH_SIZE
+        assert session.closed
@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch, Mock
+
+from app.services.whisper_models import WhisperModelPool, PRESSURE_QUEUE_DEPTH, LONG_CLIP_SECONDS
+
+class TestWhisperModelPool:
+
+    def test_tiers_are_ordered_fastest_first(self):
+        pool = WhisperModelPool(tiers=["small", "tiny", "base"])
+        assert pool.tiers == ["tiny", "base", "small"]
+        assert pool.default_tier == "base"
+
+    def test_unknown_tier_rejected(self):
+        with pytest.raises(ValueError):
+            WhisperModelPool(tiers=["tiny", "huge"])
+
+    def test_degrades_to_tiny_under_pressure(self):
+        pool = WhisperModelPool(tiers=["tiny", "base", "small"])
+        assert pool.select_tier(10, queue_depth=PRESSURE_QUEUE_DEPTH) == "tiny"
+
+    def test_degrades_to_tiny_for_long_clips(self):
+        pool = WhisperModelPool(tiers=["tiny", "base", "small"])
+        assert pool.select_tier(LONG_CLIP_SECONDS + 1, queue_depth=0) == "tiny"
+
+    def test_upgrades_short_clips_when_idle(self):
+        pool = WhisperModelPool(tiers=["tiny", "base", "small"])
+        assert pool.select_tier(5, queue_depth=0) == "small"
+
+    def test_default_tier_under_moderate_load(self):
+        pool = WhisperModelPool(tiers=["tiny", "base", "small"])
+        assert pool.select_tier(60, queue_depth=1) == "base"
+
+    def test_track_counts_in_flight(self):
+        pool = WhisperModelPool(tiers=["tiny", "base"])
+        with pool.track():
+            with pool.track():
+                assert pool.queue_depth == 2
+        assert pool.queue_depth == 0
+
+    def test_models_load_once_per_tier(self):
+        pool = WhisperModelPool(tiers=["tiny", "base"])
+        whisper = Mock()
+        with patch.dict("sys.modules", {"whisper": whisper}):
+            pool.get_model("tiny")
+            pool.get_model("tiny")
+        whisper.load_model.assert_called_once_with("tiny")
+
+    def test_disabled_tier_rejected(self):
+        pool = WhisperModelPool(tiers=["tiny", "base"])
+        with pytest.raises(ValueError):
+            pool.get_model("small")
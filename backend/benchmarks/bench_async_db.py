@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the sync and async database stacks.
+
+Simulates N concurrent requests inside one event loop, each running a few
+database round trips the way an async route does, with three stacks:
+
+    sync-on-loop     the sync Session called straight from an async handler
+                     (what send_message did before): every wait blocks the loop
+    sync-threadpool  the sync Session in FastAPI's threadpool (what plain def
+                     routes get); capped by the threadpool size
+    async            AsyncSession over asyncpg, as get_async_db provides
+
+and reports throughput, request latency percentiles and the worst event loop
+lag seen by a 10 ms ticker (how long any other request would have stalled).
+Each query is "SELECT pg_sleep(:seconds)" by default so the database wait is
+controlled; --query swaps in a real statement.
+
+Needs a reachable Postgres at DATABASE_URL (and ASYNC_DATABASE_URL, derived
+from it by default) and the asyncpg package.
+
+Usage:
+    python benchmarks/bench_async_db.py [--concurrency 1 10 50 100] [--requests 200]
+        [--queries 3] [--db-seconds 0.005] [--pool-size 20]
+    python benchmarks/bench_async_db.py --query "SELECT id FROM sessions LIMIT 1"
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import ASYNC_DATABASE_URL, DATABASE_URL
+
+def sync_request(session_factory, statement, params, queries):
+    db = session_factory()
+    try:
+        for _ in range(queries):
+            db.execute(statement, params).all()
+        db.commit()
+    finally:
+        db.close()
+
+async def async_request(session_factory, statement, params, queries):
+    async with session_factory() as db:
+        for _ in range(queries):
+            (await db.execute(statement, params)).all()
+        await db.commit()
+
+def make_stacks(statement, params, queries, pool_size):
+    sync_engine = create_engine(DATABASE_URL, pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=pool_size, max_overflow=0)
+    sync_sessions = sessionmaker(bind=sync_engine)
+    async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def sync_on_loop():
+        sync_request(sync_sessions, statement, params, queries)
+
+    async def sync_threadpool():
+        await run_in_threadpool(sync_request, sync_sessions, statement, params, queries)
+
+    async def async_stack():
+        await async_request(async_sessions, statement, params, queries)
+
+    stacks = [("sync-on-loop", sync_on_loop), ("sync-threadpool", sync_threadpool), ("async", async_stack)]
+    return stacks, sync_engine, async_engine
+
+async def loop_lag(stop: asyncio.Event, interval=0.01):
+    """Worst delay of a periodic wake-up past its deadline"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+async def run_level(handler, concurrency, total):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag_task
+    return elapsed, sorted(latencies), worst_lag
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def main_async(args):
+    if args.query:
+        statement, params = text(args.query), {}
+    else:
+        statement, params = text("SELECT pg_sleep(:seconds)"), {"seconds": args.db_seconds}
+    stacks, sync_engine, async_engine = make_stacks(statement, params, args.queries, args.pool_size)
+
+    print(f"{args.requests} requests x {args.queries} queries, pool {args.pool_size}; "
+          f"{'query: ' + args.query if args.query else f'{args.db_seconds * 1000:.1f} ms per query'}")
+    print(f"{'stack':<16} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'loop lag ms':>12}")
+    try:
+        for name, handler in stacks:
+            # Warm the pool so connection setup isn't measured
+            await asyncio.gather(*(handler() for _ in range(min(args.pool_size, max(args.concurrency)))))
+            for concurrency in args.concurrency:
+                elapsed, latencies, worst_lag = await run_level(handler, concurrency, args.requests)
+                print(
+                    f"{name:<16} {concurrency:>5} {args.requests / elapsed:>9.1f} "
+                    f"{statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f} "
+                    f"{percentile(latencies, 0.99) * 1000:>9.1f} {worst_lag * 1000:>12.1f}"
+                )
+    finally:
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--queries", type=int, default=3, help="Round trips per request")
+    parser.add_argument("--db-seconds", type=float, default=0.005, help="Database time per pg_sleep query")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--query", help="Run this statement instead of pg_sleep")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the audio preprocessing stage against raw Whisper input.
+
+Usage:
+    python benchmarks/bench_audio_preprocessing.py                 # synthetic corpus
+    python benchmarks/bench_audio_preprocessing.py clips/*.wav     # your own clips
+    python benchmarks/bench_audio_preprocessing.py --transcribe    # also time Whisper
+
+Without --transcribe the CPU saved is estimated from the number of 30-second
+Whisper windows avoided; with it both variants are actually transcribed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.audio_preprocessing import (
+    TARGET_SAMPLE_RATE, decode_audio, preprocess_samples, to_mono, resample, whisper_windows
+)
+
+def synthetic_clip(rng, speech_seconds: float, lead_silence: float, tail_silence: float,
+                   sample_rate: int = 44100, channels: int = 2) -> np.ndarray:
+    """Voice-like amplitude-modulated tones wrapped in low-level noise"""
+    def noise(seconds):
+        return rng.normal(0, 0.001, (int(seconds * sample_rate), channels)).astype(np.float32)
+
+    t = np.arange(int(speech_seconds * sample_rate)) / sample_rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    voice = 0.3 * envelope * (np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t))
+    voice = np.repeat(voice[:, None], channels, axis=1).astype(np.float32)
+    return np.concatenate([noise(lead_silence), voice + noise(speech_seconds), noise(tail_silence)])
+
+def synthetic_corpus(count: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        clip = synthetic_clip(
+            rng,
+            speech_seconds=rng.uniform(2, 40),
+            lead_silence=rng.uniform(0, 15),
+            tail_silence=rng.uniform(0, 30)
+        )
+        yield f"synthetic_{i:02d}", clip, 44100
+
+def file_corpus(paths):
+    for path in paths:
+        with open(path, "rb") as f:
+            samples, sample_rate = decode_audio(f.read())
+        yield os.path.basename(path), samples, sample_rate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="*", help="Audio files to benchmark (default: synthetic corpus)")
+    parser.add_argument("--transcribe", action="store_true", help="Run Whisper on raw and preprocessed audio")
+    parser.add_argument("--model", default="base", help="Whisper model for --transcribe")
+    parser.add_argument("--max-seconds", type=float, default=300.0)
+    args = parser.parse_args()
+
+    model = None
+    if args.transcribe:
+        import whisper
+        model = whisper.load_model(args.model)
+
+    corpus = file_corpus(args.clips) if args.clips else synthetic_corpus()
+
+    totals = {"raw_s": 0.0, "kept_s": 0.0, "raw_windows": 0, "kept_windows": 0,
+              "prep_cpu": 0.0, "raw_cpu": 0.0, "kept_cpu": 0.0}
+
+    print(f"{'clip':<20} {'raw s':>8} {'kept s':>8} {'win':>7} {'prep ms':>8}" +
+          (f" {'raw cpu':>8} {'kept cpu':>8}" if model else ""))
+    for name, samples, sample_rate in corpus:
+        start = time.process_time()
+        result = preprocess_samples(samples, sample_rate, max_seconds=args.max_seconds)
+        prep_cpu = time.process_time() - start
+
+        raw_windows = whisper_windows(result.original_duration)
+        kept_windows = whisper_windows(result.duration)
+        totals["raw_s"] += result.original_duration
+        totals["kept_s"] += result.duration
+        totals["raw_windows"] += raw_windows
+        totals["kept_windows"] += kept_windows
+        totals["prep_cpu"] += prep_cpu
+
+        line = (f"{name:<20} {result.original_duration:>8.1f} {result.duration:>8.1f} "
+                f"{raw_windows:>3}->{kept_windows:<3} {prep_cpu * 1000:>8.1f}")
+
+        if model:
+            raw_audio = resample(to_mono(samples), sample_rate, TARGET_SAMPLE_RATE)
+            start = time.process_time()
+            model.transcribe(raw_audio)
+            raw_cpu = time.process_time() - start
+            start = time.process_time()
+            if not result.is_silent:
+                model.transcribe(result.samples)
+            kept_cpu = time.process_time() - start
+            totals["raw_cpu"] += raw_cpu
+            totals["kept_cpu"] += kept_cpu
+            line += f" {raw_cpu:>8.2f} {kept_cpu:>8.2f}"
+        print(line)
+
+    print()
+    print(f"Audio seconds:      {totals['raw_s']:.1f} -> {totals['kept_s']:.1f} "
+          f"({100 * (1 - totals['kept_s'] / max(totals['raw_s'], 1e-9)):.1f}% removed)")
+    print(f"Whisper windows:    {totals['raw_windows']} -> {totals['kept_windows']} "
+          f"({100 * (1 - totals['kept_windows'] / max(totals['raw_windows'], 1)):.1f}% fewer)")
+    print(f"Preprocessing CPU:  {totals['prep_cpu'] * 1000:.1f} ms total")
+    if model:
+        saved = totals["raw_cpu"] - totals["kept_cpu"] - totals["prep_cpu"]
+        print(f"Transcription CPU:  {totals['raw_cpu']:.2f}s -> {totals['kept_cpu']:.2f}s "
+              f"(net saved {saved:.2f}s, {100 * saved / max(totals['raw_cpu'], 1e-9):.1f}%)")
+
+if __name__ == "__main__":
+    main()
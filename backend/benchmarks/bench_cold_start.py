@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the API, to keep worker start-up within a budget.
+
+Imports app.main in fresh interpreters under python -X importtime and reports
+the wall time of the import (best of --runs), the slowest modules by
+cumulative time and the self time per top-level package. It fails (exit 1)
+when the import takes longer than --budget-ms or when any of the heavy
+optional dependencies that should only load on first use (Vertex AI SDK,
+Elasticsearch, Twilio, Whisper/torch, pyttsx3, qrcode) were imported.
+
+Run it from backend/ and keep the JSON output (--json) to track start-up
+time across releases:
+
+    python benchmarks/bench_cold_start.py [--runs 5] [--top 25] [--budget-ms 3000]
+    python benchmarks/bench_cold_start.py --module app.celery_app --json > cold_start.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that must be imported lazily, on first use
+LAZY_MODULES = ["vertexai", "elasticsearch", "twilio.rest", "whisper", "torch", "pyttsx3", "qrcode"]
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+def profile_import(module: str):
+    """(wall ms, [(module, self us, cumulative us, depth)]) for one cold import"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - started) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return float(result.stdout.strip().splitlines()[-1]), imports
+
+def summarize(imports, top: int):
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        by_package[name.split(".")[0]] += self_us
+    slowest = sorted(imports, key=lambda entry: entry[2], reverse=True)[:top]
+    packages = sorted(by_package.items(), key=lambda entry: entry[1], reverse=True)[:top]
+    names = {name for name, _, _, _ in imports}
+    lazy_loaded = [module for module in LAZY_MODULES if module in names]
+    return slowest, packages, lazy_loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the API")
+    parser.add_argument("--module", default="app.main", help="module to import (default app.main)")
+    parser.add_argument("--runs", type=int, default=3, help="cold imports to run; the fastest is reported")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "3000")))
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of tables")
+    args = parser.parse_args()
+
+    runs = [profile_import(args.module) for _ in range(args.runs)]
+    wall_ms, imports = min(runs, key=lambda run: run[0])
+    slowest, packages, lazy_loaded = summarize(imports, args.top)
+    over_budget = wall_ms > args.budget_ms
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "wall_ms": round(wall_ms, 1),
+            "budget_ms": args.budget_ms,
+            "modules_imported": len(imports),
+            "slowest": [{"module": name, "cumulative_ms": cumulative / 1000} for name, _, cumulative, _ in slowest],
+            "packages": [{"package": name, "self_ms": self_us / 1000} for name, self_us in packages],
+            "lazy_modules_imported": lazy_loaded
+        }, indent=2))
+    else:
+        print(f"import {args.module}: {wall_ms:.0f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms), "
+              f"{len(imports)} modules")
+        print(f"\n{'cumulative ms':>14}  module")
+        for name, _, cumulative, depth in slowest:
+            print(f"{cumulative / 1000:>14.1f}  {'  ' * depth}{name}")
+        print(f"\n{'self ms':>14}  package")
+        for name, self_us in packages:
+            print(f"{self_us / 1000:>14.1f}  {name}")
+        if lazy_loaded:
+            print(f"\nImported at start-up but should load on first use: {', '.join(lazy_loaded)}")
+
+    if over_budget or lazy_loaded:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Storage and throughput benchmark for compress-then-encrypt, and zstd
+dictionary training.
+
+Compares what ends up in messages.content for plain Fernet, zstd + Fernet and
+zstd with a trained dictionary + Fernet, and the encrypt/decrypt throughput of
+each. Texts are JSON lines of {"text": ...}; --synthetic N generates
+therapy-style chat messages and longer voice-session transcripts instead.
+The dictionary is trained on a separate split from the texts it is measured
+on.
+
+Usage:
+    python benchmarks/bench_encryption_compression.py bench --synthetic 5000 [--dict-size 32768]
+    python benchmarks/bench_encryption_compression.py bench --data transcripts.jsonl
+    python benchmarks/bench_encryption_compression.py train --data messages.jsonl --out models/phi.zdict
+    python benchmarks/bench_encryption_compression.py train --from-db 20000 --out models/phi.zdict
+
+Deploy a dictionary with ENCRYPTION_COMPRESSION=zstd and
+ZSTD_DICTIONARY_PATHS=models/phi.zdict, then migrate existing rows with
+scripts/reencrypt_data.py --repack.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet
+
+from app.security.compression import ZstdCodec, pack, unpack, train_dictionary
+
+OPENERS = [
+    "Hi, it's me again.", "I wanted to talk about this week.", "Sorry for the long message.",
+    "I don't really know where to start.", "Thanks for listening last time."
+]
+SENTENCES = [
+    "I have been feeling really anxious about work and I can't seem to switch off in the evenings.",
+    "My sleep has been all over the place, I wake up at three or four and my mind starts racing.",
+    "I tried the breathing exercise you suggested and it helped a little when I was on the train.",
+    "My mum called on Sunday and we ended up arguing about the same things as always.",
+    "Some days I feel fine and then out of nowhere everything feels heavy again.",
+    "I keep telling myself I should reach out to my friends but I end up cancelling plans.",
+    "The new medication makes me a bit tired in the mornings but my mood seems steadier.",
+    "I noticed I was much calmer after going for a walk at lunch instead of eating at my desk.",
+    "When my manager asked to talk I immediately assumed I had done something wrong.",
+    "I journaled three times this week, which is more than before, and wrote about my dad.",
+    "I felt overwhelmed at the supermarket and had to leave before finishing the shopping.",
+    "I'm worried that I'm a burden to my partner when I talk about how I feel.",
+]
+TRANSCRIPT_FILLERS = ["um,", "you know,", "I mean,", "like,", "so yeah,"]
+
+def synthetic_texts(count, seed=0):
+    """Mostly chat-length messages, with one in five a longer voice transcript"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            words = []
+            for sentence in rng.sample(SENTENCES, rng.randint(6, 12)):
+                for word in sentence.split():
+                    words.append(word)
+                    if rng.random() < 0.05:
+                        words.append(rng.choice(TRANSCRIPT_FILLERS))
+            texts.append(" ".join(words))
+        else:
+            parts = [rng.choice(OPENERS)] if rng.random() < 0.4 else []
+            parts.extend(rng.sample(SENTENCES, rng.randint(1, 4)))
+            texts.append(" ".join(parts))
+    return texts
+
+def load_texts(args):
+    if args.synthetic:
+        return synthetic_texts(args.synthetic)
+    if getattr(args, "from_db", None):
+        from app.db import SessionLocal
+        from app.models import Message
+        from app.security.encryption import decrypt_data, DecryptionError
+        db = SessionLocal()
+        try:
+            rows = db.query(Message.content).filter(Message.risk_score.isnot(None)).order_by(
+                Message.created_at.desc()
+            ).limit(args.from_db).all()
+        finally:
+            db.close()
+        texts = []
+        for (content,) in rows:
+            try:
+                text = decrypt_data(content)
+            except DecryptionError:
+                continue
+            if text:
+                texts.append(text)
+        return texts
+    with open(args.data, encoding="utf-8") as data_file:
+        return [json.loads(line)["text"] for line in data_file if line.strip()]
+
+def measure(name, texts, cipher, codec, repeat):
+    plain_bytes = sum(len(text.encode()) for text in texts)
+    tokens = [cipher.encrypt(pack(text, codec) if codec else text.encode()).decode() for text in texts]
+    stored_bytes = sum(len(token) for token in tokens)
+
+    encrypt_times, decrypt_times = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            cipher.encrypt(pack(text, codec) if codec else text.encode())
+        encrypt_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for token in tokens:
+            payload = cipher.decrypt(token.encode())
+            unpack(payload, codec) if codec else payload.decode()
+        decrypt_times.append(time.perf_counter() - started)
+
+    megabytes = plain_bytes / 1e6
+    print(
+        f"{name:<24} {stored_bytes / len(texts):>10.0f} {stored_bytes / plain_bytes:>8.2f}x "
+        f"{megabytes / min(encrypt_times):>10.1f} {megabytes / min(decrypt_times):>10.1f}"
+    )
+
+def bench(args):
+    texts = load_texts(args)
+    random.Random(1).shuffle(texts)
+    split = len(texts) // 2
+    training, measured = texts[:split], texts[split:]
+    cipher = Fernet(Fernet.generate_key())
+    dictionary = train_dictionary(training, args.dict_size)
+
+    plain_bytes = sum(len(text.encode()) for text in measured)
+    print(f"{len(measured)} texts, mean {plain_bytes / len(measured):.0f} bytes; dictionary "
+          f"{len(dictionary)} bytes trained on {len(training)} other texts")
+    print(f"{'format':<24} {'bytes/row':>10} {'vs text':>9} {'enc MB/s':>10} {'dec MB/s':>10}")
+    measure("fernet", measured, cipher, None, args.repeat)
+    measure(f"zstd-{args.level} + fernet", measured, cipher, ZstdCodec(level=args.level), args.repeat)
+    measure(
+        f"zstd-{args.level}+dict + fernet", measured, cipher,
+        ZstdCodec(level=args.level, dictionaries=[dictionary]), args.repeat
+    )
+
+def train(args):
+    texts = load_texts(args)
+    dictionary = train_dictionary(texts, args.dict_size)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "wb") as dictionary_file:
+        dictionary_file.write(dictionary)
+    print(f"Trained a {len(dictionary)}-byte dictionary on {len(texts)} texts -> {args.out}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("bench", "train"):
+        command = commands.add_parser(name)
+        source = command.add_mutually_exclusive_group(required=True)
+        source.add_argument("--data")
+        source.add_argument("--synthetic", type=int, metavar="N")
+        if name == "train":
+            source.add_argument("--from-db", type=int, metavar="N", help="Sample the N latest user messages")
+        command.add_argument("--dict-size", type=int, default=32 * 1024)
+    commands.choices["train"].add_argument("--out", required=True)
+    commands.choices["bench"].add_argument("--level", type=int, default=3)
+    commands.choices["bench"].add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+    {"bench": bench, "train": train}[args.command](args)
+
+if __name__ == "__main__":
+    main()
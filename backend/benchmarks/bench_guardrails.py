@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the single-pass guardrail scanner on long messages.
+
+Compares the previous multi-pass implementation (kept inline below for
+reference) with the compiled scanner, per function and for the full
+send_message pipeline where one scan is reused by every check. Also
+measures the streaming validator: overhead per token when a response is fed
+token by token, and how many characters it holds back on average.
+
+Usage:
+    python benchmarks/bench_guardrails.py [--lengths 1000 10000 50000] [--repeat 20] [--token-chars 4]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.guardrails import (
+    EMAIL_PATTERN, PHONE_PATTERN, SSN_PATTERN, CREDIT_CARD_PATTERN, ADDRESS_PATTERN,
+    UNSAFE_SUGGESTIONS, HARMFUL_KEYWORDS, MEDICAL_DISCLAIMERS,
+    sanitize_input, validate_response, is_safe_content, get_safety_warning, scan_content,
+    StreamingResponseValidator
+)
+
+# --- Previous multi-pass implementation -------------------------------------
+
+def legacy_sanitize_input(message):
+    sanitized = message
+    sanitized = EMAIL_PATTERN.sub('[EMAIL_REDACTED]', sanitized)
+    sanitized = PHONE_PATTERN.sub('[PHONE_REDACTED]', sanitized)
+    sanitized = SSN_PATTERN.sub('[SSN_REDACTED]', sanitized)
+    sanitized = CREDIT_CARD_PATTERN.sub('[CARD_REDACTED]', sanitized)
+    sanitized = ADDRESS_PATTERN.sub('[ADDRESS_REDACTED]', sanitized)
+    for keyword in HARMFUL_KEYWORDS:
+        if keyword.lower() in sanitized.lower():
+            sanitized = re.sub(re.escape(keyword), '[CONTENT_FILTERED]', sanitized, flags=re.IGNORECASE)
+    return sanitized.strip()
+
+def legacy_validate_response(response):
+    validated = response
+    for unsafe in UNSAFE_SUGGESTIONS:
+        if unsafe.lower() in validated.lower():
+            validated = re.sub(re.escape(unsafe), '[RESPONSE_FILTERED]', validated, flags=re.IGNORECASE)
+    validated = EMAIL_PATTERN.sub('[EMAIL_REDACTED]', validated)
+    validated = PHONE_PATTERN.sub('[PHONE_REDACTED]', validated)
+    validated = SSN_PATTERN.sub('[SSN_REDACTED]', validated)
+    for disclaimer in MEDICAL_DISCLAIMERS:
+        if disclaimer.lower() in validated.lower():
+            validated += "\n\n⚠️ This is not medical advice. Please consult a healthcare professional."
+            break
+    if any(word in validated.lower() for word in ['hopeless', 'no point', 'nothing helps']):
+        validated += "\n\nRemember: You are not alone, and help is available. Consider reaching out to a mental health professional."
+    return validated.strip()
+
+def legacy_is_safe_content(text):
+    text_lower = text.lower()
+    crisis_indicators = ['want to die', 'going to kill', 'plan to hurt', 'suicide plan']
+    if any(indicator in text_lower for indicator in crisis_indicators):
+        return False
+    pii_count = (
+        len(EMAIL_PATTERN.findall(text)) +
+        len(PHONE_PATTERN.findall(text)) +
+        len(SSN_PATTERN.findall(text)) +
+        len(CREDIT_CARD_PATTERN.findall(text))
+    )
+    return pii_count <= 2
+
+def legacy_get_safety_warning(text):
+    text_lower = text.lower()
+    if any(indicator in text_lower for indicator in ['want to die', 'going to kill', 'suicide plan']):
+        return "crisis"
+    if any(pii in text for pii in ['[EMAIL_REDACTED]', '[PHONE_REDACTED]', '[SSN_REDACTED]']):
+        return "pii"
+    return ""
+
+def legacy_pipeline(text):
+    sanitized = legacy_sanitize_input(text)
+    legacy_get_safety_warning(sanitized)
+    legacy_is_safe_content(text)
+
+def scanner_pipeline(text):
+    scan = scan_content(text)
+    sanitized = sanitize_input(text, scan=scan)
+    get_safety_warning(sanitized)
+    is_safe_content(text, scan=scan)
+
+# --- Corpus -----------------------------------------------------------------
+
+WORDS = (
+    "i have been feeling really tired lately and work keeps piling up my sister says "
+    "i should talk to someone about it but it is hard to open up sometimes i feel "
+    "like nothing changes and the days blur together"
+).split()
+
+SPICE = [
+    "john.doe@example.com", "555-123-4567", "123-45-6789", "4111 1111 1111 1111",
+    "hopeless", "weapon", "diagnose", "no point", "kill yourself"
+]
+
+def long_message(rng, length):
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(SPICE) if rng.random() < 0.01 else rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+def stream_tokens(text, token_chars):
+    validator = StreamingResponseValidator()
+    emitted = 0
+    held = 0
+    for start in range(0, len(text), token_chars):
+        emitted += len(validator.feed(text[start:start + token_chars]))
+        held += start + token_chars - emitted
+    validator.finish()
+    return held
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--token-chars", type=int, default=4, help="Characters per streamed token")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cases = [
+        ("sanitize_input", legacy_sanitize_input, sanitize_input),
+        ("validate_response", legacy_validate_response, validate_response),
+        ("is_safe_content", legacy_is_safe_content, is_safe_content),
+        ("pipeline (route)", legacy_pipeline, scanner_pipeline),
+    ]
+
+    print(f"{'case':<20} {'chars':>7} {'legacy ms':>10} {'scanner ms':>11} {'speedup':>8}")
+    for length in args.lengths:
+        text = long_message(rng, length)
+        for name, legacy, current in cases:
+            legacy_time = min(timeit.repeat(lambda: legacy(text), number=1, repeat=args.repeat))
+            current_time = min(timeit.repeat(lambda: current(text), number=1, repeat=args.repeat))
+            print(f"{name:<20} {length:>7} {legacy_time * 1000:>10.3f} {current_time * 1000:>11.3f} "
+                  f"{legacy_time / current_time:>7.2f}x")
+
+    print()
+    print(f"{'streaming':<20} {'chars':>7} {'whole ms':>10} {'stream ms':>11} {'us/token':>9} {'held chars':>11}")
+    for length in args.lengths:
+        text = long_message(rng, length)
+        tokens = -(-length // args.token_chars)
+        whole_time = min(timeit.repeat(lambda: validate_response(text), number=1, repeat=args.repeat))
+        stream_time = min(timeit.repeat(lambda: stream_tokens(text, args.token_chars), number=1, repeat=args.repeat))
+        held = stream_tokens(text, args.token_chars) / tokens
+        print(f"{'validate_response':<20} {length:>7} {whole_time * 1000:>10.3f} {stream_time * 1000:>11.3f} "
+              f"{stream_time / tokens * 1e6:>9.2f} {held:>11.1f}")
+
+if __name__ == "__main__":
+    main()
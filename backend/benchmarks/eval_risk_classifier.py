@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Offline training, evaluation and benchmark harness for the hashed n-gram risk
+classifier.
+
+Data is JSON lines of {"text": ..., "label": 0 or 1}. --synthetic N generates
+a toy labelled set instead, which is only useful as a smoke test.
+
+Usage:
+    python benchmarks/eval_risk_classifier.py train --data labelled.jsonl --out models/risk_v1 [--version v1]
+    python benchmarks/eval_risk_classifier.py evaluate --data heldout.jsonl --model models/risk_v1
+    python benchmarks/eval_risk_classifier.py bench --model models/risk_v1 [--batch-sizes 1 100 1000]
+
+Deploy a model with RISK_MODEL_PATH=models/risk_v1 (and RISK_MODEL_WEIGHT).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.risk_assessment import get_risk_scorer, RISK_MODEL_WEIGHT
+from app.services.risk_classifier import HashedNgramClassifier, DEFAULT_FEATURES
+
+RISKY_TEMPLATES = [
+    "i can not {verb} anymore", "nobody would {miss} me if i was gone", "i just want everything to {stop}",
+    "i am a burden to {people}", "there is no way out of {thing}", "i keep thinking about not waking up"
+]
+SAFE_TEMPLATES = [
+    "i had a {good} day at {place}", "{people} and i went to {place}", "i am looking forward to {thing}",
+    "work was {good} today", "i slept better this week", "the new routine at {place} is helping"
+]
+FILLERS = {
+    "verb": ["cope", "do this", "keep going", "handle it"], "miss": ["miss", "notice", "care about"],
+    "stop": ["stop", "end", "go away"], "people": ["my family", "everyone", "my friends", "my partner"],
+    "thing": ["this", "the weekend", "my exams", "the trip"], "good": ["good", "calm", "productive", "nice"],
+    "place": ["the park", "school", "work", "the gym"]
+}
+
+def synthetic_dataset(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        label = rng.random() < 0.3
+        template = rng.choice(RISKY_TEMPLATES if label else SAFE_TEMPLATES)
+        text = template.format(**{key: rng.choice(values) for key, values in FILLERS.items()})
+        rows.append({"text": text, "label": int(label)})
+    return rows
+
+def load_dataset(args):
+    if args.synthetic:
+        return synthetic_dataset(args.synthetic)
+    with open(args.data, encoding="utf-8") as data_file:
+        return [json.loads(line) for line in data_file if line.strip()]
+
+def roc_auc(labels, scores):
+    """Area under the ROC curve via the rank-sum statistic"""
+    labels = np.asarray(labels)
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(scores, kind="mergesort")] = np.arange(1, len(scores) + 1)
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    if not positives or not negatives:
+        return float("nan")
+    return (ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives)
+
+def report(name, labels, predicted):
+    labels = np.asarray(labels, dtype=bool)
+    predicted = np.asarray(predicted, dtype=bool)
+    true_positives = int((labels & predicted).sum())
+    precision = true_positives / max(int(predicted.sum()), 1)
+    recall = true_positives / max(int(labels.sum()), 1)
+    f1 = 2 * precision * recall / max(precision + recall, 1e-9)
+    print(f"{name:<22} precision {precision:.3f}  recall {recall:.3f}  f1 {f1:.3f}")
+
+def train(args):
+    rows = load_dataset(args)
+    started = time.perf_counter()
+    model = HashedNgramClassifier.train(
+        [row["text"] for row in rows], [row["label"] for row in rows],
+        n_features=args.features, epochs=args.epochs, version=args.version
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    model.save(args.out)
+    print(f"Trained on {len(rows)} messages in {time.perf_counter() - started:.1f}s -> {args.out}.npy/.json")
+
+def evaluate(args):
+    rows = load_dataset(args)
+    texts = [row["text"] for row in rows]
+    labels = [row["label"] for row in rows]
+    model = HashedNgramClassifier.load(args.model)
+    scorer = get_risk_scorer()
+
+    model_scores = model.predict_proba(texts)
+    keyword_results = [scorer.score(text) for text in texts]
+    blended_results = [scorer.score(text, float(score)) for text, score in zip(texts, model_scores)]
+
+    print(f"{len(rows)} messages, {sum(labels)} risky; model {model.version}, keywords {scorer.version}, "
+          f"blend weight {RISK_MODEL_WEIGHT}")
+    print(f"model ROC AUC {roc_auc(labels, model_scores):.3f}")
+    report("keywords only", labels, [result["is_risky"] for result in keyword_results])
+    report("model only (p>=0.5)", labels, model_scores >= 0.5)
+    report("blended", labels, [result["is_risky"] for result in blended_results])
+
+def bench(args):
+    model = HashedNgramClassifier.load(args.model)
+    texts = [row["text"] for row in synthetic_dataset(max(args.batch_sizes), seed=1)]
+    print(f"{'batch size':>10} {'ms/batch':>10} {'us/message':>11}")
+    for size in args.batch_sizes:
+        batch = texts[:size]
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            model.predict_proba(batch)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        print(f"{size:>10} {best * 1000:>10.3f} {best / size * 1e6:>11.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("train", "evaluate"):
+        command = commands.add_parser(name)
+        source = command.add_mutually_exclusive_group(required=True)
+        source.add_argument("--data")
+        source.add_argument("--synthetic", type=int, metavar="N")
+    commands.choices["train"].add_argument("--out", required=True)
+    commands.choices["train"].add_argument("--features", type=int, default=DEFAULT_FEATURES)
+    commands.choices["train"].add_argument("--epochs", type=int, default=200)
+    commands.choices["train"].add_argument("--version", default="v1")
+    commands.choices["evaluate"].add_argument("--model", required=True)
+
+    bench_command = commands.add_parser("bench")
+    bench_command.add_argument("--model", required=True)
+    bench_command.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    bench_command.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+    {"train": train, "evaluate": evaluate, "bench": bench}[args.command](args)
+
+if __name__ == "__main__":
+    main()
@@ -107,8 +107,9 @@ function Dashboard() {
         headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
       });
       if (response.ok) {
+        // First page of the open queue, already highest risk first
         const data = await response.json();
-        const sortedMessages = data.sort((a, b) => b.risk_score - a.risk_score);
+        const sortedMessages = data.items;
         setEscalatedMessages(sortedMessages);
         setFilteredMessages(sortedMessages);
       } else {
@@ -158,8 +159,9 @@ function Dashboard() {
         headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
       });
       if (response.ok) {
+        // Most recent page, newest first
         const data = await response.json();
-        setWellnessLogs(data);
+        setWellnessLogs(data.items);
       }
     } catch (error) {
       console.error('Error fetching wellness logs:', error);
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Re-encrypt stored message content and wellness notes under the current key.
+
+Run after rotating ENCRYPTION_KEY (with the old key in ENCRYPTION_PREVIOUS_KEYS)
+or after turning on envelope encryption. Throttles itself by database load and
+is resumable: re-running with the same run id continues after the last
+committed batch. Once it completes with no failures, the previous keys can be
+removed.
+
+With --repack it also rewrites values whose payload isn't in the current
+compression format, i.e. migrates existing rows after ENCRYPTION_COMPRESSION
+or ZSTD_DICTIONARY_PATHS changes (see benchmarks/bench_encryption_compression.py
+for training a dictionary).
+
+Usage:
+    python scripts/reencrypt_data.py [--run-id <id>] [--batch-size 500] [--repack]
+    python scripts/reencrypt_data.py --status [--run-id <id>] [--repack]
+"""
+import argparse
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app.services.reencryption import Reencryption, default_run_id, get_progress
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run-id", help="Progress key (defaults to the current key fingerprint and scheme)")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--repack", action="store_true", help="Also migrate rows to the current compression format")
+    parser.add_argument("--status", action="store_true", help="Print the stored progress and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        print(get_progress(args.run_id or default_run_id(args.repack)) or "No such run")
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    state = Reencryption(run_id=args.run_id, batch_size=args.batch_size, repack=args.repack).run()
+    print(
+        f"Done: {state['processed']} values read, {state['updated']} re-encrypted, "
+        f"{state['failed']} not decryptable"
+    )
+
+if __name__ == "__main__":
+    main()
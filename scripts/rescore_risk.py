@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Re-score stored messages after the risk keyword config changes.
+
+Resumable: re-running with the same run id continues after the last
+committed batch. Scoring runs in a process pool of --workers processes.
+
+Usage:
+    python scripts/rescore_risk.py [--run-id v2024.1] [--batch-size 1000] [--workers 8] [--pause 0.1]
+"""
+import argparse
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app.services.risk_backfill import RiskBackfill
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run-id", help="Progress key (defaults to the keyword config version)")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--pause", type=float, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    backfill = RiskBackfill(
+        run_id=args.run_id, batch_size=args.batch_size, workers=args.workers, pause_seconds=args.pause
+    )
+    state = backfill.run()
+    print(f"Done: {state['processed']} messages re-scored, {state['updated']} updated")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Re-wrap every per-user data key under the current master key.
+
+Rotate the master key by setting ENVELOPE_MASTER_KEY / ENVELOPE_MASTER_KEY_ID
+to the new key and adding the old one to ENVELOPE_PREVIOUS_MASTER_KEYS
+("<id>:<key>"), then run this. Only user_data_keys rows are rewritten (one per
+user); message and wellness rows are untouched. Safe to re-run: keys already
+under the current master key are skipped. Once it reports nothing left to do,
+the old master key can be retired.
+
+Usage:
+    python scripts/rewrap_data_keys.py [--batch-size 500]
+"""
+import argparse
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.app.security.envelope import get_data_keyring
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    keyring = get_data_keyring()
+    rewrapped = keyring.rewrap_all(batch_size=args.batch_size)
+    print(f"Done: {rewrapped} data keys re-wrapped under master key '{keyring.master_key_id}'")
+
+if __name__ == "__main__":
+    main()
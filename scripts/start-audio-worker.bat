@@ -0,0 +1,5 @@
+@echo off
+echo Starting Celery Audio Worker...
+cd /d "%~dp0..\backend"
+set WHISPER_PRELOAD=true
+celery -A app.celery_app worker -Q audio --loglevel=info --concurrency=2
@@ -0,0 +1,5 @@
+@echo off
+echo Starting Celery Beat...
+cd /d "%~dp0..\backend"
+rem Run exactly one beat process per deployment, or scheduled tasks run twice
+celery -A app.celery_app beat --loglevel=info --schedule=celerybeat-schedule
@@ -0,0 +1,5 @@
+@echo off
+echo Starting Celery Maintenance Worker...
+cd /d "%~dp0..\backend"
+rem Partition upkeep, counter reconciliation, retention and the backfills
+celery -A app.celery_app worker -Q maintenance --loglevel=info --concurrency=1